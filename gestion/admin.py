@@ -1,15 +1,76 @@
-from django.contrib import admin
+import csv
+
+from django.contrib import admin, messages
+from django.shortcuts import redirect, render
+from django.urls import path
+from .forms import ImportForm
+from .importation import creer_importateur, lire_lignes, ouvrir_fichier_televerse
 from .models import (
     Utilisateur, Client, Chambre, ServiceSupplementaire,
-    Reservation, ReservationService, Sejour, Paiement
+    Reservation, ReservationService, Sejour, Paiement, StatistiqueJournaliere,
+    PlanTarifaire, RemiseDuree
 )
 
+
+# Import en masse depuis la liste de l'administration (bouton « Importer »)
+class ImportAdminMixin:
+    type_import = None
+    change_list_template = 'admin/gestion/change_list_import.html'
+    
+    def get_urls(self):
+        urls = [
+            path(
+                'importer/',
+                self.admin_site.admin_view(self.importer_view),
+                name=f'{self.opts.app_label}_{self.opts.model_name}_importer'
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def importer_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:index')
+        
+        rapport = None
+        form = ImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            importateur = creer_importateur(self.type_import, request.user)
+            try:
+                rapport = importateur.importer(
+                    lire_lignes(
+                        ouvrir_fichier_televerse(form.cleaned_data['fichier']),
+                        form.cleaned_data['format_fichier']
+                    ),
+                    depuis=form.cleaned_data['depuis'] or 0
+                )
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                messages.error(request, f'Fichier illisible : {e}')
+            else:
+                niveau = messages.WARNING if rapport.erreurs else messages.SUCCESS
+                self.message_user(
+                    request,
+                    f'{rapport.inserees} ligne(s) insérée(s), {rapport.ignorees} déjà présente(s), '
+                    f'{len(rapport.erreurs)} erreur(s).',
+                    niveau
+                )
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': f'Importer des {self.opts.verbose_name_plural.lower()}',
+            'form': form,
+            'rapport': rapport,
+        }
+        return render(request, 'admin/gestion/importer.html', context)
+
+
 # Configuration de l'admin pour Utilisateur
 @admin.register(Utilisateur)
 class UtilisateurAdmin(admin.ModelAdmin):
     list_display = ['get_nom_complet', 'role', 'telephone', 'statut_actif', 'date_creation']
     list_filter = ['role', 'statut_actif', 'date_creation']
     search_fields = ['user__first_name', 'user__last_name', 'user__email', 'telephone']
+    list_select_related = ['user']
     
     def get_nom_complet(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
@@ -18,7 +79,8 @@ class UtilisateurAdmin(admin.ModelAdmin):
 
 # Configuration de l'admin pour Client
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(ImportAdminMixin, admin.ModelAdmin):
+    type_import = 'clients'
     list_display = ['nom', 'prenom', 'email', 'telephone', 'ville', 'pays', 'date_inscription']
     list_filter = ['pays', 'ville', 'piece_identite', 'date_inscription']
     search_fields = ['nom', 'prenom', 'email', 'telephone', 'numero_piece']
@@ -39,7 +101,8 @@ class ClientAdmin(admin.ModelAdmin):
 
 # Configuration de l'admin pour Chambre
 @admin.register(Chambre)
-class ChambreAdmin(admin.ModelAdmin):
+class ChambreAdmin(ImportAdminMixin, admin.ModelAdmin):
+    type_import = 'chambres'
     list_display = ['numero_chambre', 'type_chambre', 'prix_nuit', 'nombre_lits', 'etage', 'statut']
     list_filter = ['type_chambre', 'statut', 'etage']
     search_fields = ['numero_chambre', 'description']
@@ -58,6 +121,25 @@ class ChambreAdmin(admin.ModelAdmin):
     )
 
 
+# Configuration de l'admin pour Plan Tarifaire
+@admin.register(PlanTarifaire)
+class PlanTarifaireAdmin(admin.ModelAdmin):
+    list_display = [
+        'nom', 'type_chambre', 'date_debut', 'date_fin', 'coefficient',
+        'majoration_weekend', 'priorite', 'actif'
+    ]
+    list_filter = ['type_chambre', 'actif']
+    search_fields = ['nom']
+    date_hierarchy = 'date_debut'
+
+
+# Configuration de l'admin pour Remise de Durée
+@admin.register(RemiseDuree)
+class RemiseDureeAdmin(admin.ModelAdmin):
+    list_display = ['nuits_minimum', 'pourcentage', 'type_chambre']
+    list_filter = ['type_chambre']
+
+
 # Configuration de l'admin pour Service Supplémentaire
 @admin.register(ServiceSupplementaire)
 class ServiceSupplementaireAdmin(admin.ModelAdmin):
@@ -77,7 +159,8 @@ class ReservationServiceInline(admin.TabularInline):
 
 # Configuration de l'admin pour Réservation
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(ImportAdminMixin, admin.ModelAdmin):
+    type_import = 'reservations'
     list_display = [
         'id', 'get_client_nom', 'get_chambre', 'date_debut_sejour', 
         'date_fin_sejour', 'nombre_nuits', 'prix_total', 'statut'
@@ -89,6 +172,8 @@ class ReservationAdmin(admin.ModelAdmin):
     ]
     date_hierarchy = 'date_reservation'
     inlines = [ReservationServiceInline]
+    # Recherche au lieu d'une liste déroulante de tous les clients
+    autocomplete_fields = ['client', 'chambre']
     
     fieldsets = (
         ('Client et Chambre', {
@@ -111,6 +196,10 @@ class ReservationAdmin(admin.ModelAdmin):
     
     readonly_fields = ['nombre_nuits']
     
+    def get_queryset(self, request):
+        # Client et chambre joints : liste et autocomplétion (__str__) sans requête par ligne
+        return super().get_queryset(request).select_related('client', 'chambre')
+    
     def get_client_nom(self, obj):
         return obj.client.nom_complet
     get_client_nom.short_description = 'Client'
@@ -133,6 +222,7 @@ class SejourAdmin(admin.ModelAdmin):
         'reservation__chambre__numero_chambre'
     ]
     date_hierarchy = 'date_checkin'
+    autocomplete_fields = ['reservation']
     
     fieldsets = (
         ('Réservation', {
@@ -148,6 +238,10 @@ class SejourAdmin(admin.ModelAdmin):
     
     readonly_fields = ['date_checkin']
     
+    def get_queryset(self, request):
+        # Réservation, client et chambre joints : liste et autocomplétion sans requête par ligne
+        return super().get_queryset(request).select_related('reservation__client', 'reservation__chambre')
+    
     def get_client(self, obj):
         return obj.reservation.client.nom_complet
     get_client.short_description = 'Client'
@@ -170,6 +264,8 @@ class PaiementAdmin(admin.ModelAdmin):
         'reference_transaction'
     ]
     date_hierarchy = 'date_paiement'
+    list_select_related = ['sejour__reservation__client']
+    autocomplete_fields = ['sejour']
     
     fieldsets = (
         ('Séjour', {
@@ -196,3 +292,20 @@ class ReservationServiceAdmin(admin.ModelAdmin):
     list_display = ['reservation', 'service', 'quantite', 'prix_unitaire', 'montant_total']
     list_filter = ['service']
     search_fields = ['reservation__client__nom', 'service__nom_service']
+    list_select_related = ['reservation__client', 'reservation__chambre', 'service']
+
+
+# Configuration de l'admin pour StatistiqueJournaliere (lecture seule)
+@admin.register(StatistiqueJournaliere)
+class StatistiqueJournaliereAdmin(admin.ModelAdmin):
+    list_display = [
+        'jour', 'nuitees_occupees', 'chambres_total', 'revenu_hebergement',
+        'reservations_creees'
+    ]
+    date_hierarchy = 'jour'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
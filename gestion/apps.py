@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class GestionConfig(AppConfig):
     name = 'gestion'
+
+    def ready(self):
+        # Enregistrement des signaux
+        from . import signals  # noqa: F401
@@ -0,0 +1,105 @@
+"""
+Audit de nuit : clôture de la journée hôtelière.
+
+Chaque étape est une poignée d'UPDATE et de DELETE ensemblistes, quel que
+soit le nombre de réservations concernées : aucune instance n'est chargée
+ni sauvegardée une à une. Les UPDATE directs ne déclenchent pas les
+signaux ; chaque étape invalide donc elle-même ce qu'elle rend obsolète
+(nuits réservées, catalogue, résumé journalier, statistiques).
+
+Une étape retourne un dictionnaire de compteurs ; la commande audit_de_nuit
+exécute chacune dans sa propre transaction.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Case, Exists, F, Max, Min, OuterRef, Q, TextField, Value, When
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+from .catalogue import invalider_catalogue
+from .disponibilite import STATUTS_BLOQUANTS
+from .models import Chambre, NuitReservee, Reservation, Sejour
+from .resume_journalier import recalculer_periode
+from .statistiques import invalider_statistiques
+
+# Chambres dont le statut suit l'occupation ; maintenance et hors service restent manuels
+STATUTS_RAPPROCHES = ['DISPONIBLE', 'OCCUPEE']
+
+MENTION_DEPART = "Départ clôturé par l'audit de nuit"
+
+
+def _liberer_nuits_non_bloquantes():
+    """Supprime les nuits réservées par des réservations qui ne bloquent plus la chambre"""
+    nombre, _ = NuitReservee.objects.exclude(reservation__statut__in=STATUTS_BLOQUANTS).delete()
+    return nombre
+
+
+def marquer_non_presentations(jour):
+    """Réservations actives arrivées à échéance sans check-in : non présentées"""
+    reservations = Reservation.objects.filter(
+        statut__in=STATUTS_BLOQUANTS, date_debut_sejour__lte=jour, sejour__isnull=True
+    )
+    # Nuits à retirer du résumé journalier, lues avant le changement de statut
+    periode = reservations.aggregate(debut=Min('date_debut_sejour'), fin=Max('date_fin_sejour'))
+    nombre = reservations.update(statut='NON_PRESENTEE')
+    return {
+        'reservations': nombre,
+        'nuits_liberees': _liberer_nuits_non_bloquantes() if nombre else 0,
+        'periode': (periode['debut'], periode['fin'] - timedelta(days=1)) if nombre else None,
+    }
+
+
+def cloturer_departs(jour):
+    """
+    Clôture les séjours soldés dont le départ est passé ; signale les autres.
+
+    Répare aussi les réservations restées actives alors que leur séjour est
+    clôturé (écart laissé par une interruption).
+    """
+    maintenant = timezone.now()
+    echus = Sejour.objects.filter(date_checkout__isnull=True, reservation__date_fin_sejour__lte=jour)
+    soldes = echus.filter(montant_paye__gte=F('montant_du'))
+
+    # Les réservations d'abord : le filtre des séjours ne dépend pas de leur statut
+    terminees = Reservation.objects.filter(
+        Q(sejour__in=soldes) | Q(sejour__date_checkout__isnull=False),
+        statut__in=STATUTS_BLOQUANTS,
+    ).update(statut='TERMINEE')
+    clotures = soldes.update(
+        date_checkout=maintenant,
+        date_depart_effective=Coalesce('date_depart_effective', Value(maintenant)),
+        commentaire=Case(
+            When(Q(commentaire__isnull=True) | Q(commentaire=''), then=Value(MENTION_DEPART)),
+            default=Concat('commentaire', Value(f'\n{MENTION_DEPART}'), output_field=TextField()),
+            output_field=TextField(),
+        ),
+    )
+    return {
+        'sejours_clotures': clotures,
+        'reservations_terminees': terminees,
+        'nuits_liberees': _liberer_nuits_non_bloquantes() if terminees else 0,
+        'departs_non_soldes': echus.count(),
+    }
+
+
+def rapprocher_chambres():
+    """Statut des chambres aligné sur les séjours en cours (deux UPDATE)"""
+    occupees = Exists(Sejour.objects.filter(
+        reservation__chambre=OuterRef('pk'), date_checkout__isnull=True
+    ))
+    chambres = Chambre.objects.filter(statut__in=STATUTS_RAPPROCHES)
+    resultat = {
+        'occupees': chambres.filter(occupees).exclude(statut='OCCUPEE').update(statut='OCCUPEE'),
+        'liberees': chambres.filter(~occupees).exclude(statut='DISPONIBLE').update(statut='DISPONIBLE'),
+    }
+    if any(resultat.values()):
+        invalider_catalogue()
+    return resultat
+
+
+def consolider_resume(debut, fin):
+    """Recalcule le résumé journalier de debut à fin et invalide les statistiques"""
+    jours = recalculer_periode(debut, fin)
+    invalider_statistiques()
+    return {'jours': jours}
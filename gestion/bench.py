@@ -0,0 +1,324 @@
+"""
+Outils communs aux commandes de benchmark.
+
+Les données générées vivent dans une transaction annulée à la fin de la
+mesure (ou dans une base de test jetable) : les benchmarks ne laissent
+aucune trace dans la base. Seule la commande generer_donnees écrit
+volontairement l'hôtel synthétique de generer_hotel() dans la base
+configurée, pour les tests de charge contre un serveur local.
+"""
+
+import os
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .catalogue import invalider_catalogue
+from .models import Chambre, Client, NuitReservee, Paiement, Reservation, Sejour
+from .parallele import arreter_pool
+from .routage import ALIAS_RAPPORTS
+
+
+@contextmanager
+def donnees_temporaires():
+    """Exécute le bloc dans une transaction systématiquement annulée"""
+    with transaction.atomic():
+        try:
+            yield
+        finally:
+            transaction.set_rollback(True)
+
+
+@contextmanager
+def base_de_test():
+    """
+    Bascule toutes les connexions sur une base de test jetable.
+
+    Nécessaire aux benchmarks multi-threads : chaque thread ouvre sa propre
+    connexion et doit voir des données réellement validées.
+    """
+    nom_initial = connection.settings_dict['NAME']
+    nom_test = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    # La base des rapports lit la base de test, toujours en lecture seule
+    rapports = connections.settings.get(ALIAS_RAPPORTS)
+    if rapports:
+        nom_rapports = rapports['NAME']
+        rapports['NAME'] = f'file:{nom_test}?mode=ro'
+    try:
+        yield
+    finally:
+        # Les threads du pool d'agrégats sont connectés à la base de test
+        arreter_pool()
+        if rapports:
+            connections[ALIAS_RAPPORTS].close()
+            rapports['NAME'] = nom_rapports
+        connection.creation.destroy_test_db(nom_initial, verbosity=0)
+        # Tampons de version (gestion.versions) propres à la base de test
+        for nom in ('catalogue', 'droits', 'tarifs', 'statistiques'):
+            if os.path.exists(f'{nom_test}.{nom}'):
+                os.remove(f'{nom_test}.{nom}')
+
+
+def mesurer(fonction, repetitions=1):
+    """Exécute la fonction et retourne (résultat, nombre de requêtes, durée moyenne en ms)"""
+    # Un simple compteur : le journal des requêtes de Django plafonne à 9000 entrées
+    requetes = 0
+
+    def compter(execute, sql, params, many, context):
+        nonlocal requetes
+        requetes += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(compter):
+        debut = time.perf_counter()
+        for _ in range(repetitions):
+            resultat = fonction()
+        duree = (time.perf_counter() - debut) * 1000 / repetitions
+    return resultat, requetes // repetitions, duree
+
+
+def creer_utilisateur_bench():
+    """Utilisateur technique utilisé comme auteur des réservations générées"""
+    utilisateur, _ = User.objects.get_or_create(username='bench')
+    return utilisateur
+
+
+def creer_chambres(nombre, prefixe='B'):
+    """Crée des chambres variées (type, lits, étage) en une insertion groupée"""
+    types = [code for code, _ in Chambre.TYPE_CHAMBRE_CHOICES]
+    chambres = [
+        Chambre(
+            numero_chambre=f'{prefixe}{i:05d}',
+            type_chambre=types[i % len(types)],
+            prix_nuit=Decimal(200000 + (i % len(types)) * 100000),
+            nombre_lits=1 + i % 3,
+            superficie=Decimal('25.00'),
+            etage=i // 100,
+        )
+        for i in range(nombre)
+    ]
+    chambres = Chambre.objects.bulk_create(chambres, batch_size=1000)
+    # bulk_create ne déclenche pas les signaux : catalogue des chambres à recharger
+    invalider_catalogue()
+    return chambres
+
+
+def creer_clients(nombre, prefixe='bench'):
+    """Crée des clients fictifs en une insertion groupée"""
+    clients = [
+        Client(
+            nom=f'Nom{i}',
+            prenom=f'Prenom{i}',
+            email=f'{prefixe}{i}@exemple.gn',
+            telephone=f'+224{i:09d}',
+            adresse='Conakry',
+            ville='Conakry',
+            piece_identite='CNI',
+            numero_piece=f'{prefixe.upper()}{i:08d}',
+            date_naissance=date(1990, 1, 1),
+        )
+        for i in range(nombre)
+    ]
+    return Client.objects.bulk_create(clients, batch_size=1000)
+
+
+def creer_reservations(chambres, clients, utilisateur, par_chambre=3, horizon=60, graine=42):
+    """Crée quelques réservations aléatoires par chambre sur l'horizon donné"""
+    alea = random.Random(graine)
+    aujourd_hui = date.today()
+    reservations = []
+    for chambre in chambres:
+        for _ in range(par_chambre):
+            debut = aujourd_hui + timedelta(days=alea.randrange(horizon))
+            nuits = alea.randint(1, 7)
+            reservations.append(Reservation(
+                client=alea.choice(clients),
+                chambre=chambre,
+                utilisateur=utilisateur,
+                date_debut_sejour=debut,
+                date_fin_sejour=debut + timedelta(days=nuits),
+                nombre_adultes=1,
+                nombre_personnes=1,
+                nombre_nuits=nuits,
+                prix_total=chambre.prix_nuit * nuits,
+                statut=alea.choice(['EN_ATTENTE', 'CONFIRMEE', 'ANNULEE']),
+            ))
+    return Reservation.objects.bulk_create(reservations, batch_size=1000)
+
+
+def creer_sejours(reservations, proportion_terminee=0.8, graine=42):
+    """Crée un séjour pour chaque réservation confirmée ; la plupart sont terminés"""
+    alea = random.Random(graine)
+    maintenant = timezone.now()
+    sejours = []
+    for reservation in reservations:
+        if reservation.statut != 'CONFIRMEE':
+            continue
+        termine = alea.random() < proportion_terminee
+        sejours.append(Sejour(
+            reservation=reservation,
+            date_arrivee_effective=maintenant,
+            date_checkout=maintenant if termine else None,
+            date_depart_effective=maintenant if termine else None,
+            nombre_personnes=1,
+        ))
+    return Sejour.objects.bulk_create(sejours, batch_size=1000)
+
+
+def creer_paiements(sejours, par_sejour=2, graine=42):
+    """Crée des paiements répartis sur l'année écoulée"""
+    alea = random.Random(graine)
+    modes = [code for code, _ in Paiement.MODE_PAIEMENT_CHOICES]
+    maintenant = timezone.now()
+    paiements = []
+    for sejour in sejours:
+        for _ in range(par_sejour):
+            paiements.append(Paiement(
+                sejour=sejour,
+                montant=Decimal(alea.randrange(50000, 500000, 1000)),
+                mode_paiement=alea.choice(modes),
+                reference_transaction=f'BENCH-{len(paiements):09d}',
+                statut=alea.choice(['VALIDE', 'VALIDE', 'EN_ATTENTE', 'REMBOURSE']),
+            ))
+    paiements = Paiement.objects.bulk_create(paiements, batch_size=1000)
+
+    # date_paiement est auto_now_add : on l'étale ensuite sur un an
+    for paiement in paiements:
+        paiement.date_paiement = maintenant - timedelta(minutes=alea.randrange(365 * 24 * 60))
+    Paiement.objects.bulk_update(paiements, ['date_paiement'], batch_size=1000)
+    return paiements
+
+
+def generer_hotel(chambres=50, clients=1000, sejours_par_chambre=20, paiements_par_sejour=2,
+                  reservations_futures=2, fenetre_libre=30, graine=42):
+    """
+    Hôtel synthétique cohérent, à l'échelle demandée ; retourne les volumes créés.
+
+    Passé : séjours terminés qui s'enchaînent sans chevauchement sur chaque
+    chambre, soldés par des paiements validés. Futur : réservations
+    confirmées ou en attente au-delà de fenetre_libre jours, avec leurs
+    nuits réservées. Les fenetre_libre prochains jours restent libres pour
+    les scénarios de charge (réservation, check-in, paiement, check-out).
+    """
+    from .recherche import indexer_clients
+    from .resume_journalier import recalculer_periode
+    from .statistiques import invalider_statistiques
+
+    alea = random.Random(graine)
+    aujourd_hui = date.today()
+    utilisateur = creer_utilisateur_bench()
+    liste_chambres = creer_chambres(chambres, prefixe='H')
+    liste_clients = creer_clients(clients, prefixe='hotel')
+    for debut in range(0, len(liste_clients), 1000):
+        indexer_clients(liste_clients[debut:debut + 1000])
+
+    passees, futures = [], []
+    for chambre in liste_chambres:
+        # Historique : on remonte le temps depuis hier, séjour après séjour
+        fin = aujourd_hui - timedelta(days=alea.randint(1, 3))
+        for _ in range(sejours_par_chambre):
+            nuits = alea.randint(1, 7)
+            debut = fin - timedelta(days=nuits)
+            passees.append(Reservation(
+                client=alea.choice(liste_clients), chambre=chambre, utilisateur=utilisateur,
+                date_debut_sejour=debut, date_fin_sejour=fin, nombre_adultes=1,
+                nombre_personnes=1, nombre_nuits=nuits, prix_total=chambre.prix_nuit * nuits,
+                statut='TERMINEE',
+            ))
+            fin = debut - timedelta(days=alea.randint(0, 3))
+
+        debut = aujourd_hui + timedelta(days=fenetre_libre + alea.randint(0, 5))
+        for _ in range(reservations_futures):
+            nuits = alea.randint(1, 7)
+            futures.append(Reservation(
+                client=alea.choice(liste_clients), chambre=chambre, utilisateur=utilisateur,
+                date_debut_sejour=debut, date_fin_sejour=debut + timedelta(days=nuits),
+                nombre_adultes=1, nombre_personnes=1, nombre_nuits=nuits,
+                prix_total=chambre.prix_nuit * nuits,
+                statut=alea.choice(['CONFIRMEE', 'CONFIRMEE', 'EN_ATTENTE']),
+            ))
+            debut += timedelta(days=nuits + alea.randint(0, 5))
+
+    Reservation.objects.bulk_create(passees + futures, batch_size=1000)
+    NuitReservee.objects.bulk_create([
+        NuitReservee(
+            chambre_id=reservation.chambre_id, reservation_id=reservation.pk,
+            nuit=reservation.date_debut_sejour + timedelta(days=decalage),
+        )
+        for reservation in futures
+        for decalage in range(reservation.nombre_nuits)
+    ], batch_size=1000)
+
+    # date_reservation est auto_now_add : une requête par date distincte
+    par_date = defaultdict(list)
+    for reservation in passees + futures:
+        jour = reservation.date_debut_sejour - timedelta(days=alea.randint(0, 30))
+        par_date[min(jour, aujourd_hui)].append(reservation.pk)
+    for jour, pks in par_date.items():
+        Reservation.objects.filter(pk__in=pks).update(
+            date_reservation=timezone.make_aware(datetime(jour.year, jour.month, jour.day, 10))
+        )
+
+    def a_midi(jour):
+        return timezone.make_aware(datetime(jour.year, jour.month, jour.day, 12))
+
+    sejours = Sejour.objects.bulk_create([
+        Sejour(
+            reservation=reservation,
+            date_arrivee_effective=a_midi(reservation.date_debut_sejour),
+            date_depart_effective=a_midi(reservation.date_fin_sejour),
+            date_checkout=a_midi(reservation.date_fin_sejour),
+            nombre_personnes=1,
+        )
+        for reservation in passees
+    ], batch_size=1000)
+
+    # Le prix de chaque séjour est réglé en paiements_par_sejour versements validés
+    modes = [code for code, _ in Paiement.MODE_PAIEMENT_CHOICES]
+    paiements = []
+    for sejour in sejours:
+        versement = (sejour.reservation.prix_total / paiements_par_sejour).quantize(Decimal('1'))
+        for numero in range(paiements_par_sejour):
+            montant = versement
+            if numero == paiements_par_sejour - 1:
+                montant = sejour.reservation.prix_total - versement * (paiements_par_sejour - 1)
+            paiements.append(Paiement(
+                sejour=sejour, montant=montant, mode_paiement=alea.choice(modes),
+                reference_transaction=f'HIST-{len(paiements):09d}', statut='VALIDE',
+            ))
+    Paiement.objects.bulk_create(paiements, batch_size=1000)
+
+    # Colonnes dérivées : dates d'historique et soldes stockés, en requêtes ensemblistes
+    ids_sejours = [sejour.pk for sejour in sejours]
+    Sejour.objects.filter(pk__in=ids_sejours).update(
+        date_checkin=F('date_arrivee_effective'),
+        montant_du=Sejour.expression_montant_du(OuterRef('reservation_id')),
+        montant_paye=Sejour.expression_montant_paye(OuterRef('pk')),
+    )
+    Paiement.objects.filter(reference_transaction__startswith='HIST-').update(
+        date_paiement=Subquery(Sejour.objects.filter(pk=OuterRef('sejour_id')).values('date_checkout')[:1])
+    )
+
+    reservations = passees + futures
+    if reservations:
+        recalculer_periode(
+            min(r.date_debut_sejour for r in reservations) - timedelta(days=30),
+            max(r.date_fin_sejour for r in reservations),
+        )
+    invalider_statistiques()
+
+    return {
+        'chambres': len(liste_chambres),
+        'clients': len(liste_clients),
+        'reservations': len(reservations),
+        'sejours': len(sejours),
+        'paiements': len(paiements),
+    }
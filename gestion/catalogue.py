@@ -0,0 +1,101 @@
+"""
+Catalogue des chambres en mémoire, partagé par les requêtes d'un processus.
+
+Les chambres changent quelques fois par mois mais presque chaque page les
+relit (liste, réservation, check-in, compteurs du tableau de bord). Chaque
+processus garde une copie compacte (numéro, type, prix, lits, étage,
+statut) et ne la recharge que si le tampon de version global a changé.
+
+Le tampon (gestion.versions) change à chaque modification d'une chambre :
+signaux, et UPDATE directs des changements de statut. Tous les processus
+qui partagent la base le lisent, sans requête.
+
+Le catalogue sert à l'affichage et aux recherches. Le check-in et le
+check-out verrouillent toujours la ligne en base (select_for_update) et la
+contrainte unique de NuitReservee reste la garantie contre la double
+réservation. Dans une transaction les chambres sont relues en base : une
+écriture non validée ne doit pas entrer dans la copie partagée.
+"""
+
+import threading
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import versions
+from .models import Chambre
+
+CHAMPS = ('id', 'numero_chambre', 'type_chambre', 'prix_nuit', 'nombre_lits', 'etage', 'statut')
+
+_verrou = threading.Lock()
+# (tampon, catalogue) du dernier chargement
+_courant = (None, None)
+
+
+class Catalogue:
+    """Chambres du catalogue, indexées par identifiant"""
+
+    def __init__(self, lignes):
+        self._lignes = {ligne[0]: ligne for ligne in sorted(lignes, key=lambda ligne: ligne[1])}
+
+    def _instance(self, ligne):
+        # Nouvelle instance à chaque appel : la copie partagée n'est jamais modifiée
+        return Chambre.from_db(DEFAULT_DB_ALIAS, CHAMPS, ligne)
+
+    def _filtrer(self, criteres):
+        indices = [CHAMPS.index(champ) for champ in criteres]
+        valeurs = list(criteres.values())
+        return (
+            ligne for ligne in self._lignes.values()
+            if all(ligne[indice] == valeur for indice, valeur in zip(indices, valeurs))
+        )
+
+    def chambre(self, pk):
+        """Chambre d'identifiant pk ; lève Chambre.DoesNotExist comme get()"""
+        try:
+            return self._instance(self._lignes[int(pk)])
+        except KeyError:
+            raise Chambre.DoesNotExist(f"Aucune chambre d'identifiant {pk}.")
+
+    def chambres(self, **criteres):
+        """Chambres égales aux critères (statut='DISPONIBLE'...), par numéro"""
+        return [self._instance(ligne) for ligne in self._filtrer(criteres)]
+
+    def compter(self, **criteres):
+        return sum(1 for _ in self._filtrer(criteres))
+
+    def par_type(self):
+        """Nombre de chambres par type, au format de values().annotate(count=...)"""
+        nombres = Counter(ligne[CHAMPS.index('type_chambre')] for ligne in self._lignes.values())
+        return [{'type_chambre': type_chambre, 'count': nombre} for type_chambre, nombre in sorted(nombres.items())]
+
+
+def _charger():
+    # Toujours la base principale : un réplica en retard ne doit pas alimenter le catalogue
+    return Catalogue(Chambre.objects.using(DEFAULT_DB_ALIAS).values_list(*CHAMPS))
+
+
+def catalogue():
+    """Catalogue à jour, rechargé seulement si une chambre a changé depuis"""
+    global _courant
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return _charger()
+
+    # Le tampon est lu avant les chambres : une modification validée pendant
+    # le chargement change le tampon et provoquera un nouveau chargement
+    tampon = versions.lire('catalogue')
+    if tampon is None:
+        return _charger()
+    tampon_courant, courant = _courant
+    if tampon_courant == tampon:
+        return courant
+
+    with _verrou:
+        if _courant[0] != tampon:
+            _courant = (tampon, _charger())
+        return _courant[1]
+
+
+def invalider_catalogue():
+    """Rend le catalogue obsolète dans tous les processus"""
+    versions.changer('catalogue')
@@ -0,0 +1,341 @@
+"""
+Tests de charge des parcours de réception.
+
+Chaque utilisateur virtuel enchaîne le parcours réel d'un réceptionniste :
+connexion, tableau de bord, recherche du client, réservation via
+reservation_create, check-in, paiement, check-out puis rapports. Les
+utilisateurs tournent en parallèle (un thread chacun) soit sur le client de
+test Django (aucun serveur, requêtes SQL comptées directement), soit contre
+un serveur local en HTTP (requêtes SQL lues dans l'en-tête Server-Timing
+quand l'instrumentation est active).
+
+Le parcours lit quelques identifiants par l'ORM (réservation créée, solde
+du séjour) : en mode HTTP, le serveur doit utiliser la même base.
+
+Le rapport (débit, percentiles de latence et requêtes SQL par étape) est un
+dictionnaire sérialisable en JSON ; comparer() le confronte à une référence
+enregistrée pour détecter les régressions.
+"""
+
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test import Client as ClientTest
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import percentile
+from .models import Paiement, Reservation, Sejour
+
+Reponse = namedtuple('Reponse', 'statut emplacement contenu requetes')
+
+_SERVER_TIMING_SQL = re.compile(r'sql;[^,]*desc="(\d+) requetes"')
+
+
+class EchecEtape(Exception):
+    """Une étape du parcours n'a pas produit la réponse attendue"""
+
+
+# ---------------------------------------------------------------------------
+# Sessions : client de test Django ou HTTP
+# ---------------------------------------------------------------------------
+
+class SessionDjango:
+    """Navigateur simulé par le client de test Django, dans le processus courant"""
+
+    def __init__(self):
+        # HTTP_HOST accepté par ALLOWED_HOSTS en développement
+        self.client = ClientTest(HTTP_HOST='localhost')
+
+    def requete(self, methode, chemin, donnees=None):
+        with CaptureQueriesContext(connection) as requetes:
+            if methode == 'POST':
+                reponse = self.client.post(chemin, donnees or {})
+            else:
+                reponse = self.client.get(chemin, donnees or {})
+        return Reponse(reponse.status_code, reponse.get('Location', ''), reponse.content, len(requetes))
+
+
+class _SansRedirection(urllib.request.HTTPRedirectHandler):
+    """Les redirections sont vérifiées par le parcours, pas suivies"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class SessionHttp:
+    """Navigateur HTTP minimal (cookies, jeton CSRF) contre un serveur local"""
+
+    def __init__(self, url_base):
+        self.url_base = url_base.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.ouvreur = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SansRedirection
+        )
+
+    def _jeton_csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def requete(self, methode, chemin, donnees=None):
+        url = self.url_base + chemin
+        corps = None
+        if methode == 'POST':
+            corps = urlencode({**(donnees or {}), 'csrfmiddlewaretoken': self._jeton_csrf()}).encode()
+        elif donnees:
+            url += '?' + urlencode(donnees)
+
+        requete = urllib.request.Request(url, data=corps, method=methode,
+                                         headers={'Referer': self.url_base + '/'})
+        try:
+            with self.ouvreur.open(requete, timeout=60) as reponse:
+                return self._reponse(reponse.status, reponse.headers, reponse.read())
+        except urllib.error.HTTPError as erreur:
+            return self._reponse(erreur.code, erreur.headers, erreur.read())
+
+    @staticmethod
+    def _reponse(statut, entetes, contenu):
+        trouve = _SERVER_TIMING_SQL.search(entetes.get('Server-Timing', ''))
+        requetes = int(trouve.group(1)) if trouve else None
+        return Reponse(statut, entetes.get('Location', ''), contenu, requetes)
+
+
+# ---------------------------------------------------------------------------
+# Journal des mesures
+# ---------------------------------------------------------------------------
+
+class Journal:
+    """Mesures de toutes les étapes, partagées entre les threads"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.etapes = {}
+        self.parcours_reussis = 0
+        self.parcours_echoues = 0
+        self.erreurs = []
+
+    def ajouter(self, etape, duree, requetes, reussie):
+        with self._verrou:
+            mesures = self.etapes.setdefault(etape, {'durees': [], 'requetes': [], 'echecs': 0})
+            mesures['durees'].append(duree)
+            if requetes is not None:
+                mesures['requetes'].append(requetes)
+            if not reussie:
+                mesures['echecs'] += 1
+
+    def terminer_parcours(self, erreur=None):
+        with self._verrou:
+            if erreur is None:
+                self.parcours_reussis += 1
+            else:
+                self.parcours_echoues += 1
+                if len(self.erreurs) < 20:
+                    self.erreurs.append(erreur)
+
+    def rapport(self, duree, parametres):
+        etapes = {}
+        total_requetes_http = 0
+        for nom, mesures in self.etapes.items():
+            durees = sorted(mesures['durees'])
+            requetes = sorted(mesures['requetes'])
+            total_requetes_http += len(durees)
+            etapes[nom] = {
+                'nb': len(durees),
+                'echecs': mesures['echecs'],
+                'moyenne_ms': round(sum(durees) / len(durees) * 1000, 2),
+                'p50_ms': round(percentile(durees, 50) * 1000, 2),
+                'p95_ms': round(percentile(durees, 95) * 1000, 2),
+                'p99_ms': round(percentile(durees, 99) * 1000, 2),
+                'requetes_sql': percentile(requetes, 50) if requetes else None,
+            }
+        return {
+            'parametres': parametres,
+            'duree_s': round(duree, 3),
+            'parcours_reussis': self.parcours_reussis,
+            'parcours_echoues': self.parcours_echoues,
+            'debit_parcours_s': round(self.parcours_reussis / duree, 2) if duree else 0,
+            'debit_requetes_s': round(total_requetes_http / duree, 2) if duree else 0,
+            'etapes': etapes,
+            'erreurs': self.erreurs,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Parcours de réception
+# ---------------------------------------------------------------------------
+
+def _motif_url(nom):
+    """Motif des URL nom/<pk>/ (l'identifiant créé n'est pas connu à l'avance)"""
+    return re.compile(re.escape(reverse(nom, args=[987654321])).replace('987654321', r'\d+'))
+
+
+class ParcoursReception:
+    """Un client arrive, séjourne une à trois nuits, paie et repart"""
+
+    def __init__(self, session, journal, alea, identifiant, mot_de_passe):
+        self.session = session
+        self.journal = journal
+        self.alea = alea
+        self.identifiant = identifiant
+        self.mot_de_passe = mot_de_passe
+
+    def etape(self, nom, methode, chemin, donnees=None, redirection=None):
+        """Exécute une requête chronométrée ; redirection = URL (ou motif) attendue"""
+        debut = time.perf_counter()
+        reponse = self.session.requete(methode, chemin, donnees)
+        duree = time.perf_counter() - debut
+
+        if redirection is None:
+            reussie = reponse.statut == 200
+        else:
+            reussie = reponse.statut == 302 and (
+                redirection.fullmatch(reponse.emplacement) if isinstance(redirection, re.Pattern)
+                else reponse.emplacement == redirection
+            )
+        self.journal.ajouter(nom, duree, reponse.requetes, reussie)
+        if not reussie:
+            raise EchecEtape(f'{nom} : statut {reponse.statut} {reponse.emplacement}'.strip())
+        return reponse
+
+    def executer(self):
+        maintenant = timezone.localtime().strftime('%Y-%m-%dT%H:%M')
+        arrivee = date.today()
+        depart = arrivee + timedelta(days=self.alea.randint(1, 3))
+        periode = {'date_debut': arrivee.isoformat(), 'date_fin': depart.isoformat()}
+
+        self.etape('connexion', 'GET', reverse('login'))
+        self.etape('connexion_post', 'POST', reverse('login'),
+                   {'username': self.identifiant, 'password': self.mot_de_passe},
+                   redirection=reverse('dashboard'))
+        self.etape('dashboard', 'GET', reverse('dashboard'))
+
+        # Réservation : autocomplétion du client puis chambres libres
+        reponse = self.etape('recherche_client', 'GET', reverse('api_clients_recherche'),
+                             {'q': f'nom{self.alea.randrange(10)}'})
+        clients = json.loads(reponse.contenu)['clients']
+        if not clients:
+            raise EchecEtape('recherche_client : aucun client trouvé')
+        client_id = self.alea.choice(clients)['id']
+
+        reponse = self.etape('chambres_disponibles', 'GET', reverse('api_chambres_disponibles'), periode)
+        chambres = json.loads(reponse.contenu)['chambres']
+        if not chambres:
+            raise EchecEtape('chambres_disponibles : aucune chambre libre')
+        chambre_id = self.alea.choice(chambres)['id']
+
+        self.etape('reservation_formulaire', 'GET', reverse('reservation_create'),
+                   {**periode, 'client': client_id})
+        self.etape('reservation_create', 'POST', reverse('reservation_create'), {
+            'client': client_id,
+            'chambre': chambre_id,
+            'date_debut_sejour': periode['date_debut'],
+            'date_fin_sejour': periode['date_fin'],
+            'nombre_personnes': 1,
+            'statut': 'CONFIRMEE',
+        }, redirection=reverse('dashboard'))
+        reservation_id = Reservation.objects.filter(
+            client_id=client_id, chambre_id=chambre_id, date_debut_sejour=arrivee, statut='CONFIRMEE'
+        ).order_by('-pk').values_list('pk', flat=True).first()
+
+        # Arrivée
+        checkin = reverse('sejour_checkin', args=[reservation_id])
+        self.etape('sejour_checkin_formulaire', 'GET', checkin)
+        self.etape('sejour_checkin', 'POST', checkin,
+                   {'date_arrivee_effective': maintenant, 'nombre_personnes': 1},
+                   redirection=_motif_url('sejour_detail'))
+        sejour = Sejour.objects.filter(reservation_id=reservation_id).values('pk', 'montant_du').get()
+
+        # Règlement du séjour puis départ
+        self.etape('paiement_create', 'POST', reverse('paiement_create'), {
+            'sejour': sejour['pk'],
+            'montant': sejour['montant_du'],
+            'mode_paiement': self.alea.choice([code for code, _ in Paiement.MODE_PAIEMENT_CHOICES]),
+            'statut': 'VALIDE',
+        }, redirection=reverse('dashboard'))
+        checkout = reverse('sejour_checkout', args=[sejour['pk']])
+        self.etape('sejour_checkout_formulaire', 'GET', checkout)
+        self.etape('sejour_checkout', 'POST', checkout, {'date_depart_effective': maintenant},
+                   redirection=reverse('sejour_list'))
+
+        self.etape('rapports', 'GET', reverse('rapports'))
+
+
+# ---------------------------------------------------------------------------
+# Exécution et comparaison
+# ---------------------------------------------------------------------------
+
+def executer_charge(fabrique_session, identifiant, mot_de_passe, utilisateurs=4, iterations=5,
+                    graine=42, parametres=None):
+    """
+    Lance utilisateurs threads qui enchaînent chacun iterations parcours,
+    avec une nouvelle session (connexion comprise) par parcours.
+    """
+    journal = Journal()
+    depart = threading.Barrier(utilisateurs)
+
+    def utilisateur_virtuel(numero):
+        alea = random.Random(graine * 1000 + numero)
+        try:
+            depart.wait()
+            for _ in range(iterations):
+                parcours = ParcoursReception(fabrique_session(), journal, alea, identifiant, mot_de_passe)
+                try:
+                    parcours.executer()
+                except Exception as erreur:
+                    journal.terminer_parcours(f'{type(erreur).__name__} : {erreur}')
+                else:
+                    journal.terminer_parcours()
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=utilisateur_virtuel, args=(i,)) for i in range(utilisateurs)]
+    debut = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duree = time.perf_counter() - debut
+
+    return journal.rapport(duree, {
+        'utilisateurs': utilisateurs,
+        'iterations': iterations,
+        'graine': graine,
+        **(parametres or {}),
+    })
+
+
+def comparer(rapport, reference, tolerance=0.25, marge_ms=2.0):
+    """
+    Régressions du rapport par rapport à la référence : p95 au-delà de la
+    tolérance relative (et d'une marge absolue contre le bruit), ou davantage
+    de requêtes SQL pour une même étape.
+    """
+    regressions = []
+    for nom, base in reference.get('etapes', {}).items():
+        actuel = rapport['etapes'].get(nom)
+        if actuel is None:
+            continue
+        limite = base['p95_ms'] * (1 + tolerance)
+        if actuel['p95_ms'] > limite and actuel['p95_ms'] - base['p95_ms'] > marge_ms:
+            regressions.append(
+                f"{nom} : p95 {actuel['p95_ms']} ms (référence {base['p95_ms']} ms)"
+            )
+        if (base['requetes_sql'] is not None and actuel['requetes_sql'] is not None
+                and actuel['requetes_sql'] > base['requetes_sql']):
+            regressions.append(
+                f"{nom} : {actuel['requetes_sql']} requêtes SQL (référence {base['requetes_sql']})"
+            )
+    return regressions
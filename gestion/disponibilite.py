@@ -0,0 +1,96 @@
+"""
+Service de disponibilité des chambres.
+
+Toutes les recherches de disponibilité passent par ce module : une seule
+requête ensembliste (NOT EXISTS) répond à « quelles chambres sont libres
+entre D1 et D2 », au lieu d'une requête par chambre.
+
+La garantie contre la double réservation est portée par la base : chaque
+réservation active occupe une ligne NuitReservee par nuit, sous contrainte
+unique (chambre, nuit). Deux réservations concurrentes de la même chambre
+ne peuvent pas être validées toutes les deux.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Chambre, NuitReservee, Reservation
+
+# Statuts de réservation qui bloquent une chambre
+STATUTS_BLOQUANTS = ['EN_ATTENTE', 'CONFIRMEE']
+
+
+class ChambreIndisponible(Exception):
+    """La chambre est déjà réservée sur au moins une nuit de la période"""
+
+
+def synchroniser_nuits(reservation):
+    """Réserve les nuits d'une réservation active, ou les libère sinon"""
+    NuitReservee.objects.filter(reservation_id=reservation.pk).delete()
+    if reservation.statut not in STATUTS_BLOQUANTS:
+        return
+
+    nuits = [
+        NuitReservee(
+            chambre_id=reservation.chambre_id,
+            reservation_id=reservation.pk,
+            nuit=reservation.date_debut_sejour + timedelta(days=decalage),
+        )
+        for decalage in range((reservation.date_fin_sejour - reservation.date_debut_sejour).days)
+    ]
+    try:
+        with transaction.atomic():
+            NuitReservee.objects.bulk_create(nuits)
+    except IntegrityError:
+        raise ChambreIndisponible("La chambre est déjà réservée sur cette période.")
+
+
+def liberer_nuits(reservation_id):
+    """Libère toutes les nuits d'une réservation (annulation, départ)"""
+    NuitReservee.objects.filter(reservation_id=reservation_id).delete()
+
+
+def reservations_conflictuelles(date_debut, date_fin, exclure_reservation=None):
+    """Réservations actives qui chevauchent la période [date_debut, date_fin["""
+    reservations = Reservation.objects.filter(
+        statut__in=STATUTS_BLOQUANTS,
+        date_debut_sejour__lt=date_fin,
+        date_fin_sejour__gt=date_debut
+    )
+    if exclure_reservation is not None:
+        reservations = reservations.exclude(pk=exclure_reservation)
+    return reservations
+
+
+def chambres_disponibles(date_debut, date_fin, type_chambre=None, nombre_lits=None,
+                         etage=None, exclure_reservation=None):
+    """Chambres libres sur la période, filtrées optionnellement (une seule requête)"""
+    conflits = reservations_conflictuelles(
+        date_debut, date_fin, exclure_reservation
+    ).filter(chambre=OuterRef('pk'))
+
+    chambres = Chambre.objects.filter(statut='DISPONIBLE').exclude(Exists(conflits))
+
+    if type_chambre:
+        chambres = chambres.filter(type_chambre=type_chambre)
+
+    # Au moins le nombre de lits demandé
+    if nombre_lits:
+        chambres = chambres.filter(nombre_lits__gte=nombre_lits)
+
+    if etage is not None and etage != '':
+        chambres = chambres.filter(etage=etage)
+
+    return chambres.order_by('numero_chambre')
+
+
+def est_disponible(chambre, date_debut, date_fin, exclure_reservation=None):
+    """Vérifie si une chambre donnée est libre sur la période"""
+    if chambre.statut != 'DISPONIBLE':
+        return False
+    return not reservations_conflictuelles(
+        date_debut, date_fin, exclure_reservation
+    ).filter(chambre=chambre).exists()
+
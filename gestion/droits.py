@@ -0,0 +1,82 @@
+"""
+Rôle et permissions des utilisateurs, résolus une fois puis mis en cache.
+
+Sans cache, chaque page relit les permissions de l'utilisateur et de ses
+groupes (deux requêtes) et son profil Utilisateur pour connaître son rôle.
+Ici le rôle et l'ensemble des permissions sont mis en cache par
+utilisateur et par version des droits : toute modification d'un profil,
+d'un groupe ou d'une permission change la version (gestion.versions) et
+rend obsolètes les entrées de tous les processus.
+
+DroitsBackend remplace ModelBackend : has_perm() et la variable perms des
+gabarits lisent les permissions en cache, sans requête.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from . import versions
+from .models import Utilisateur
+
+# Durée de vie d'une entrée (secondes) ; une nouvelle version la rend obsolète avant
+DUREE_CACHE = 3600
+
+
+class Droits:
+    """Rôle et permissions d'un utilisateur"""
+
+    def __init__(self, role, superuser, permissions):
+        self.role = role
+        self.superuser = superuser
+        self.permissions = permissions
+
+    @property
+    def est_admin(self):
+        """Administrateur : accès aux revenus et données sensibles"""
+        return self.superuser or self.role == 'ADMIN'
+
+    def a_permission(self, permission):
+        return self.superuser or permission in self.permissions
+
+
+def _resoudre(user):
+    role = Utilisateur.objects.filter(user=user).values_list('role', flat=True).first()
+    return Droits(role, user.is_superuser, frozenset(ModelBackend().get_all_permissions(user)))
+
+
+def droits(user):
+    """Droits de l'utilisateur, lus dans le cache s'ils sont à jour"""
+    version = versions.lire('droits')
+    if version is None:
+        return _resoudre(user)
+    cle = f'gestion:droits:{user.pk}:{version}'
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = _resoudre(user)
+        cache.set(cle, resultat, DUREE_CACHE)
+    return resultat
+
+
+def est_admin(user):
+    """Vrai pour un superutilisateur ou un profil administrateur"""
+    return user.is_superuser or droits(user).est_admin
+
+
+def invalider_droits():
+    """Rend obsolètes les droits en cache de tous les utilisateurs"""
+    versions.changer('droits')
+
+
+class DroitsBackend(ModelBackend):
+    """ModelBackend dont les permissions viennent du cache des droits"""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            user_obj._perm_cache = set(droits(user_obj).permissions)
+        return user_obj._perm_cache
+
+    async def aget_all_permissions(self, user_obj, obj=None):
+        return await sync_to_async(self.get_all_permissions)(user_obj, obj)
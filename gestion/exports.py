@@ -0,0 +1,263 @@
+"""
+Exports comptables en flux (CSV et XLSX).
+
+Les lignes sont lues par paquets avec .iterator(chunk_size=...) et écrites
+au fur et à mesure dans la réponse : la mémoire consommée ne dépend pas du
+nombre de lignes exportées. Les colonnes du client et de la chambre sont
+lues par jointure dans la même requête (values_list sur les relations) :
+aucune requête par ligne et aucune instance de modèle à construire.
+
+Le XLSX est produit directement (archive zip en flux + XML SpreadsheetML
+minimal) pour ne pas dépendre d'une bibliothèque tierce.
+"""
+
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .filtres import filtrer_clients, filtrer_paiements, filtrer_reservations
+from .models import Chambre, Client, Paiement, Reservation
+
+TAILLE_PAQUET = 2000
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+# ---------------------------------------------------------------------------
+# Définition des exports
+# ---------------------------------------------------------------------------
+
+def _libelles(choix):
+    """Libellés des choix : évite get_FOO_display() sur chaque ligne"""
+    return dict(choix)
+
+
+def _lignes_reservations(params, base=None):
+    types = _libelles(Chambre.TYPE_CHAMBRE_CHOICES)
+    statuts = _libelles(Reservation.STATUT_CHOICES)
+    reservations = filtrer_reservations(Reservation.objects.using(base), params).order_by(
+        '-date_reservation', '-id'
+    ).values_list(
+        'id', 'date_reservation', 'client__nom', 'client__prenom',
+        'chambre__numero_chambre', 'chambre__type_chambre', 'date_debut_sejour',
+        'date_fin_sejour', 'nombre_nuits', 'nombre_adultes', 'nombre_enfants',
+        'prix_total', 'statut',
+    )
+    for ligne in reservations.iterator(chunk_size=TAILLE_PAQUET):
+        ligne = list(ligne)
+        ligne[5] = types.get(ligne[5], ligne[5])
+        ligne[12] = statuts.get(ligne[12], ligne[12])
+        yield ligne
+
+
+def _lignes_paiements(params, base=None):
+    modes = _libelles(Paiement.MODE_PAIEMENT_CHOICES)
+    statuts = _libelles(Paiement.STATUT_CHOICES)
+    paiements = filtrer_paiements(Paiement.objects.using(base), params).order_by(
+        '-date_paiement', '-id'
+    ).values_list(
+        'reference_transaction', 'date_paiement', 'sejour__reservation__client__nom',
+        'sejour__reservation__client__prenom', 'sejour__reservation__chambre__numero_chambre',
+        'sejour__reservation_id', 'montant', 'mode_paiement', 'statut',
+    )
+    for ligne in paiements.iterator(chunk_size=TAILLE_PAQUET):
+        ligne = list(ligne)
+        ligne[7] = modes.get(ligne[7], ligne[7])
+        ligne[8] = statuts.get(ligne[8], ligne[8])
+        yield ligne
+
+
+def _lignes_clients(params, base=None):
+    pieces = _libelles(Client.PIECE_IDENTITE_CHOICES)
+    clients = filtrer_clients(Client.objects.using(base), params).order_by(
+        '-date_inscription', '-id'
+    ).values_list(
+        'id', 'nom', 'prenom', 'email', 'telephone', 'ville', 'pays',
+        'piece_identite', 'numero_piece', 'date_naissance', 'date_inscription',
+    )
+    for ligne in clients.iterator(chunk_size=TAILLE_PAQUET):
+        ligne = list(ligne)
+        ligne[7] = pieces.get(ligne[7], ligne[7])
+        yield ligne
+
+
+EXPORTS = {
+    'reservations': (
+        ['ID', 'Date réservation', 'Nom', 'Prénom', 'Chambre', 'Type', 'Arrivée',
+         'Départ', 'Nuits', 'Adultes', 'Enfants', 'Prix total', 'Statut'],
+        _lignes_reservations,
+    ),
+    'paiements': (
+        ['Référence', 'Date', 'Nom', 'Prénom', 'Chambre', 'Réservation', 'Montant',
+         'Mode', 'Statut'],
+        _lignes_paiements,
+    ),
+    'clients': (
+        ['ID', 'Nom', 'Prénom', 'Email', 'Téléphone', 'Ville', 'Pays', 'Pièce',
+         'Numéro pièce', 'Date naissance', 'Date inscription'],
+        _lignes_clients,
+    ),
+}
+
+
+def _texte(valeur):
+    """Représentation texte d'une cellule (dates en heure locale)"""
+    if valeur is None:
+        return ''
+    if isinstance(valeur, datetime):
+        return timezone.localtime(valeur).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    return str(valeur)
+
+
+# ---------------------------------------------------------------------------
+# CSV
+# ---------------------------------------------------------------------------
+
+class _Tampon:
+    """Pseudo-fichier : csv.writer renvoie directement la ligne écrite"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def flux_csv(entetes, lignes):
+    writer = csv.writer(_Tampon(), delimiter=';')
+    # BOM pour qu'Excel détecte l'UTF-8
+    yield '\ufeff' + writer.writerow(entetes)
+    for ligne in lignes:
+        yield writer.writerow([_texte(valeur) for valeur in ligne])
+
+
+# ---------------------------------------------------------------------------
+# XLSX
+# ---------------------------------------------------------------------------
+
+_CARACTERES_INTERDITS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+class _TamponZip:
+    """Flux non positionnable : zipfile y écrit, on récupère les octets au fil de l'eau"""
+
+    def __init__(self):
+        self._morceaux = []
+
+    def write(self, donnees):
+        self._morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        donnees = b''.join(self._morceaux)
+        self._morceaux = []
+        return donnees
+
+
+def _cellule(valeur):
+    if isinstance(valeur, (int, float, Decimal)) and not isinstance(valeur, bool):
+        return f'<c><v>{valeur}</v></c>'
+    texte = escape(_CARACTERES_INTERDITS.sub('', _texte(valeur)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texte}</t></is></c>'
+
+
+def _ligne_xml(ligne):
+    return '<row>' + ''.join(_cellule(valeur) for valeur in ligne) + '</row>'
+
+
+def flux_xlsx(entetes, lignes, taille_paquet=TAILLE_PAQUET):
+    tampon = _TamponZip()
+    with zipfile.ZipFile(tampon, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as feuille:
+            feuille.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            feuille.write(_ligne_xml(entetes).encode())
+            for numero, ligne in enumerate(lignes, start=1):
+                feuille.write(_ligne_xml(ligne).encode())
+                if numero % taille_paquet == 0:
+                    yield tampon.vider()
+            feuille.write(b'</sheetData></worksheet>')
+        yield tampon.vider()
+    yield tampon.vider()
+
+
+# ---------------------------------------------------------------------------
+# Réponse HTTP
+# ---------------------------------------------------------------------------
+
+def reponse_export(nom, format_export, params, base=None):
+    """
+    StreamingHttpResponse de l'export demandé, filtré par les paramètres GET.
+
+    Les lignes sont lues après le retour de la vue : base fixe l'alias de
+    lecture (gestion.routage) que le routeur ne connaît plus à ce moment.
+    """
+    entetes, generateur = EXPORTS[nom]
+    lignes = generateur(params, base)
+    if format_export == 'xlsx':
+        contenu = flux_xlsx(entetes, lignes)
+    else:
+        format_export = 'csv'
+        contenu = flux_csv(entetes, lignes)
+
+    reponse = StreamingHttpResponse(contenu, content_type=FORMATS[format_export])
+    horodatage = timezone.localtime().strftime('%Y%m%d-%H%M')
+    reponse['Content-Disposition'] = f'attachment; filename="{nom}-{horodatage}.{format_export}"'
+    return reponse
@@ -0,0 +1,82 @@
+"""
+Filtres des listes (clients, réservations, paiements).
+
+Partagés entre les pages HTML et les exports : un export renvoie
+exactement les lignes affichées par la liste avec les mêmes paramètres.
+"""
+
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .recherche import condition_recherche
+
+
+def _debut_jour(valeur):
+    """Minuit (heure locale) du jour donné en AAAA-MM-JJ, None si invalide"""
+    try:
+        jour = parse_date(valeur)
+    except ValueError:
+        return None
+    if jour is None:
+        return None
+    return timezone.make_aware(datetime(jour.year, jour.month, jour.day))
+
+
+def filtrer_clients(clients, params):
+    """Recherche sans accents sur nom, prénom, email et téléphone (index MotCleClient)"""
+    condition = condition_recherche(params.get('search', ''))
+    if condition is not None:
+        clients = clients.filter(condition)
+    return clients
+
+
+def filtrer_reservations(reservations, params):
+    """Recherche client/chambre, statut et période de séjour"""
+    search = params.get('search', '')
+    statut = params.get('statut', '')
+    date_debut = params.get('date_debut', '')
+    date_fin = params.get('date_fin', '')
+
+    if search:
+        reservations = reservations.filter(
+            condition_recherche(search, 'client_id') |
+            Q(chambre__numero_chambre__icontains=search)
+        )
+    if statut:
+        reservations = reservations.filter(statut=statut)
+    if date_debut:
+        reservations = reservations.filter(date_debut_sejour__gte=date_debut)
+    if date_fin:
+        reservations = reservations.filter(date_fin_sejour__lte=date_fin)
+    return reservations
+
+
+def filtrer_paiements(paiements, params):
+    """Mode, statut, période d'encaissement et recherche client/référence"""
+    search = params.get('search', '')
+    mode = params.get('mode', '')
+    statut = params.get('statut', '')
+    date_debut = params.get('date_debut', '')
+    date_fin = params.get('date_fin', '')
+
+    if search:
+        paiements = paiements.filter(
+            condition_recherche(search, 'sejour__reservation__client_id') |
+            Q(reference_transaction__icontains=search)
+        )
+    if mode:
+        paiements = paiements.filter(mode_paiement=mode)
+    if statut:
+        paiements = paiements.filter(statut=statut)
+
+    # Bornes en datetime pour rester sur l'index (statut, date_paiement)
+    debut = _debut_jour(date_debut) if date_debut else None
+    if debut:
+        paiements = paiements.filter(date_paiement__gte=debut)
+    fin = _debut_jour(date_fin) if date_fin else None
+    if fin:
+        paiements = paiements.filter(date_paiement__lt=fin + timedelta(days=1))
+    return paiements
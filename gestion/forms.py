@@ -1,7 +1,26 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.db.models import Q
+from django.forms.models import ModelChoiceIterator
+from datetime import date
 from .models import Client, Chambre, Reservation, Sejour, Paiement, ServiceSupplementaire
+from .catalogue import catalogue
+from .disponibilite import chambres_disponibles
+from .planning import NUITS_DEFAUT, NUITS_MAX, Planning
+
+class ChoixChambresCatalogue(ModelChoiceIterator):
+    """Chambres disponibles lues dans le catalogue en mémoire plutôt qu'en base"""
+    
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for chambre in catalogue().chambres(statut='DISPONIBLE'):
+            yield self.choice(chambre)
+    
+    def __len__(self):
+        return catalogue().compter(statut='DISPONIBLE') + (self.field.empty_label is not None)
+
 
 # Formulaire de création de client
 class ClientForm(forms.ModelForm):
@@ -61,6 +80,17 @@ class DisponibiliteChambreForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
+    nombre_lits = forms.IntegerField(
+        label='Nombre de lits minimum',
+        min_value=1,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    etage = forms.IntegerField(
+        label='Étage',
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
     
     def clean(self):
         cleaned_data = super().clean()
@@ -72,6 +102,55 @@ class DisponibiliteChambreForm(forms.Form):
                 raise forms.ValidationError("La date de départ doit être postérieure à la date d'arrivée.")
         
         return cleaned_data
+    
+    def chambres_disponibles(self):
+        """Chambres libres correspondant aux critères (formulaire validé)"""
+        data = self.cleaned_data
+        return chambres_disponibles(
+            data['date_debut'],
+            data['date_fin'],
+            type_chambre=data.get('type_chambre'),
+            nombre_lits=data.get('nombre_lits'),
+            etage=data.get('etage'),
+        )
+
+
+class PlanningForm(forms.Form):
+    debut = forms.DateField(
+        label='À partir du',
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    nuits = forms.IntegerField(
+        label='Nombre de nuits',
+        min_value=1,
+        max_value=NUITS_MAX,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    type_chambre = forms.ChoiceField(
+        label='Type de chambre',
+        choices=[('', 'Tous les types')] + list(Chambre.TYPE_CHAMBRE_CHOICES),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    etage = forms.IntegerField(
+        label='Étage',
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    
+    def planning(self):
+        """Grille d'occupation correspondant aux critères (formulaire validé)"""
+        data = self.cleaned_data
+        chambres = None
+        if data.get('type_chambre') or data.get('etage') is not None:
+            chambres = Chambre.objects.all()
+            if data.get('type_chambre'):
+                chambres = chambres.filter(type_chambre=data['type_chambre'])
+            if data.get('etage') is not None:
+                chambres = chambres.filter(etage=data['etage'])
+        return Planning(data.get('debut') or date.today(), data.get('nuits') or NUITS_DEFAUT, chambres)
 
 
 # Formulaire de création de réservation
@@ -83,7 +162,8 @@ class ReservationForm(forms.ModelForm):
             'nombre_adultes', 'nombre_enfants', 'commentaire'
         ]
         widgets = {
-            'client': forms.Select(attrs={'class': 'form-control'}),
+            # Client choisi par autocomplétion (api_clients_recherche) : aucune liste à charger
+            'client': forms.HiddenInput(),
             'chambre': forms.Select(attrs={'class': 'form-control'}),
             'date_debut_sejour': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'date_fin_sejour': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
@@ -95,7 +175,43 @@ class ReservationForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Filtrer uniquement les chambres disponibles
-        self.fields['chambre'].queryset = Chambre.objects.filter(statut='DISPONIBLE')
+        chambres = Chambre.objects.filter(statut='DISPONIBLE')
+        
+        # Si les dates sont connues, ne proposer que les chambres libres sur la période
+        date_debut, date_fin = self._periode_demandee()
+        if date_debut and date_fin and date_fin > date_debut:
+            chambres = chambres_disponibles(
+                date_debut, date_fin, exclure_reservation=self.instance.pk
+            )
+        elif not self.instance.pk:
+            # Liste affichée depuis le catalogue ; la validation relit la base
+            self.fields['chambre'].iterator = ChoixChambresCatalogue
+        
+        # Conserver la chambre actuelle lors d'une modification
+        if self.instance.pk and self.instance.chambre_id:
+            chambres = Chambre.objects.filter(
+                Q(pk__in=chambres.values('pk')) | Q(pk=self.instance.chambre_id)
+            ).order_by('numero_chambre')
+        
+        self.fields['chambre'].queryset = chambres
+    
+    def _periode_demandee(self):
+        """Dates de séjour issues des données soumises, des valeurs initiales ou de l'instance"""
+        if self.is_bound:
+            champ_debut = self.fields['date_debut_sejour']
+            champ_fin = self.fields['date_fin_sejour']
+            try:
+                return (
+                    champ_debut.clean(self.data.get(self.add_prefix('date_debut_sejour'))),
+                    champ_fin.clean(self.data.get(self.add_prefix('date_fin_sejour'))),
+                )
+            except forms.ValidationError:
+                return None, None
+        
+        return (
+            self.initial.get('date_debut_sejour') or self.instance.date_debut_sejour,
+            self.initial.get('date_fin_sejour') or self.instance.date_fin_sejour,
+        )
 
 
 # Formulaire de création de séjour (Check-in)
@@ -116,9 +232,10 @@ class SejourForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Afficher uniquement les réservations confirmées sans séjour
+        # (client et chambre joints : le libellé de chaque option les affiche)
         self.fields['reservation'].queryset = Reservation.objects.filter(
             statut='CONFIRMEE'
-        ).exclude(sejour__isnull=False)
+        ).exclude(sejour__isnull=False).select_related('client', 'chambre')
 
 
 # Formulaire de check-out
@@ -150,8 +267,10 @@ class PaiementForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Afficher uniquement les séjours non terminés
-        self.fields['sejour'].queryset = Sejour.objects.filter(date_checkout__isnull=True)
+        # Afficher uniquement les séjours non terminés (client joint pour les libellés)
+        self.fields['sejour'].queryset = Sejour.objects.filter(
+            date_checkout__isnull=True
+        ).select_related('reservation__client')
 
 
 # Formulaire de connexion personnalisé
@@ -215,4 +334,20 @@ class ReservationSearchForm(forms.Form):
     date_fin = forms.DateField(
         label='Date de fin',
         required=False,
-        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}) )
\ No newline at end of file
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}) )
+
+# Formulaire d'import en masse (administration)
+class ImportForm(forms.Form):
+    fichier = forms.FileField(label='Fichier CSV ou JSON')
+    format_fichier = forms.ChoiceField(
+        label='Format',
+        choices=[('csv', 'CSV'), ('json', 'JSON')],
+        initial='csv'
+    )
+    depuis = forms.IntegerField(
+        label='Reprendre après la ligne',
+        min_value=0,
+        initial=0,
+        required=False,
+        help_text="Dernière ligne validée d'un import interrompu"
+    )
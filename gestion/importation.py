@@ -0,0 +1,480 @@
+"""
+Import en masse de clients, chambres et réservations historiques.
+
+Les lignes (CSV ou JSON) sont traitées par lots : validation des champs en
+mémoire, contrôle d'unicité groupé (une requête par champ unique et par
+lot), résolution groupée des clés étrangères puis insertion par
+bulk_create. Chaque lot est validé dans sa propre transaction ; une
+ligne invalide est rapportée sans bloquer le reste du lot.
+
+Un import interrompu se reprend avec depuis=<dernière ligne validée>. Un
+lot rejeté en bloc (conflit d'unicité apparu pendant l'import) arrête
+l'import : la dernière ligne validée reste celle du lot précédent.
+Pour les clients et les chambres, une ligne dont toutes les valeurs
+uniques existent déjà est ignorée : relancer le même fichier est sans
+risque. Les réservations n'ont pas de clé naturelle et doivent être
+reprises avec depuis.
+"""
+
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .catalogue import invalider_catalogue
+from .disponibilite import STATUTS_BLOQUANTS
+from .models import Chambre, Client, NuitReservee, Reservation
+from .recherche import indexer_clients
+from .statistiques import invalider_statistiques
+
+TAILLE_LOT = 1000
+
+
+class ErreurLigne(Exception):
+    """Ligne rejetée, avec le motif rapporté à l'utilisateur"""
+
+
+class RapportImport:
+    """Bilan d'un import : lignes insérées, ignorées et erreurs par ligne"""
+
+    def __init__(self):
+        self.inserees = 0
+        self.ignorees = 0
+        self.erreurs = []
+        self.derniere_ligne = 0
+        self.interrompu = False
+
+    def erreur(self, numero, message):
+        self.erreurs.append((numero, message))
+
+    @property
+    def lignes_traitees(self):
+        return self.inserees + self.ignorees + len(self.erreurs)
+
+
+# ---------------------------------------------------------------------------
+# Lecture des fichiers
+# ---------------------------------------------------------------------------
+
+def lire_lignes(fichier, format_fichier='csv'):
+    """Itère sur (numéro de ligne, dictionnaire) pour un fichier texte CSV ou JSON"""
+    if format_fichier == 'json':
+        donnees = json.load(fichier)
+        if isinstance(donnees, dict):
+            donnees = [donnees]
+        for numero, ligne in enumerate(donnees, start=1):
+            yield numero, ligne
+        return
+
+    debut = fichier.read(4096)
+    fichier.seek(0)
+    try:
+        dialecte = csv.Sniffer().sniff(debut, delimiters=';,\t')
+    except csv.Error:
+        dialecte = csv.excel
+    lecteur = csv.DictReader(fichier, dialect=dialecte)
+    # Numéro 1 = première ligne de données (l'en-tête n'est pas comptée)
+    for numero, ligne in enumerate(lecteur, start=1):
+        yield numero, {cle.strip(): valeur for cle, valeur in ligne.items() if cle}
+
+
+def ouvrir_fichier_televerse(fichier):
+    """Adapte un UploadedFile (binaire) en flux texte UTF-8"""
+    return io.TextIOWrapper(fichier.file, encoding='utf-8-sig', newline='')
+
+
+def _par_lots(lignes, taille):
+    lot = []
+    for ligne in lignes:
+        lot.append(ligne)
+        if len(lot) >= taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+# ---------------------------------------------------------------------------
+# Conversion des valeurs
+# ---------------------------------------------------------------------------
+
+def _texte(ligne, champ, obligatoire=True, defaut=''):
+    valeur = ligne.get(champ)
+    valeur = '' if valeur is None else str(valeur).strip()
+    if not valeur:
+        if obligatoire:
+            raise ErreurLigne(f"{champ} : valeur obligatoire")
+        return defaut
+    return valeur
+
+
+def _entier(ligne, champ, obligatoire=True, defaut=0):
+    valeur = _texte(ligne, champ, obligatoire, None)
+    if valeur is None:
+        return defaut
+    try:
+        return int(valeur)
+    except ValueError:
+        raise ErreurLigne(f"{champ} : entier attendu ({valeur})")
+
+
+def _decimal(ligne, champ, obligatoire=True):
+    valeur = _texte(ligne, champ, obligatoire, None)
+    if valeur is None:
+        return None
+    try:
+        return Decimal(valeur.replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        raise ErreurLigne(f"{champ} : montant invalide ({valeur})")
+
+
+def _date(ligne, champ, obligatoire=True):
+    valeur = _texte(ligne, champ, obligatoire, None)
+    if valeur is None:
+        return None
+    try:
+        resultat = parse_date(valeur)
+    except ValueError:
+        resultat = None
+    if resultat is None:
+        raise ErreurLigne(f"{champ} : date AAAA-MM-JJ attendue ({valeur})")
+    return resultat
+
+
+def _horodatage(ligne, champ):
+    valeur = _texte(ligne, champ, obligatoire=False, defaut=None)
+    if valeur is None:
+        return None
+    try:
+        resultat = parse_datetime(valeur)
+    except ValueError:
+        resultat = None
+    if resultat is None:
+        jour = _date(ligne, champ)
+        resultat = datetime(jour.year, jour.month, jour.day)
+    if timezone.is_naive(resultat):
+        resultat = timezone.make_aware(resultat)
+    return resultat
+
+
+def _valider(instance, exclure=()):
+    """
+    Validation des champs seule : ni clean() ni unicité, qui coûteraient des
+    requêtes par ligne (l'unicité et les disponibilités sont contrôlées par lot)
+    """
+    try:
+        instance.clean_fields(exclude=list(exclure))
+    except ValidationError as e:
+        raise ErreurLigne(' ; '.join(
+            f"{champ} : {' '.join(messages)}" for champ, messages in e.message_dict.items()
+        ))
+
+
+# ---------------------------------------------------------------------------
+# Importateurs
+# ---------------------------------------------------------------------------
+
+class Importateur(ABC):
+    """
+    Squelette commun : construire() transforme une ligne en instance, les
+    champs_uniques sont contrôlés en bloc avant l'insertion du lot.
+    """
+
+    modele = None
+    champs_uniques = ()
+
+    def __init__(self, taille_lot=TAILLE_LOT):
+        self.taille_lot = taille_lot
+
+    @abstractmethod
+    def construire(self, ligne):
+        """Instance non enregistrée construite depuis la ligne ; ErreurLigne si elle est invalide"""
+
+    def preparer_lot(self, lot, rapport):
+        """Hook pour les résolutions groupées (clés étrangères) avant construire()"""
+
+    def inserer(self, instances):
+        self.modele.objects.bulk_create(instances, batch_size=self.taille_lot)
+
+    def apres_import(self, rapport):
+        """Hook appelé une fois tous les lots validés"""
+        # bulk_create ne déclenche pas les signaux : compteurs des statistiques à recalculer
+        invalider_statistiques()
+
+    def importer(self, lignes, depuis=0, progression=None):
+        """Importe les lignes (numéro, dict) ; depuis = dernière ligne déjà validée"""
+        rapport = RapportImport()
+        lignes = ((numero, ligne) for numero, ligne in lignes if numero > depuis)
+
+        for lot in _par_lots(lignes, self.taille_lot):
+            self.preparer_lot(lot, rapport)
+            instances = []
+            for numero, ligne in lot:
+                try:
+                    instances.append((numero, self.construire(ligne)))
+                except ErreurLigne as e:
+                    rapport.erreur(numero, str(e))
+
+            instances = self._filtrer_doublons(instances, rapport)
+            try:
+                with transaction.atomic():
+                    self.inserer([instance for _, instance in instances])
+            except IntegrityError as e:
+                # Conflit apparu entre le contrôle et l'insertion : le lot entier est rejeté et
+                # l'import s'arrête, pour qu'une reprise depuis derniere_ligne le retraite
+                for numero, _ in instances:
+                    rapport.erreur(numero, f"lot rejeté : {e}")
+                rapport.interrompu = True
+                break
+
+            rapport.inserees += len(instances)
+            rapport.derniere_ligne = lot[-1][0]
+            if progression:
+                progression(rapport)
+
+        rapport.erreurs.sort(key=lambda erreur: erreur[0])
+        self.apres_import(rapport)
+        return rapport
+
+    def _filtrer_doublons(self, instances, rapport):
+        """Écarte les lignes déjà présentes en base ou en double dans le lot"""
+        existants = {}
+        for champ in self.champs_uniques:
+            valeurs = {getattr(instance, champ) for _, instance in instances}
+            existants[champ] = set(
+                self.modele.objects.filter(**{f'{champ}__in': valeurs}).values_list(champ, flat=True)
+            )
+
+        retenues = []
+        vus = {champ: set() for champ in self.champs_uniques}
+        for numero, instance in instances:
+            valeurs = {champ: getattr(instance, champ) for champ in self.champs_uniques}
+
+            # Ligne déjà importée lors d'une exécution précédente : ignorée, pas en erreur
+            if self.champs_uniques and all(
+                valeur in existants[champ] for champ, valeur in valeurs.items()
+            ):
+                rapport.ignorees += 1
+                continue
+
+            erreur = next((
+                f"{champ} {valeur} déjà présent en base" if valeur in existants[champ]
+                else f"{champ} {valeur} en double dans le fichier"
+                for champ, valeur in valeurs.items()
+                if valeur in existants[champ] or valeur in vus[champ]
+            ), None)
+            if erreur:
+                rapport.erreur(numero, erreur)
+                continue
+
+            for champ, valeur in valeurs.items():
+                vus[champ].add(valeur)
+            retenues.append((numero, instance))
+        return retenues
+
+
+class ImportateurClients(Importateur):
+    modele = Client
+    champs_uniques = ('email', 'telephone', 'numero_piece')
+
+    def inserer(self, clients):
+        super().inserer(clients)
+        # bulk_create contourne Client.save() : index de recherche à alimenter ici
+        indexer_clients(clients)
+
+    def construire(self, ligne):
+        client = Client(
+            nom=_texte(ligne, 'nom'),
+            prenom=_texte(ligne, 'prenom'),
+            email=_texte(ligne, 'email').lower(),
+            telephone=_texte(ligne, 'telephone'),
+            adresse=_texte(ligne, 'adresse', obligatoire=False, defaut='-'),
+            ville=_texte(ligne, 'ville'),
+            pays=_texte(ligne, 'pays', obligatoire=False, defaut='Guinée'),
+            piece_identite=_texte(ligne, 'piece_identite').upper(),
+            numero_piece=_texte(ligne, 'numero_piece'),
+            date_naissance=_date(ligne, 'date_naissance'),
+        )
+        _valider(client, exclure=['date_inscription'])
+        return client
+
+
+class ImportateurChambres(Importateur):
+    modele = Chambre
+    champs_uniques = ('numero_chambre',)
+
+    def construire(self, ligne):
+        chambre = Chambre(
+            numero_chambre=_texte(ligne, 'numero_chambre'),
+            type_chambre=_texte(ligne, 'type_chambre').upper(),
+            prix_nuit=_decimal(ligne, 'prix_nuit'),
+            nombre_lits=_entier(ligne, 'nombre_lits'),
+            superficie=_decimal(ligne, 'superficie'),
+            etage=_entier(ligne, 'etage'),
+            description=_texte(ligne, 'description', obligatoire=False, defaut=None),
+            statut=_texte(ligne, 'statut', obligatoire=False, defaut='DISPONIBLE').upper(),
+        )
+        _valider(chambre)
+        return chambre
+
+    def apres_import(self, rapport):
+        super().apres_import(rapport)
+        # bulk_create ne déclenche pas les signaux : catalogue des chambres à recharger
+        invalider_catalogue()
+
+
+class ImportateurReservations(Importateur):
+    """
+    Réservations historiques : client désigné par email, chambre par numéro.
+
+    nombre_nuits et prix_total (si absent) sont calculés ici, sans passer par
+    Reservation.save(). Les réservations actives occupent leurs nuits
+    (NuitReservee) comme une réservation saisie ; un chevauchement avec une
+    réservation existante ou une autre ligne du fichier est rejeté.
+    """
+
+    modele = Reservation
+
+    def __init__(self, utilisateur, taille_lot=TAILLE_LOT):
+        super().__init__(taille_lot)
+        self.utilisateur = utilisateur
+        self.periode = None
+
+    def preparer_lot(self, lot, rapport):
+        emails = {str(ligne.get('client_email', '')).strip().lower() for _, ligne in lot}
+        numeros = {str(ligne.get('numero_chambre', '')).strip() for _, ligne in lot}
+        self.clients = Client.objects.in_bulk(emails, field_name='email')
+        self.chambres = Chambre.objects.in_bulk(numeros, field_name='numero_chambre')
+
+    def construire(self, ligne):
+        email = _texte(ligne, 'client_email').lower()
+        numero_chambre = _texte(ligne, 'numero_chambre')
+        client = self.clients.get(email)
+        if client is None:
+            raise ErreurLigne(f"client_email : aucun client {email}")
+        chambre = self.chambres.get(numero_chambre)
+        if chambre is None:
+            raise ErreurLigne(f"numero_chambre : aucune chambre {numero_chambre}")
+
+        debut = _date(ligne, 'date_debut_sejour')
+        fin = _date(ligne, 'date_fin_sejour')
+        if fin <= debut:
+            raise ErreurLigne("La date de fin doit être postérieure à la date de début.")
+        nombre_nuits = (fin - debut).days
+        nombre_adultes = _entier(ligne, 'nombre_adultes', obligatoire=False, defaut=1)
+        nombre_enfants = _entier(ligne, 'nombre_enfants', obligatoire=False, defaut=0)
+        prix_total = _decimal(ligne, 'prix_total', obligatoire=False)
+        if prix_total is None:
+            prix_total = chambre.prix_nuit * nombre_nuits
+
+        reservation = Reservation(
+            client=client,
+            chambre=chambre,
+            utilisateur=self.utilisateur,
+            date_debut_sejour=debut,
+            date_fin_sejour=fin,
+            nombre_adultes=nombre_adultes,
+            nombre_enfants=nombre_enfants,
+            nombre_personnes=nombre_adultes + nombre_enfants,
+            nombre_nuits=nombre_nuits,
+            prix_total=prix_total,
+            statut=_texte(ligne, 'statut', obligatoire=False, defaut='TERMINEE').upper(),
+            commentaire=_texte(ligne, 'commentaire', obligatoire=False, defaut=None),
+        )
+        _valider(reservation, exclure=['client', 'chambre', 'utilisateur', 'date_reservation'])
+
+        reservation._date_historique = _horodatage(ligne, 'date_reservation')
+
+        if reservation.statut in STATUTS_BLOQUANTS:
+            reservation._nuits = [(chambre.pk, debut + timedelta(days=i)) for i in range(nombre_nuits)]
+        return reservation
+
+    def _filtrer_doublons(self, instances, rapport):
+        """
+        Écarte les réservations actives dont une nuit est déjà occupée, en base
+        ou par une ligne retenue plus haut dans le lot
+        """
+        actives = [(numero, r) for numero, r in instances if getattr(r, '_nuits', None)]
+        if not actives:
+            return instances
+
+        chambres = {r.chambre_id for _, r in actives}
+        premiere = min(r.date_debut_sejour for _, r in actives)
+        derniere = max(r.date_fin_sejour for _, r in actives)
+        occupees = set(NuitReservee.objects.filter(
+            chambre_id__in=chambres, nuit__gte=premiere, nuit__lt=derniere
+        ).values_list('chambre_id', 'nuit'))
+
+        # Seules les lignes retenues occupent leurs nuits : une ligne rejetée ne bloque pas les suivantes
+        nuits_du_lot = set()
+        retenues = []
+        for numero, reservation in instances:
+            nuits = getattr(reservation, '_nuits', ())
+            if occupees.intersection(nuits):
+                rapport.erreur(numero, "La chambre est déjà réservée sur cette période.")
+            elif nuits_du_lot.intersection(nuits):
+                rapport.erreur(numero, "La chambre est déjà réservée sur cette période (dans le fichier).")
+            else:
+                nuits_du_lot.update(nuits)
+                retenues.append((numero, reservation))
+        return retenues
+
+    def inserer(self, reservations):
+        Reservation.objects.bulk_create(reservations, batch_size=self.taille_lot)
+
+        # date_reservation est auto_now_add : on restaure la date d'origine ensuite,
+        # une requête par date distincte (bulk_update générerait un CASE géant)
+        par_date = defaultdict(list)
+        for reservation in reservations:
+            if reservation._date_historique:
+                reservation.date_reservation = reservation._date_historique
+                par_date[reservation._date_historique].append(reservation.pk)
+        for date_reservation, pks in par_date.items():
+            Reservation.objects.filter(pk__in=pks).update(date_reservation=date_reservation)
+
+        NuitReservee.objects.bulk_create([
+            NuitReservee(chambre_id=chambre_id, reservation_id=reservation.pk, nuit=nuit)
+            for reservation in reservations
+            for chambre_id, nuit in getattr(reservation, '_nuits', ())
+        ], batch_size=self.taille_lot)
+
+        for reservation in reservations:
+            self._etendre_periode(reservation.date_debut_sejour, reservation.date_fin_sejour)
+            if reservation._date_historique:
+                jour = timezone.localdate(reservation._date_historique)
+                self._etendre_periode(jour, jour + timedelta(days=1))
+
+    def _etendre_periode(self, debut, fin):
+        if self.periode is None:
+            self.periode = (debut, fin)
+        else:
+            self.periode = (min(self.periode[0], debut), max(self.periode[1], fin))
+
+    def apres_import(self, rapport):
+        # bulk_create ne déclenche pas les signaux : résumé journalier à recalculer
+        from .resume_journalier import recalculer_periode
+
+        if self.periode:
+            recalculer_periode(self.periode[0], self.periode[1] - timedelta(days=1))
+        super().apres_import(rapport)
+
+
+IMPORTATEURS = {
+    'clients': ImportateurClients,
+    'chambres': ImportateurChambres,
+    'reservations': ImportateurReservations,
+}
+
+
+def creer_importateur(type_import, utilisateur=None, taille_lot=TAILLE_LOT):
+    if type_import == 'reservations':
+        return ImportateurReservations(utilisateur, taille_lot)
+    return IMPORTATEURS[type_import](taille_lot)
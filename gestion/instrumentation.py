@@ -0,0 +1,199 @@
+"""
+Instrumentation des requêtes HTTP : SQL, rendu des gabarits, percentiles par vue.
+
+Activée par INSTRUMENTATION_ACTIVE = True. Désactivée, le middleware se
+retire au démarrage (MiddlewareNotUsed) et le moteur de gabarits se limite
+à une lecture de ContextVar par rendu : aucun coût mesurable.
+
+Pour chaque requête, on relève (par nom d'URL) le nombre de requêtes SQL,
+leur durée cumulée, le temps de rendu et les instructions les plus lentes.
+Les mesures partent dans l'en-tête Server-Timing, dans le journal
+« gestion.instrumentation » et dans un tampon circulaire en mémoire qui
+alimente la page des performances (p50 / p95 / p99 glissants).
+
+Le temps de rendu inclut le SQL des querysets évalués par le gabarit. Les
+réponses en flux (exports) ne sont mesurées que jusqu'au premier octet.
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('gestion.instrumentation')
+
+TAILLE_TAMPON = 1000
+NB_INSTRUCTIONS_LENTES = 5
+LONGUEUR_SQL = 300
+
+_mesure_courante = ContextVar('mesure_courante', default=None)
+
+
+class Mesure:
+    """Compteurs d'une requête HTTP ; sert aussi d'execute_wrapper"""
+
+    def __init__(self):
+        self.nb_requetes = 0
+        self.temps_sql = 0.0
+        self.temps_rendu = 0.0
+        self.lentes = []  # tas (durée, sql) des instructions les plus lentes
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duree = time.perf_counter() - debut
+            self.nb_requetes += 1
+            self.temps_sql += duree
+            entree = (duree, sql[:LONGUEUR_SQL])
+            if len(self.lentes) < NB_INSTRUCTIONS_LENTES:
+                heapq.heappush(self.lentes, entree)
+            elif duree > self.lentes[0][0]:
+                heapq.heapreplace(self.lentes, entree)
+
+    def instructions_lentes(self):
+        return sorted(self.lentes, reverse=True)
+
+
+def percentile(valeurs_triees, p):
+    """Percentile (rang le plus proche) d'une liste déjà triée"""
+    if not valeurs_triees:
+        return 0.0
+    rang = math.ceil(p / 100 * len(valeurs_triees))
+    return valeurs_triees[min(max(rang, 1), len(valeurs_triees)) - 1]
+
+
+class Registre:
+    """Tampon circulaire des dernières mesures, par nom de vue"""
+
+    def __init__(self, taille=TAILLE_TAMPON):
+        self.taille = taille
+        self._verrou = threading.Lock()
+        self._mesures = defaultdict(lambda: deque(maxlen=self.taille))
+
+    def enregistrer(self, vue, total, mesure):
+        entree = (total, mesure.temps_sql, mesure.temps_rendu, mesure.nb_requetes,
+                  mesure.instructions_lentes())
+        with self._verrou:
+            self._mesures[vue].append(entree)
+
+    def vider(self):
+        with self._verrou:
+            self._mesures.clear()
+
+    def resume(self):
+        """Statistiques par vue (durées en ms), les plus lentes au p95 d'abord"""
+        with self._verrou:
+            instantane = {vue: list(entrees) for vue, entrees in self._mesures.items()}
+
+        lignes = []
+        for vue, entrees in instantane.items():
+            totaux = sorted(entree[0] for entree in entrees)
+            pire = max(entrees, key=lambda entree: entree[0])
+            nb = len(entrees)
+            lignes.append({
+                'vue': vue,
+                'nb': nb,
+                'p50': percentile(totaux, 50) * 1000,
+                'p95': percentile(totaux, 95) * 1000,
+                'p99': percentile(totaux, 99) * 1000,
+                'max': totaux[-1] * 1000,
+                'sql_moyen': sum(entree[1] for entree in entrees) / nb * 1000,
+                'rendu_moyen': sum(entree[2] for entree in entrees) / nb * 1000,
+                'requetes_moyen': sum(entree[3] for entree in entrees) / nb,
+                'instructions_lentes': [(duree * 1000, sql) for duree, sql in pire[4]],
+            })
+        return sorted(lignes, key=lambda ligne: ligne['p95'], reverse=True)
+
+
+REGISTRE = Registre(getattr(settings, 'INSTRUMENTATION_TAILLE_TAMPON', TAILLE_TAMPON))
+
+
+def instrumentation_active():
+    return getattr(settings, 'INSTRUMENTATION_ACTIVE', False)
+
+
+class InstrumentationMiddleware:
+    """Mesure chaque requête ; à placer en tête de MIDDLEWARE"""
+
+    def __init__(self, get_response):
+        if not instrumentation_active():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mesure = Mesure()
+        jeton = _mesure_courante.set(mesure)
+        debut = time.perf_counter()
+        try:
+            with ExitStack() as pile:
+                for alias in connections:
+                    pile.enter_context(connections[alias].execute_wrapper(mesure))
+                response = self.get_response(request)
+        finally:
+            _mesure_courante.reset(jeton)
+        total = time.perf_counter() - debut
+
+        correspondance = request.resolver_match
+        vue = (correspondance.view_name if correspondance else None) or '(non résolue)'
+        REGISTRE.enregistrer(vue, total, mesure)
+
+        response['Server-Timing'] = (
+            f'sql;dur={mesure.temps_sql * 1000:.1f};desc="{mesure.nb_requetes} requetes", '
+            f'rendu;dur={mesure.temps_rendu * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        logger.info(
+            'vue=%s methode=%s statut=%s total_ms=%.1f sql_ms=%.1f rendu_ms=%.1f requetes=%d',
+            vue, request.method, response.status_code, total * 1000,
+            mesure.temps_sql * 1000, mesure.temps_rendu * 1000, mesure.nb_requetes,
+            extra={
+                'vue': vue,
+                'total_ms': total * 1000,
+                'sql_ms': mesure.temps_sql * 1000,
+                'rendu_ms': mesure.temps_rendu * 1000,
+                'requetes': mesure.nb_requetes,
+                'instructions_lentes': [
+                    (round(duree * 1000, 2), sql) for duree, sql in mesure.instructions_lentes()
+                ],
+            },
+        )
+        return response
+
+
+# ---------------------------------------------------------------------------
+# Moteur de gabarits chronométré
+# ---------------------------------------------------------------------------
+
+class TemplateInstrumente(Template):
+    """Gabarit de premier niveau : cumule son temps de rendu dans la mesure courante"""
+
+    def render(self, context=None, request=None):
+        mesure = _mesure_courante.get()
+        if mesure is None:
+            return super().render(context, request)
+        debut = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            mesure.temps_rendu += time.perf_counter() - debut
+
+
+class DjangoTemplatesInstrumentes(DjangoTemplates):
+    """Moteur Django standard dont les gabarits sont chronométrés"""
+
+    def from_string(self, template_code):
+        return TemplateInstrumente(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TemplateInstrumente(super().get_template(template_name).template, self)
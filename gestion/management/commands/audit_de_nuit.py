@@ -0,0 +1,80 @@
+import time
+from contextlib import nullcontext
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestion.audit import cloturer_departs, consolider_resume, marquer_non_presentations, rapprocher_chambres
+from gestion.sqlite import reprise_sur_verrou
+
+
+class AnnulationSimulation(Exception):
+    """Annule les écritures d'un audit exécuté en simulation"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Audit de nuit : non-présentations, départs échus, statut des chambres "
+        "et résumé journalier, par UPDATE ensemblistes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jour', type=date.fromisoformat, default=None,
+            help="Journée hôtelière à clôturer (AAAA-MM-JJ, aujourd'hui par défaut)"
+        )
+        parser.add_argument(
+            '--simulation', action='store_true',
+            help="Affiche les compteurs sans rien enregistrer"
+        )
+
+    def handle(self, *args, **options):
+        jour = options['jour'] or date.today()
+        self.stdout.write(f"Audit de nuit du {jour}{' (simulation)' if options['simulation'] else ''}")
+        debut_audit = time.perf_counter()
+        try:
+            # En simulation, un bloc englobant annule toutes les étapes à la fin
+            with transaction.atomic() if options['simulation'] else nullcontext():
+                self._auditer(jour)
+                if options['simulation']:
+                    raise AnnulationSimulation
+        except AnnulationSimulation:
+            self.stdout.write("Simulation : aucune modification enregistrée.")
+
+        duree = (time.perf_counter() - debut_audit) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Audit de nuit terminé en {duree:.0f} ms."))
+
+    def _auditer(self, jour):
+        non_presentations = self._etape(
+            'Non-présentations', lambda: marquer_non_presentations(jour),
+            "{reservations} réservations, {nuits_liberees} nuits libérées"
+        )
+        self._etape(
+            'Départs échus', lambda: cloturer_departs(jour),
+            "{sejours_clotures} séjours clôturés, {reservations_terminees} réservations terminées, "
+            "{nuits_liberees} nuits libérées, {departs_non_soldes} départs non soldés laissés ouverts"
+        )
+        self._etape(
+            'Statut des chambres', rapprocher_chambres,
+            "{occupees} chambres marquées occupées, {liberees} libérées"
+        )
+
+        # Le jour audité, plus les nuits retirées aux non-présentations
+        debut, fin = jour, jour
+        if non_presentations['periode']:
+            debut = min(debut, non_presentations['periode'][0])
+            fin = max(fin, non_presentations['periode'][1])
+        self._etape(
+            'Résumé journalier', lambda: consolider_resume(debut, fin),
+            f"{{jours}} jours recalculés ({debut} → {fin})"
+        )
+
+    def _etape(self, nom, fonction, bilan):
+        """Exécute une étape dans sa propre transaction et affiche ses compteurs"""
+        debut = time.perf_counter()
+        compteurs = reprise_sur_verrou(transaction.atomic()(fonction))()
+        duree = (time.perf_counter() - debut) * 1000
+        self.stdout.write(f"{nom} : {bilan.format(**compteurs)} ({duree:.0f} ms)")
+        return compteurs
+
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from gestion.bench import base_de_test, generer_hotel
+from gestion.instrumentation import percentile
+from gestion.statistiques import invalider_statistiques
+
+# Mode : nombre de threads du pool d'agrégats (1 = agrégats lus à la suite)
+MODES = {
+    'sequentiel': 1,
+    'parallele': 4,
+}
+
+PAGES = ['dashboard', 'rapports']
+
+
+class Command(BaseCommand):
+    help = (
+        "Latence du tableau de bord et des rapports via le gestionnaire ASGI : "
+        "agrégats lus à la suite contre agrégats lus simultanément"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chambres', type=int, default=200)
+        parser.add_argument('--sejours-par-chambre', type=int, default=100)
+        parser.add_argument('--requetes', type=int, default=30, help="Requêtes mesurées par page")
+        parser.add_argument(
+            '--concurrence', type=int, default=1,
+            help="Requêtes simultanées (plusieurs utilisateurs sur le serveur ASGI)"
+        )
+        parser.add_argument('--threads', type=int, default=MODES['parallele'], help="Taille du pool en mode parallèle")
+
+    def handle(self, *args, **options):
+        modes = {**MODES, 'parallele': options['threads']}
+        with base_de_test():
+            volumes = generer_hotel(
+                chambres=options['chambres'],
+                clients=options['chambres'] * 5,
+                sejours_par_chambre=options['sejours_par_chambre'],
+            )
+            User.objects.create_superuser('bench_async', 'bench@exemple.gn', 'bench')
+            self.stdout.write(
+                f"Données : {volumes['reservations']} réservations, {volumes['paiements']} paiements ; "
+                f"{options['requetes']} requêtes par page, {options['concurrence']} simultanée(s)"
+            )
+            self.stdout.write(f"{'Page':<10} | {'Mode':<10} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'Req./s':>7}")
+            for page in PAGES:
+                for mode, threads in modes.items():
+                    # Hôte du client de test ASGI, autorisé comme le fait le lanceur de tests
+                    with override_settings(AGREGATS_PARALLELES=threads, ALLOWED_HOSTS=['testserver']):
+                        durees, duree_totale = asyncio.run(self._mesurer(reverse(page), options))
+                    self.stdout.write(
+                        f"{page:<10} | {mode:<10} | {percentile(durees, 50) * 1000:>8.1f} | "
+                        f"{percentile(durees, 95) * 1000:>8.1f} | {len(durees) / duree_totale:>7.1f}"
+                    )
+
+    async def _mesurer(self, url, options):
+        client = AsyncClient()
+        await client.alogin(username='bench_async', password='bench')
+        # Première requête hors mesure (connexions, gabarits compilés)
+        await client.get(url)
+
+        async def requete():
+            # Tableau de bord : on mesure le calcul, pas le cache des statistiques
+            invalider_statistiques()
+            debut = time.perf_counter()
+            reponse = await client.get(url)
+            if reponse.status_code != 200:
+                raise CommandError(f"{url} : statut {reponse.status_code}")
+            return time.perf_counter() - debut
+
+        durees = []
+        debut = time.perf_counter()
+        for _ in range(0, options['requetes'], options['concurrence']):
+            durees.extend(await asyncio.gather(*(requete() for _ in range(options['concurrence']))))
+        duree_totale = time.perf_counter() - debut
+        await sync_to_async(connections.close_all)()
+        return sorted(durees), duree_totale
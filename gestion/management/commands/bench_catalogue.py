@@ -0,0 +1,58 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from gestion.bench import base_de_test, creer_chambres, mesurer
+from gestion.catalogue import catalogue, invalider_catalogue
+from gestion.models import Chambre
+
+
+class Command(BaseCommand):
+    help = "Lectures des chambres par requête : base de données contre catalogue en mémoire"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chambres', type=int, default=300)
+        parser.add_argument('--repetitions', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repetitions = options['repetitions']
+        with base_de_test():
+            identifiants = [chambre.pk for chambre in creer_chambres(options['chambres'])]
+            tirage = random.Random(0)
+
+            operations = {
+                'chambre par identifiant': (
+                    lambda: Chambre.objects.get(pk=tirage.choice(identifiants)),
+                    lambda: catalogue().chambre(tirage.choice(identifiants)),
+                ),
+                'compteurs (liste, tableau)': (
+                    lambda: (Chambre.objects.count(), Chambre.objects.filter(statut='DISPONIBLE').count()),
+                    lambda: (catalogue().compter(), catalogue().compter(statut='DISPONIBLE')),
+                ),
+                'chambres par type': (
+                    lambda: list(Chambre.objects.values('type_chambre').annotate(count=Count('id'))),
+                    lambda: catalogue().par_type(),
+                ),
+                'chambres disponibles': (
+                    lambda: list(Chambre.objects.filter(statut='DISPONIBLE')),
+                    lambda: catalogue().chambres(statut='DISPONIBLE'),
+                ),
+            }
+
+            self.stdout.write(f"{options['chambres']} chambres, {repetitions} répétitions")
+            self.stdout.write(f"{'Lecture':<28} | {'Source':<10} | {'Requêtes':>8} | {'Durée (ms)':>10}")
+            # Premier chargement du catalogue hors mesure
+            catalogue()
+            for nom, (base, memoire) in operations.items():
+                for source, fonction in (('base', base), ('catalogue', memoire)):
+                    _, requetes, duree = mesurer(fonction, repetitions)
+                    self._ligne(nom, source, requetes, duree)
+
+            # Coût d'une modification de chambre : rechargement au prochain accès
+            invalider_catalogue()
+            _, requetes, duree = mesurer(catalogue)
+            self._ligne('rechargement', 'catalogue', requetes, duree)
+
+    def _ligne(self, lecture, source, requetes, duree):
+        self.stdout.write(f"{lecture:<28} | {source:<10} | {requetes:>8} | {duree:>10.3f}")
@@ -0,0 +1,101 @@
+import json
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.bench import base_de_test, generer_hotel
+from gestion.charge import SessionDjango, SessionHttp, comparer, executer_charge
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge des parcours de réception (connexion, réservation, check-in, "
+        "paiement, check-out, rapports) : débit, percentiles et requêtes SQL par étape"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--utilisateurs', type=int, default=4, help="Utilisateurs virtuels simultanés")
+        parser.add_argument('--iterations', type=int, default=5, help="Parcours par utilisateur")
+        parser.add_argument('--graine', type=int, default=42)
+        parser.add_argument(
+            '--url',
+            help="Serveur local à solliciter (ex. http://127.0.0.1:8000) ; par défaut, client de test "
+                 "Django sur une base jetable"
+        )
+        parser.add_argument('--identifiant', default='charge', help="Compte utilisé en mode --url")
+        parser.add_argument('--mot-de-passe', default='charge')
+        parser.add_argument('--chambres', type=int, default=50, help="Volume généré hors mode --url")
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--sejours-par-chambre', type=int, default=20)
+        parser.add_argument('--enregistrer', metavar='FICHIER', help="Écrit le rapport JSON (référence)")
+        parser.add_argument('--comparer', metavar='FICHIER', help="Compare à un rapport JSON de référence")
+        parser.add_argument('--tolerance', type=float, default=25, help="Hausse du p95 tolérée, en %%")
+
+    def handle(self, *args, **options):
+        reference = None
+        if options['comparer']:
+            with open(options['comparer'], encoding='utf-8') as fichier:
+                reference = json.load(fichier)
+
+        charge = partial(
+            executer_charge,
+            utilisateurs=options['utilisateurs'],
+            iterations=options['iterations'],
+            graine=options['graine'],
+        )
+        if options['url']:
+            rapport = charge(
+                partial(SessionHttp, options['url']), options['identifiant'], options['mot_de_passe'],
+                parametres={'mode': 'http', 'url': options['url']},
+            )
+        else:
+            with base_de_test():
+                volumes = generer_hotel(
+                    chambres=options['chambres'],
+                    clients=options['clients'],
+                    sejours_par_chambre=options['sejours_par_chambre'],
+                    graine=options['graine'],
+                )
+                User.objects.create_superuser('charge', '', 'charge')
+                rapport = charge(SessionDjango, 'charge', 'charge', parametres={'mode': 'client_test', **volumes})
+
+        self._afficher(rapport)
+
+        if options['enregistrer']:
+            with open(options['enregistrer'], 'w', encoding='utf-8') as fichier:
+                json.dump(rapport, fichier, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Rapport enregistré dans {options['enregistrer']}")
+
+        if reference is not None:
+            # Les compteurs (premier paiement du jour, cache froid...) dépendent du scénario joué
+            for cle in ('mode', 'utilisateurs', 'iterations', 'graine'):
+                if reference['parametres'].get(cle) != rapport['parametres'].get(cle):
+                    self.stdout.write(self.style.WARNING(
+                        f"Paramètre {cle} différent de la référence : comparaison indicative"
+                    ))
+            regressions = comparer(rapport, reference, tolerance=options['tolerance'] / 100)
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(regression))
+                raise CommandError(f"{len(regressions)} régression(s) par rapport à {options['comparer']}")
+            self.stdout.write(self.style.SUCCESS(f"Aucune régression par rapport à {options['comparer']}"))
+
+    def _afficher(self, rapport):
+        self.stdout.write(
+            f"{'Étape':<27} | {'Nb':>5} | {'Échecs':>6} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | "
+            f"{'p99 (ms)':>9} | {'SQL':>5}"
+        )
+        for nom, etape in rapport['etapes'].items():
+            requetes = '-' if etape['requetes_sql'] is None else etape['requetes_sql']
+            self.stdout.write(
+                f"{nom:<27} | {etape['nb']:>5} | {etape['echecs']:>6} | {etape['p50_ms']:>9.1f} | "
+                f"{etape['p95_ms']:>9.1f} | {etape['p99_ms']:>9.1f} | {requetes:>5}"
+            )
+        self.stdout.write(
+            f"Parcours : {rapport['parcours_reussis']} réussis, {rapport['parcours_echoues']} échoués "
+            f"en {rapport['duree_s']} s ({rapport['debit_parcours_s']} parcours/s, "
+            f"{rapport['debit_requetes_s']} requêtes HTTP/s)"
+        )
+        for erreur in rapport['erreurs']:
+            self.stdout.write(self.style.WARNING(erreur))
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from gestion.bench import (
+    creer_chambres, creer_clients, creer_reservations, creer_utilisateur_bench,
+    donnees_temporaires, mesurer,
+)
+from gestion.disponibilite import chambres_disponibles, est_disponible
+
+
+class Command(BaseCommand):
+    help = "Compare la recherche de disponibilité par chambre et la requête ensembliste"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tailles', type=int, nargs='+', default=[100, 1000, 10000],
+            help="Nombres de chambres à tester"
+        )
+        parser.add_argument(
+            '--repetitions', type=int, default=5,
+            help="Nombre de répétitions pour les mesures rapides"
+        )
+
+    def handle(self, *args, **options):
+        debut = date.today() + timedelta(days=10)
+        fin = debut + timedelta(days=3)
+
+        self.stdout.write(f"{'Chambres':>9} | {'Méthode':<22} | {'Requêtes':>8} | {'Durée (ms)':>10} | {'Libres':>6}")
+        for taille in options['tailles']:
+            with donnees_temporaires():
+                chambres = creer_chambres(taille)
+                clients = creer_clients(100)
+                creer_reservations(chambres, clients, creer_utilisateur_bench())
+
+                # Les chambres déjà présentes dans la base restent hors mesure :
+                # les deux méthodes comptent sur le même ensemble de chambres
+                generees = (chambres[0].pk, chambres[-1].pk)
+
+                # Ancienne approche : une requête par chambre
+                libres, requetes, duree = mesurer(
+                    lambda: sum(est_disponible(c, debut, fin) for c in chambres)
+                )
+                self._ligne(taille, 'par chambre', requetes, duree, libres)
+
+                libres, requetes, duree = mesurer(
+                    lambda: len(chambres_disponibles(debut, fin).filter(pk__range=generees)),
+                    options['repetitions']
+                )
+                self._ligne(taille, 'requête ensembliste', requetes, duree, libres)
+
+    def _ligne(self, taille, methode, requetes, duree, libres):
+        self.stdout.write(f"{taille:>9} | {methode:<22} | {requetes:>8} | {duree:>10.2f} | {libres:>6}")
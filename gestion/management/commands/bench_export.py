@@ -0,0 +1,58 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import reset_queries
+
+from gestion.bench import (
+    creer_chambres, creer_clients, creer_reservations, creer_utilisateur_bench,
+    donnees_temporaires,
+)
+from gestion.exports import reponse_export
+
+# Réservations insérées par appel à creer_reservations (1000 chambres x 10)
+TAILLE_LOT = 10000
+
+
+class Command(BaseCommand):
+    help = "Mesure la mémoire de pointe des exports en flux selon le nombre de lignes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--paliers', type=int, nargs='+', default=[10000, 100000, 1000000],
+            help="Nombres de réservations exportées"
+        )
+        parser.add_argument('--formats', nargs='+', default=['csv', 'xlsx'], choices=['csv', 'xlsx'])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'Lignes':>9} | {'Format':<6} | {'Taille (Mo)':>11} | {'Durée (s)':>9} | {'Pic mémoire (Mo)':>16}")
+        with donnees_temporaires():
+            chambres = creer_chambres(1000)
+            clients = creer_clients(1000)
+            utilisateur = creer_utilisateur_bench()
+
+            inserees = 0
+            for palier in sorted(options['paliers']):
+                while inserees < palier:
+                    creer_reservations(chambres, clients, utilisateur, par_chambre=10, graine=inserees)
+                    inserees += TAILLE_LOT
+
+                for format_export in options['formats']:
+                    octets, duree, pic = self._exporter(format_export)
+                    self.stdout.write(
+                        f"{inserees:>9} | {format_export:<6} | {octets / 1e6:>11.1f} | "
+                        f"{duree:>9.1f} | {pic / 1e6:>16.2f}"
+                    )
+
+    def _exporter(self, format_export):
+        """Consomme la réponse en flux comme le ferait le serveur WSGI"""
+        reset_queries()
+        tracemalloc.start()
+        debut = time.perf_counter()
+        octets = 0
+        for morceau in reponse_export('reservations', format_export, {}).streaming_content:
+            octets += len(morceau)
+        duree = time.perf_counter() - debut
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return octets, duree, pic
@@ -0,0 +1,98 @@
+import csv
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from gestion.bench import base_de_test, creer_chambres, creer_utilisateur_bench, donnees_temporaires
+from gestion.importation import creer_importateur, lire_lignes
+from gestion.models import Client
+
+
+class Command(BaseCommand):
+    help = "Débit de l'import en masse comparé à la création client par client"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50000)
+        parser.add_argument('--reservations', type=int, default=50000)
+        parser.add_argument(
+            '--echantillon', type=int, default=2000,
+            help="Lignes créées une à une pour la comparaison"
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as dossier:
+            fichier_clients = f'{dossier}/clients.csv'
+            fichier_reservations = f'{dossier}/reservations.csv'
+            self._ecrire_clients(fichier_clients, options['clients'])
+            self._ecrire_reservations(fichier_reservations, options['reservations'], options['clients'])
+
+            # Base jetable : le schéma complet (nuits réservées, résumé journalier) est requis
+            with base_de_test():
+                with donnees_temporaires():
+                    debit = self._une_par_une(fichier_clients, options['echantillon'])
+                    self._ligne('clients, une par une', options['echantillon'], debit)
+
+                rapport, debit = self._importer('clients', fichier_clients)
+                self._ligne('clients, par lots', rapport.inserees, debit, rapport)
+
+                creer_chambres(200, prefixe='I')
+                rapport, debit = self._importer('reservations', fichier_reservations)
+                self._ligne('réservations, par lots', rapport.inserees, debit, rapport)
+
+    def _ligne(self, libelle, lignes, debit, rapport=None):
+        erreurs = f", {len(rapport.erreurs)} erreur(s)" if rapport else ''
+        self.stdout.write(f"{libelle:<24} : {lignes:>7} lignes, {debit:>9.0f} lignes/s{erreurs}")
+
+    def _importer(self, type_import, chemin):
+        importateur = creer_importateur(type_import, creer_utilisateur_bench())
+        debut = time.perf_counter()
+        with open(chemin, encoding='utf-8', newline='') as fichier:
+            rapport = importateur.importer(lire_lignes(fichier))
+        return rapport, rapport.lignes_traitees / (time.perf_counter() - debut)
+
+    def _une_par_une(self, chemin, nombre):
+        """Reproduit client_create : trois exists() puis un INSERT par ligne"""
+        with open(chemin, encoding='utf-8', newline='') as fichier:
+            lignes = [ligne for _, ligne in zip(range(nombre), csv.DictReader(fichier, delimiter=';'))]
+        debut = time.perf_counter()
+        for ligne in lignes:
+            if Client.objects.filter(email=ligne['email']).exists():
+                continue
+            if Client.objects.filter(telephone=ligne['telephone']).exists():
+                continue
+            if Client.objects.filter(numero_piece=ligne['numero_piece']).exists():
+                continue
+            Client.objects.create(**ligne)
+        return len(lignes) / (time.perf_counter() - debut)
+
+    def _ecrire_clients(self, chemin, nombre):
+        with open(chemin, 'w', encoding='utf-8', newline='') as fichier:
+            writer = csv.writer(fichier, delimiter=';')
+            writer.writerow([
+                'nom', 'prenom', 'email', 'telephone', 'adresse', 'ville', 'pays',
+                'piece_identite', 'numero_piece', 'date_naissance',
+            ])
+            for i in range(nombre):
+                writer.writerow([
+                    f'Nom{i}', f'Prenom{i}', f'import{i}@exemple.gn', f'+225{i:09d}', 'Kaloum',
+                    'Conakry', 'Guinée', 'CNI', f'IMP{i:08d}', '1985-06-15',
+                ])
+
+    def _ecrire_reservations(self, chemin, nombre, clients):
+        """Séjours passés terminés, répartis sur 200 chambres sans chevauchement"""
+        origine = date.today() - timedelta(days=3 * (nombre // 200 + 1))
+        with open(chemin, 'w', encoding='utf-8', newline='') as fichier:
+            writer = csv.writer(fichier, delimiter=';')
+            writer.writerow([
+                'client_email', 'numero_chambre', 'date_debut_sejour', 'date_fin_sejour',
+                'nombre_adultes', 'statut', 'date_reservation',
+            ])
+            for i in range(nombre):
+                debut = origine + timedelta(days=3 * (i // 200))
+                writer.writerow([
+                    f'import{i % clients}@exemple.gn', f'I{i % 200:05d}', debut.isoformat(),
+                    (debut + timedelta(days=2)).isoformat(), 2, 'TERMINEE',
+                    (debut - timedelta(days=10)).isoformat(),
+                ])
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from gestion.bench import (
+    creer_chambres, creer_clients, creer_paiements, creer_reservations, creer_sejours,
+    creer_utilisateur_bench, donnees_temporaires, mesurer,
+)
+from gestion.disponibilite import chambres_disponibles
+from gestion.models import Client, Paiement, Reservation, Sejour
+from gestion.statistiques import _debut_mois
+
+
+class Command(BaseCommand):
+    help = "Affiche les plans EXPLAIN et les durées des requêtes critiques sans puis avec les index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chambres', type=int, default=2000)
+        parser.add_argument('--clients', type=int, default=5000)
+        parser.add_argument('--reservations-par-chambre', type=int, default=20)
+        parser.add_argument('--repetitions', type=int, default=20)
+        parser.add_argument('--sans-plans', action='store_true', help="N'affiche que les durées")
+
+    def handle(self, *args, **options):
+        with donnees_temporaires():
+            self.stdout.write("Génération du jeu de données...")
+            chambres = creer_chambres(options['chambres'])
+            clients = creer_clients(options['clients'])
+            reservations = creer_reservations(
+                chambres, clients, creer_utilisateur_bench(),
+                par_chambre=options['reservations_par_chambre'], horizon=365,
+            )
+            creer_paiements(creer_sejours(reservations))
+            self.stdout.write(f"{len(reservations)} réservations générées.")
+
+            index = self._index()
+            self._supprimer_index(index)
+            avant = self._executer("SANS INDEX", options)
+            self._creer_index(index)
+            apres = self._executer("AVEC INDEX", options)
+
+            self.stdout.write(f"\n{'Requête':<28} | {'Sans (ms)':>10} | {'Avec (ms)':>10}")
+            for nom in avant:
+                self.stdout.write(f"{nom:<28} | {avant[nom]:>10.2f} | {apres[nom]:>10.2f}")
+
+    def _requetes(self):
+        today = date.today()
+        debut_mois = _debut_mois(today)
+        return {
+            'disponibilité': lambda: chambres_disponibles(today, today + timedelta(days=3)),
+            'arrivées du jour': lambda: Reservation.objects.filter(
+                statut='CONFIRMEE', date_debut_sejour=today),
+            'départs du jour': lambda: Reservation.objects.filter(
+                statut='CONFIRMEE', date_fin_sejour=today),
+            'revenus du mois': lambda: Paiement.objects.filter(
+                statut='VALIDE', date_paiement__gte=debut_mois),
+            'séjours actifs': lambda: Sejour.objects.filter(date_checkout__isnull=True),
+            'page réservations': lambda: Reservation.objects.order_by(
+                '-date_reservation', '-id')[:50],
+            'page clients': lambda: Client.objects.order_by('-date_inscription', '-id')[:50],
+        }
+
+    def _executer(self, titre, options):
+        self.stdout.write(f"\n===== {titre} =====")
+        durees = {}
+        for nom, requete in self._requetes().items():
+            if not options['sans_plans']:
+                self.stdout.write(f"\n-- {nom}\n{requete().explain()}")
+            _, _, durees[nom] = mesurer(lambda: list(requete()), options['repetitions'])
+        return durees
+
+    def _index(self):
+        """Index déclarés dans Meta.indexes des modèles concernés"""
+        return [
+            (modele, index)
+            for modele in (Client, Reservation, Sejour, Paiement)
+            for index in modele._meta.indexes
+        ]
+
+    def _editeur(self):
+        # Éditeur utilisé seulement pour générer le SQL : celui de SQLite refuse
+        # de s'ouvrir dans une transaction, on n'entre donc pas dans son contexte
+        editeur = connection.schema_editor()
+        editeur.deferred_sql = []
+        return editeur
+
+    def _supprimer_index(self, index):
+        editeur = self._editeur()
+        with connection.cursor() as cursor:
+            for modele, idx in index:
+                cursor.execute(str(idx.remove_sql(modele, editeur)))
+
+    def _creer_index(self, index):
+        editeur = self._editeur()
+        with connection.cursor() as cursor:
+            for modele, idx in index:
+                cursor.execute(str(idx.create_sql(modele, editeur)))
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute('ANALYZE')
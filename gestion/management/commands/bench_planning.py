@@ -0,0 +1,73 @@
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from gestion.bench import (
+    creer_chambres, creer_clients, creer_reservations, creer_utilisateur_bench,
+    donnees_temporaires, mesurer,
+)
+from gestion.disponibilite import est_disponible
+from gestion.planning import Planning
+
+
+class Command(BaseCommand):
+    help = "Planning des chambres (chambres × nuits) : une requête par case contre la grille en une passe"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chambres', type=int, default=500)
+        parser.add_argument('--nuits', type=int, default=90)
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument(
+            '--echantillon', type=int, default=10,
+            help="Chambres mesurées case par case (extrapolé à toute la grille)"
+        )
+
+    def handle(self, *args, **options):
+        debut = date.today()
+        nuits = options['nuits']
+        cases = options['chambres'] * nuits
+
+        with donnees_temporaires():
+            chambres = creer_chambres(options['chambres'])
+            clients = creer_clients(200)
+            creer_reservations(chambres, clients, creer_utilisateur_bench(), par_chambre=nuits // 6, horizon=nuits)
+            User.objects.create_superuser('bench_planning', 'bench@exemple.gn', 'bench')
+
+            self.stdout.write(f"Grille : {options['chambres']} chambres × {nuits} nuits ({cases} cases)")
+            self.stdout.write(f"{'Méthode':<28} | {'Requêtes':>8} | {'Durée (ms)':>10}")
+
+            # Ancienne approche : est_disponible() pour chaque case, sur un échantillon
+            echantillon = chambres[:options['echantillon']]
+            _, requetes, duree = mesurer(lambda: [
+                est_disponible(chambre, debut + timedelta(days=i), debut + timedelta(days=i + 1))
+                for chambre in echantillon for i in range(nuits)
+            ])
+            facteur = options['chambres'] / len(echantillon)
+            self._ligne('par case (extrapolé)', round(requetes * facteur), duree * facteur)
+
+            _, requetes, duree = mesurer(lambda: Planning(debut, nuits), options['repetitions'])
+            self._ligne('grille en une passe', requetes, duree)
+
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(User.objects.get(username='bench_planning'))
+            parametres = {'debut': debut.isoformat(), 'nuits': nuits}
+            for nom, url in (('page HTML', reverse('planning')), ('API JSON', reverse('api_planning'))):
+                client.get(url, parametres)
+                with CaptureQueriesContext(connection) as requetes:
+                    instant = time.perf_counter()
+                    for _ in range(options['repetitions']):
+                        reponse = client.get(url, parametres)
+                    duree = (time.perf_counter() - instant) * 1000 / options['repetitions']
+                self._ligne(
+                    f"{nom} ({len(reponse.content) // 1024} Ko)",
+                    len(requetes) // options['repetitions'], duree,
+                )
+
+    def _ligne(self, methode, requetes, duree):
+        self.stdout.write(f"{methode:<28} | {requetes:>8} | {duree:>10.1f}")
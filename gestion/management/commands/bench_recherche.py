@@ -0,0 +1,77 @@
+import random
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from gestion.bench import donnees_temporaires, mesurer
+from gestion.models import Client
+from gestion.recherche import condition_recherche, indexer_clients, suggestions_clients
+
+NOMS = [
+    'Diallo', 'Bah', 'Barry', 'Sow', 'Camara', 'Condé', 'Touré', 'Keïta', 'Soumah',
+    'Sylla', 'Kourouma', 'Béavogui', 'Sénè', "N'Diaye", 'Cissé', 'Doumbouya',
+]
+PRENOMS = [
+    'Mamadou', 'Fatoumata', 'Ibrahima', 'Aïssatou', 'Alpha', 'Mariama', 'Oumar',
+    'Kadiatou', 'Sékou', 'Hawa', 'Thierno', 'Néné', 'Abdoulaye', 'Djénabou',
+]
+REQUETES = ['diallo', 'DIALLO', 'sene', 'ndiaye', 'aissatou ba', 'ke', '622000', 'cliente12345']
+
+
+class Command(BaseCommand):
+    help = "Compare la recherche client par LIKE '%x%' et par l'index de mots-clés"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500000)
+        parser.add_argument('--repetitions', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with donnees_temporaires():
+            self.stdout.write(f"Création et indexation de {options['clients']} clients…")
+            self._creer_clients(options['clients'])
+
+            self.stdout.write(
+                f"{'Recherche':<14} | {'LIKE %x% (ms)':>13} | {'Autocomplétion (ms)':>19} | "
+                f"{'Liste, 50 (ms)':>14} | {'Trouvés':>7}"
+            )
+            for requete in REQUETES:
+                _, _, like = mesurer(lambda: list(self._like(requete)[:10]), options['repetitions'])
+                trouves, _, suggestion = mesurer(
+                    lambda: suggestions_clients(requete), options['repetitions']
+                )
+                _, _, liste = mesurer(
+                    lambda: list(Client.objects.filter(condition_recherche(requete)).order_by(
+                        '-date_inscription', '-id'
+                    )[:50]),
+                    options['repetitions']
+                )
+                self.stdout.write(
+                    f"{requete:<14} | {like:>13.2f} | {suggestion:>19.2f} | {liste:>14.2f} | {len(trouves):>7}"
+                )
+
+    def _like(self, requete):
+        """Ancienne recherche de client_list"""
+        return Client.objects.filter(
+            Q(nom__icontains=requete) | Q(prenom__icontains=requete) |
+            Q(email__icontains=requete) | Q(telephone__icontains=requete)
+        ).order_by('-date_inscription')
+
+    def _creer_clients(self, nombre, taille_lot=10000):
+        alea = random.Random(42)
+        for debut in range(0, nombre, taille_lot):
+            clients = Client.objects.bulk_create([
+                Client(
+                    nom=alea.choice(NOMS),
+                    prenom=alea.choice(PRENOMS),
+                    email=f'cliente{i}@exemple.gn',
+                    telephone=f'+224622{i:06d}',
+                    adresse='Conakry',
+                    ville='Conakry',
+                    piece_identite='CNI',
+                    numero_piece=f'RCH{i:09d}',
+                    date_naissance=date(1990, 1, 1),
+                )
+                for i in range(debut, min(debut + taille_lot, nombre))
+            ], batch_size=1000)
+            indexer_clients(clients)
@@ -0,0 +1,97 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from gestion.bench import base_de_test, creer_chambres, creer_clients, creer_utilisateur_bench
+from gestion.disponibilite import ChambreIndisponible
+from gestion.models import NuitReservee, Reservation
+
+
+class Command(BaseCommand):
+    help = "Réservations concurrentes sur peu de chambres : débit, refus et vérification des chevauchements"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--tentatives', type=int, default=50, help="Tentatives par thread")
+        parser.add_argument('--chambres', type=int, default=10)
+        parser.add_argument('--horizon', type=int, default=30, help="Fenêtre de dates en jours")
+
+    def handle(self, *args, **options):
+        with base_de_test():
+            chambres = creer_chambres(options['chambres'])
+            clients = creer_clients(options['threads'])
+            utilisateur = creer_utilisateur_bench()
+            compteurs = {'acceptees': 0, 'refusees': 0, 'erreurs': 0}
+            verrou = threading.Lock()
+            depart = threading.Barrier(options['threads'])
+
+            def reserver(numero):
+                alea = random.Random(numero)
+                resultats = {'acceptees': 0, 'refusees': 0, 'erreurs': 0}
+                try:
+                    depart.wait()
+                    for _ in range(options['tentatives']):
+                        debut = date.today() + timedelta(days=alea.randrange(options['horizon']))
+                        chambre = alea.choice(chambres)
+                        nuits = alea.randint(1, 4)
+                        try:
+                            Reservation.objects.create(
+                                client=clients[numero],
+                                chambre=chambre,
+                                utilisateur=utilisateur,
+                                date_debut_sejour=debut,
+                                date_fin_sejour=debut + timedelta(days=nuits),
+                                nombre_adultes=1,
+                                prix_total=chambre.prix_nuit * nuits,
+                                statut='CONFIRMEE',
+                            )
+                            resultats['acceptees'] += 1
+                        except ChambreIndisponible:
+                            resultats['refusees'] += 1
+                        except Exception:
+                            resultats['erreurs'] += 1
+                finally:
+                    connection.close()
+                    with verrou:
+                        for cle, valeur in resultats.items():
+                            compteurs[cle] += valeur
+
+            threads = [threading.Thread(target=reserver, args=(i,)) for i in range(options['threads'])]
+            debut_mesure = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            duree = time.perf_counter() - debut_mesure
+
+            total = sum(compteurs.values())
+            self.stdout.write(f"Tentatives        : {total} ({options['threads']} threads)")
+            self.stdout.write(f"Acceptées         : {compteurs['acceptees']}")
+            self.stdout.write(f"Refus (conflits)  : {compteurs['refusees']}")
+            self.stdout.write(f"Erreurs           : {compteurs['erreurs']}")
+            self.stdout.write(f"Débit             : {total / duree:.1f} tentatives/s")
+
+            chevauchements = self._chevauchements()
+            style = self.style.SUCCESS if chevauchements == 0 else self.style.ERROR
+            self.stdout.write(style(f"Chevauchements    : {chevauchements}"))
+            self.stdout.write(f"Nuits réservées   : {NuitReservee.objects.count()}")
+
+    def _chevauchements(self):
+        """Paires de réservations actives qui se chevauchent sur une même chambre"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM gestion_reservation a
+                JOIN gestion_reservation b
+                  ON a.chambre_id = b.chambre_id AND a.id < b.id
+                 AND a.date_debut_sejour < b.date_fin_sejour
+                 AND b.date_debut_sejour < a.date_fin_sejour
+                WHERE a.statut IN ('EN_ATTENTE', 'CONFIRMEE')
+                  AND b.statut IN ('EN_ATTENTE', 'CONFIRMEE')
+                """
+            )
+            return cursor.fetchone()[0]
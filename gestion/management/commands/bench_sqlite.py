@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from gestion.bench import base_de_test, creer_chambres, creer_clients, creer_utilisateur_bench
+from gestion.disponibilite import ChambreIndisponible, chambres_disponibles
+from gestion.instrumentation import percentile
+from gestion.models import Reservation
+from gestion.sqlite import est_verrouillage, reprise_sur_verrou
+
+# Profil : (PRAGMA appliqués à chaque connexion, mode de BEGIN,
+# reprise sur verrouillage comme dans les vues)
+PROFILS = {
+    'defaut': ({}, None, False),
+    'production': (settings.SQLITE_PROFIL_PRODUCTION, 'IMMEDIATE', True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Réservations concurrentes (avec lectures de disponibilité en parallèle) : "
+        "profil SQLite par défaut contre profil de production (WAL, pragmas)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ecrivains', type=int, default=4, help="Threads qui réservent")
+        parser.add_argument('--lecteurs', type=int, default=2, help="Threads qui cherchent des chambres libres")
+        parser.add_argument('--reservations', type=int, default=50, help="Tentatives par écrivain")
+        parser.add_argument('--chambres', type=int, default=200)
+        parser.add_argument('--profils', nargs='+', default=list(PROFILS), choices=list(PROFILS))
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'Profil':<11} | {'Journal':<7} | {'Réserv./s':>9} | {'p95 (ms)':>8} | "
+            f"{'Lectures/s':>10} | {'Conflits':>8} | {'Verrous':>7}"
+        )
+        # Verrous : opérations abandonnées sur « database is locked » (après reprises en production)
+        for nom in options['profils']:
+            connection.close()
+            pragmas, mode, reprise = PROFILS[nom]
+            # Lu à l'ouverture de chaque connexion, y compris celles des threads
+            options_base = connection.settings_dict['OPTIONS']
+            connection.settings_dict['OPTIONS'] = {**options_base, 'transaction_mode': mode}
+            try:
+                with override_settings(SQLITE_PRAGMAS=pragmas), base_de_test():
+                    with connection.cursor() as curseur:
+                        curseur.execute('PRAGMA journal_mode')
+                        journal = curseur.fetchone()[0]
+                    resultat = self._mesurer(options, reprise)
+            finally:
+                connection.settings_dict['OPTIONS'] = options_base
+            self.stdout.write(
+                f"{nom:<11} | {journal:<7} | {resultat['debit']:>9.1f} | {resultat['p95']:>8.1f} | "
+                f"{resultat['lectures']:>10.1f} | {resultat['conflits']:>8} | {resultat['verrous']:>7}"
+            )
+
+    def _mesurer(self, options, reprise):
+        chambres = creer_chambres(options['chambres'])
+        clients = creer_clients(options['ecrivains'])
+        utilisateur = creer_utilisateur_bench()
+        verrou = threading.Lock()
+        depart = threading.Barrier(options['ecrivains'] + options['lecteurs'])
+        fin_ecritures = threading.Event()
+        mesures = {'durees': [], 'conflits': 0, 'verrous': 0, 'lectures': 0}
+        creer = reprise_sur_verrou(Reservation.objects.create) if reprise else Reservation.objects.create
+
+        def ecrire(numero):
+            alea = random.Random(numero)
+            durees, conflits, verrous = [], 0, 0
+            try:
+                depart.wait()
+                for _ in range(options['reservations']):
+                    chambre = alea.choice(chambres)
+                    debut = date.today() + timedelta(days=alea.randrange(365))
+                    nuits = alea.randint(1, 4)
+                    instant = time.perf_counter()
+                    try:
+                        creer(
+                            client=clients[numero], chambre=chambre, utilisateur=utilisateur,
+                            date_debut_sejour=debut, date_fin_sejour=debut + timedelta(days=nuits),
+                            nombre_adultes=1, prix_total=chambre.prix_nuit * nuits, statut='CONFIRMEE',
+                        )
+                        durees.append(time.perf_counter() - instant)
+                    except ChambreIndisponible:
+                        conflits += 1
+                    except OperationalError as erreur:
+                        if not est_verrouillage(erreur):
+                            raise
+                        verrous += 1
+            finally:
+                connection.close()
+                with verrou:
+                    mesures['durees'].extend(durees)
+                    mesures['conflits'] += conflits
+                    mesures['verrous'] += verrous
+
+        def lire(numero):
+            alea = random.Random(1000 + numero)
+            lectures, verrous = 0, 0
+            try:
+                depart.wait()
+                while not fin_ecritures.is_set():
+                    debut = date.today() + timedelta(days=alea.randrange(365))
+                    try:
+                        list(chambres_disponibles(debut, debut + timedelta(days=2)).values_list('pk', flat=True)[:20])
+                        lectures += 1
+                    except OperationalError as erreur:
+                        if not est_verrouillage(erreur):
+                            raise
+                        verrous += 1
+            finally:
+                connection.close()
+                with verrou:
+                    mesures['lectures'] += lectures
+                    mesures['verrous'] += verrous
+
+        ecrivains = [threading.Thread(target=ecrire, args=(i,)) for i in range(options['ecrivains'])]
+        lecteurs = [threading.Thread(target=lire, args=(i,)) for i in range(options['lecteurs'])]
+        debut = time.perf_counter()
+        for thread in ecrivains + lecteurs:
+            thread.start()
+        for thread in ecrivains:
+            thread.join()
+        duree = time.perf_counter() - debut
+        fin_ecritures.set()
+        for thread in lecteurs:
+            thread.join()
+
+        durees = sorted(mesures['durees'])
+        return {
+            'debit': len(durees) / duree,
+            'p95': percentile(durees, 95) * 1000,
+            'lectures': mesures['lectures'] / duree,
+            'conflits': mesures['conflits'],
+            'verrous': mesures['verrous'],
+        }
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from gestion.bench import base_de_test, creer_chambres, mesurer
+from gestion.models import Chambre, PlanTarifaire, RemiseDuree
+from gestion.tarifs import NUITS_WEEKEND, coter
+
+
+def devis_nuit_par_nuit(chambres, plans, remises, debut, fin):
+    """Approche directe : chaque chambre, chaque nuit, chaque plan parcourus en Python"""
+    nuits = (fin - debut).days
+    devis = {}
+    for chambre in chambres:
+        total = Decimal(0)
+        for indice in range(nuits):
+            nuit = debut + timedelta(days=indice)
+            coefficient = Decimal(1)
+            for plan in plans:
+                if plan.type_chambre in ('', chambre['type_chambre']) and plan.date_debut <= nuit <= plan.date_fin:
+                    coefficient = plan.coefficient
+                    if nuit.weekday() in NUITS_WEEKEND:
+                        coefficient *= 1 + plan.majoration_weekend / 100
+            total += chambre['prix_nuit'] * coefficient
+        remise = max((
+            remise.pourcentage for remise in remises
+            if remise.nuits_minimum <= nuits and remise.type_chambre in ('', chambre['type_chambre'])
+        ), default=0)
+        devis[chambre['id']] = total * (100 - remise) / 100
+    return devis
+
+
+class Command(BaseCommand):
+    help = "Devis de toutes les chambres sur une période : nuit par nuit en Python contre calendrier précalculé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chambres', type=int, default=300)
+        parser.add_argument('--nuits', type=int, default=14)
+        parser.add_argument('--plans', type=int, default=24, help="Plans tarifaires (saisons) générés")
+        parser.add_argument('--repetitions', type=int, default=20)
+
+    def handle(self, *args, **options):
+        debut = date.today() + timedelta(days=30)
+        fin = debut + timedelta(days=options['nuits'])
+        repetitions = options['repetitions']
+
+        with base_de_test():
+            creer_chambres(options['chambres'])
+            types = [type_chambre for type_chambre, _ in Chambre.TYPE_CHAMBRE_CHOICES]
+            for indice in range(options['plans']):
+                PlanTarifaire.objects.create(
+                    nom=f'Saison {indice}', type_chambre=types[indice % len(types)],
+                    date_debut=date.today() + timedelta(days=indice * 15),
+                    date_fin=date.today() + timedelta(days=indice * 15 + 29),
+                    coefficient=Decimal('1.1') + Decimal(indice % 5) / 10,
+                    majoration_weekend=Decimal('15'), priorite=indice,
+                )
+            RemiseDuree.objects.create(nuits_minimum=7, pourcentage=Decimal('10'))
+
+            def lignes():
+                return list(Chambre.objects.values('id', 'type_chambre', 'prix_nuit'))
+
+            def direct():
+                plans = list(PlanTarifaire.objects.filter(actif=True).order_by('priorite', 'date_debut', 'id'))
+                return devis_nuit_par_nuit(lignes(), plans, list(RemiseDuree.objects.all()), debut, fin)
+
+            def calendrier():
+                cache.clear()
+                return coter(lignes(), debut, fin)
+
+            self.stdout.write(
+                f"{options['chambres']} chambres, {options['nuits']} nuits, {options['plans']} plans tarifaires"
+            )
+            self.stdout.write(f"{'Méthode':<26} | {'Requêtes':>8} | {'Durée (ms)':>10}")
+            attendu, requetes, duree = mesurer(direct, repetitions)
+            self._ligne('nuit par nuit', requetes, duree)
+            obtenu, requetes, duree = mesurer(calendrier, repetitions)
+            self._ligne('calendrier', requetes, duree)
+            _, requetes, duree = mesurer(lambda: coter(lignes(), debut, fin), repetitions)
+            self._ligne('calendrier mémorisé', requetes, duree)
+
+            ecarts = sum(
+                1 for ligne in obtenu
+                if abs(ligne['prix_total'] - attendu[ligne['id']]) > Decimal('0.01')
+            )
+            self.stdout.write(f"Devis différents entre les deux méthodes : {ecarts}")
+
+    def _ligne(self, methode, requetes, duree):
+        self.stdout.write(f"{methode:<26} | {requetes:>8} | {duree:>10.2f}")
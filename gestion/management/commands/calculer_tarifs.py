@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.tarifs import HORIZON, recalculer_calendrier
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplie les plans tarifaires en tarifs journaliers (TarifJournalier) ; "
+        "à lancer chaque nuit pour faire avancer l'horizon"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', type=date.fromisoformat, help="Première nuit (AAAA-MM-JJ, défaut : aujourd'hui)")
+        parser.add_argument('--nuits', type=int, default=HORIZON, help="Nombre de nuits calculées")
+
+    def handle(self, *args, **options):
+        if options['nuits'] < 1:
+            raise CommandError("Le nombre de nuits doit être positif.")
+        lignes = recalculer_calendrier(options['debut'], options['nuits'])
+        self.stdout.write(self.style.SUCCESS(f"Calendrier des tarifs recalculé ({lignes} tarifs journaliers)."))
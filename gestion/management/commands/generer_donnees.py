@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestion.bench import generer_hotel
+
+
+class Command(BaseCommand):
+    help = (
+        "Écrit un hôtel synthétique (chambres, clients, réservations, séjours, paiements) "
+        "dans la base configurée, pour les tests de charge contre un serveur local"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chambres', type=int, default=50)
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--sejours-par-chambre', type=int, default=20, help="Séjours terminés par chambre")
+        parser.add_argument('--paiements-par-sejour', type=int, default=2)
+        parser.add_argument('--reservations-futures', type=int, default=2, help="Réservations à venir par chambre")
+        parser.add_argument('--fenetre-libre', type=int, default=30, help="Jours laissés libres à partir d'aujourd'hui")
+        parser.add_argument('--graine', type=int, default=42)
+        parser.add_argument('--identifiant', default='charge', help="Compte administrateur créé pour bench_charge")
+        parser.add_argument('--mot-de-passe', default='charge')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            volumes = generer_hotel(
+                chambres=options['chambres'],
+                clients=options['clients'],
+                sejours_par_chambre=options['sejours_par_chambre'],
+                paiements_par_sejour=options['paiements_par_sejour'],
+                reservations_futures=options['reservations_futures'],
+                fenetre_libre=options['fenetre_libre'],
+                graine=options['graine'],
+            )
+            if not User.objects.filter(username=options['identifiant']).exists():
+                User.objects.create_superuser(options['identifiant'], '', options['mot_de_passe'])
+
+        for nom, nombre in volumes.items():
+            self.stdout.write(f"{nom:<13}: {nombre}")
+        self.stdout.write(self.style.SUCCESS(f"Compte de test : {options['identifiant']}"))
@@ -0,0 +1,81 @@
+import csv
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.importation import IMPORTATEURS, TAILLE_LOT, creer_importateur, lire_lignes
+
+
+class Command(BaseCommand):
+    help = "Importe en masse des clients, chambres ou réservations depuis un fichier CSV ou JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('type', choices=list(IMPORTATEURS))
+        parser.add_argument('fichier')
+        parser.add_argument('--format', choices=['csv', 'json'], help="Déduit de l'extension par défaut")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT)
+        parser.add_argument(
+            '--depuis', type=int, default=0,
+            help="Reprendre après cette ligne (dernière ligne validée d'un import interrompu)"
+        )
+        parser.add_argument(
+            '--utilisateur', default=None,
+            help="Identifiant de l'utilisateur auteur des réservations importées"
+        )
+        parser.add_argument('--erreurs', help="Fichier CSV où écrire le rapport d'erreurs par ligne")
+
+    def handle(self, *args, **options):
+        chemin = Path(options['fichier'])
+        if not chemin.exists():
+            raise CommandError(f"Fichier introuvable : {chemin}")
+        format_fichier = options['format'] or ('json' if chemin.suffix.lower() == '.json' else 'csv')
+
+        utilisateur = None
+        if options['type'] == 'reservations':
+            utilisateur = self._utilisateur(options['utilisateur'])
+
+        importateur = creer_importateur(options['type'], utilisateur, options['taille_lot'])
+        with chemin.open(encoding='utf-8-sig', newline='') as fichier:
+            rapport = importateur.importer(
+                lire_lignes(fichier, format_fichier),
+                depuis=options['depuis'],
+                progression=self._progression,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{rapport.inserees} ligne(s) insérée(s), {rapport.ignorees} déjà présente(s), "
+            f"{len(rapport.erreurs)} erreur(s)."
+        ))
+        if rapport.interrompu:
+            self.stdout.write(self.style.ERROR(
+                f"Import interrompu sur un lot rejeté : relancez avec --depuis {rapport.derniere_ligne}"
+            ))
+        for numero, message in rapport.erreurs[:20]:
+            self.stdout.write(self.style.WARNING(f"  ligne {numero} : {message}"))
+        if len(rapport.erreurs) > 20:
+            self.stdout.write(f"  … {len(rapport.erreurs) - 20} autre(s) erreur(s)")
+
+        if options['erreurs'] and rapport.erreurs:
+            with open(options['erreurs'], 'w', encoding='utf-8', newline='') as sortie:
+                writer = csv.writer(sortie, delimiter=';')
+                writer.writerow(['ligne', 'erreur'])
+                writer.writerows(rapport.erreurs)
+            self.stdout.write(f"Rapport d'erreurs écrit dans {options['erreurs']}")
+
+    def _progression(self, rapport):
+        self.stdout.write(
+            f"Lignes ≤ {rapport.derniere_ligne} validées "
+            f"({rapport.inserees} insérées, {len(rapport.erreurs)} erreurs)"
+        )
+
+    def _utilisateur(self, identifiant):
+        if identifiant:
+            try:
+                return User.objects.get(username=identifiant)
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur inconnu : {identifiant}")
+        utilisateur = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if utilisateur is None:
+            raise CommandError("Aucun superutilisateur : précisez --utilisateur.")
+        return utilisateur
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from gestion.models import Paiement, Reservation
+from gestion.resume_journalier import recalculer_periode
+
+
+class Command(BaseCommand):
+    help = "Reconstruit le résumé journalier (StatistiqueJournaliere) à partir de l'historique"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', type=date.fromisoformat, help="Premier jour (AAAA-MM-JJ)")
+        parser.add_argument('--fin', type=date.fromisoformat, help="Dernier jour (AAAA-MM-JJ)")
+        parser.add_argument(
+            '--taille-lot', type=int, default=90,
+            help="Nombre de jours recalculés par transaction"
+        )
+
+    def handle(self, *args, **options):
+        debut = options['debut'] or self._premier_jour()
+        fin = options['fin'] or self._dernier_jour()
+        if debut is None:
+            self.stdout.write("Aucun historique à traiter.")
+            return
+        if fin < debut:
+            raise CommandError("La date de fin doit être postérieure à la date de début.")
+
+        taille_lot = timedelta(days=options['taille_lot'])
+        total = 0
+        lot_debut = debut
+        while lot_debut <= fin:
+            lot_fin = min(lot_debut + taille_lot - timedelta(days=1), fin)
+            with transaction.atomic():
+                total += recalculer_periode(lot_debut, lot_fin)
+            self.stdout.write(f"{lot_debut} → {lot_fin} : {total} jours traités")
+            lot_debut = lot_fin + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Résumé journalier reconstruit ({total} jours)."))
+
+    def _premier_jour(self):
+        reservations = Reservation.objects.aggregate(
+            sejour=Min('date_debut_sejour'), creation=Min('date_reservation')
+        )
+        paiement = Paiement.objects.aggregate(premier=Min('date_paiement'))['premier']
+        candidats = [reservations['sejour']]
+        for valeur in (reservations['creation'], paiement):
+            if valeur:
+                candidats.append(timezone.localdate(valeur))
+        candidats = [jour for jour in candidats if jour]
+        return min(candidats) if candidats else None
+
+    def _dernier_jour(self):
+        dernier_depart = Reservation.objects.aggregate(fin=Max('date_fin_sejour'))['fin']
+        aujourd_hui = date.today()
+        if dernier_depart:
+            return max(dernier_depart - timedelta(days=1), aujourd_hui)
+        return aujourd_hui
@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie la base principale vers la base des rapports (BASE_RAPPORTS) ; "
+        "à planifier à l'intervalle de fraîcheur voulu pour les rapports"
+    )
+
+    def handle(self, *args, **options):
+        cible = getattr(settings, 'BASE_RAPPORTS', '')
+        if not cible:
+            raise CommandError(
+                "BASE_RAPPORTS n'est pas défini : les rapports lisent déjà la base principale "
+                "en lecture seule."
+            )
+        if connection.vendor != 'sqlite':
+            raise CommandError("La copie n'est prise en charge que pour SQLite.")
+
+        # Copie cohérente par l'API de sauvegarde SQLite, puis remplacement
+        # atomique : les lecteurs en cours gardent l'ancienne copie
+        debut = time.perf_counter()
+        temporaire = f'{cible}.tmp'
+        connection.ensure_connection()
+        copie = sqlite3.connect(temporaire)
+        try:
+            connection.connection.backup(copie)
+        finally:
+            copie.close()
+        os.replace(temporaire, cible)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Base des rapports copiée vers {cible} en {time.perf_counter() - debut:.2f} s."
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Q
+
+from gestion.models import Sejour
+
+
+class Command(BaseCommand):
+    help = "Compare les soldes stockés des séjours avec un recalcul complet et signale les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corriger', action='store_true',
+            help="Réécrit les soldes en écart avec les valeurs recalculées"
+        )
+
+    def handle(self, *args, **options):
+        sejours = Sejour.objects.annotate(
+            du_calcule=Sejour.expression_montant_du(OuterRef('reservation_id')),
+            paye_calcule=Sejour.expression_montant_paye(OuterRef('pk')),
+        ).filter(
+            ~Q(montant_du=F('du_calcule')) | ~Q(montant_paye=F('paye_calcule'))
+        ).values_list('pk', 'montant_du', 'du_calcule', 'montant_paye', 'paye_calcule')
+
+        ecarts = list(sejours)
+        for pk, montant_du, du_calcule, montant_paye, paye_calcule in ecarts:
+            self.stdout.write(
+                f"Séjour #{pk} : dû {montant_du} (attendu {du_calcule}), "
+                f"payé {montant_paye} (attendu {paye_calcule})"
+            )
+
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS("Aucun écart détecté."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{len(ecarts)} séjour(s) en écart."))
+        if options['corriger']:
+            with transaction.atomic():
+                Sejour.objects.filter(pk__in=[ecart[0] for ecart in ecarts]).update(
+                    montant_du=Sejour.expression_montant_du(OuterRef('reservation_id')),
+                    montant_paye=Sejour.expression_montant_paye(OuterRef('pk')),
+                )
+            self.stdout.write(self.style.SUCCESS("Soldes corrigés."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0002_reservation_nombre_personnes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(unique=True)),
+                ('chambres_total', models.IntegerField(default=0)),
+                ('nuitees_occupees', models.IntegerField(default=0)),
+                ('revenu_hebergement', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenus_especes', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenus_carte', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenus_virement', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenus_mobile_money', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('reservations_creees', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'ordering': ['-jour'],
+            },
+        ),
+    ]
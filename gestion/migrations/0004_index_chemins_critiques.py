@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0003_statistiquejournaliere'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['date_inscription', 'id'], name='client_inscription_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['statut', 'date_paiement'], name='paiement_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['date_paiement', 'id'], name='paiement_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['chambre', 'statut', 'date_debut_sejour', 'date_fin_sejour'], name='reservation_dispo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['statut', 'date_debut_sejour'], name='reservation_arrivee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['statut', 'date_fin_sejour'], name='reservation_depart_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date_reservation', 'id'], name='reservation_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sejour',
+            index=models.Index(fields=['date_checkout'], name='sejour_checkout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sejour',
+            index=models.Index(condition=models.Q(('date_checkout__isnull', True)), fields=['date_checkin'], name='sejour_actif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sejour',
+            index=models.Index(fields=['date_checkin', 'id'], name='sejour_checkin_idx'),
+        ),
+    ]
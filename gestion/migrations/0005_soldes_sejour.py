@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:45
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def initialiser_soldes(apps, schema_editor):
+    """Remplit montant_du et montant_paye pour les séjours existants"""
+    Reservation = apps.get_model('gestion', 'Reservation')
+    ReservationService = apps.get_model('gestion', 'ReservationService')
+    Sejour = apps.get_model('gestion', 'Sejour')
+    Paiement = apps.get_model('gestion', 'Paiement')
+    montant = models.DecimalField(max_digits=12, decimal_places=2)
+
+    prix = Reservation.objects.filter(pk=OuterRef('reservation_id')).values('prix_total')
+    services = ReservationService.objects.filter(reservation=OuterRef('reservation_id')).values(
+        'reservation'
+    ).annotate(total=Sum(F('quantite') * F('prix_unitaire'))).values('total')
+    paiements = Paiement.objects.filter(sejour=OuterRef('pk'), statut='VALIDE').values(
+        'sejour'
+    ).annotate(total=Sum('montant')).values('total')
+
+    Sejour.objects.update(
+        montant_du=Subquery(prix, output_field=montant)
+        + Coalesce(Subquery(services, output_field=montant), Value(0), output_field=montant),
+        montant_paye=Coalesce(Subquery(paiements, output_field=montant), Value(0), output_field=montant),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0004_index_chemins_critiques'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sejour',
+            name='montant_du',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='sejour',
+            name='montant_paye',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(initialiser_soldes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_soldes_sejour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixe', models.CharField(max_length=10)),
+                ('jour', models.DateField()),
+                ('dernier_numero', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Séquence de référence',
+                'verbose_name_plural': 'Séquences de référence',
+                'unique_together': {('prefixe', 'jour')},
+            },
+        ),
+    ]
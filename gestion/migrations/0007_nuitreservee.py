@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:49
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reserver_nuits_existantes(apps, schema_editor):
+    """Crée les nuits des réservations actives ; un éventuel chevauchement historique garde la première"""
+    Reservation = apps.get_model('gestion', 'Reservation')
+    NuitReservee = apps.get_model('gestion', 'NuitReservee')
+
+    nuits = []
+    reservations = Reservation.objects.filter(statut__in=['EN_ATTENTE', 'CONFIRMEE']).order_by('pk')
+    for pk, chambre_id, debut, fin in reservations.values_list(
+        'pk', 'chambre_id', 'date_debut_sejour', 'date_fin_sejour'
+    ).iterator():
+        nuits.extend(
+            NuitReservee(chambre_id=chambre_id, reservation_id=pk, nuit=debut + timedelta(days=n))
+            for n in range((fin - debut).days)
+        )
+    NuitReservee.objects.bulk_create(nuits, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0006_sequencereference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NuitReservee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nuit', models.DateField()),
+                ('chambre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion.chambre')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nuits', to='gestion.reservation')),
+            ],
+            options={
+                'verbose_name': 'Nuit réservée',
+                'verbose_name_plural': 'Nuits réservées',
+                'constraints': [models.UniqueConstraint(fields=('chambre', 'nuit'), name='nuit_chambre_unique')],
+            },
+        ),
+        migrations.RunPython(reserver_nuits_existantes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:09
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copie figée du découpage de gestion.recherche au moment de la migration :
+# une évolution ultérieure du code ne doit pas changer ce remplissage initial
+LONGUEUR_MOT = 254
+_LETTRES = re.compile(r'[^\W_]+')
+
+
+def normaliser(texte):
+    texte = unicodedata.normalize('NFKD', texte or '')
+    return ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+
+
+def _mots(texte):
+    mots = set()
+    for bloc in normaliser(texte).split():
+        parties = _LETTRES.findall(bloc)
+        mots.update(parties)
+        if len(parties) > 1:
+            mots.add(''.join(parties))
+    return mots
+
+
+def mots_cles(nom, prenom, email, telephone):
+    mots = _mots(nom) | _mots(prenom)
+
+    email = normaliser(email).strip()
+    if email:
+        mots.add(email)
+        mots.update(_mots(email.split('@')[0].replace('.', ' ')))
+
+    chiffres = re.sub(r'\D', '', telephone or '')
+    if chiffres:
+        mots.add(chiffres)
+        mots.add(chiffres[-9:])
+
+    return {mot[:LONGUEUR_MOT] for mot in mots if mot}
+
+
+def indexer_clients_existants(apps, schema_editor):
+    """Construit les mots-clés de recherche des clients déjà en base"""
+    Client = apps.get_model('gestion', 'Client')
+    MotCleClient = apps.get_model('gestion', 'MotCleClient')
+
+    mots = []
+    for pk, nom, prenom, email, telephone in Client.objects.values_list(
+        'pk', 'nom', 'prenom', 'email', 'telephone'
+    ).iterator():
+        mots.extend(
+            MotCleClient(client_id=pk, mot=mot)
+            for mot in mots_cles(nom, prenom, email, telephone)
+        )
+        if len(mots) >= 5000:
+            MotCleClient.objects.bulk_create(mots)
+            mots = []
+    MotCleClient.objects.bulk_create(mots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0007_nuitreservee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MotCleClient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mot', models.CharField(max_length=254)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mots_cles', to='gestion.client')),
+            ],
+            options={
+                'verbose_name': 'Mot-clé client',
+                'verbose_name_plural': 'Mots-clés clients',
+                'indexes': [models.Index(fields=['mot', 'client'], name='motcle_mot_idx')],
+            },
+        ),
+        migrations.RunPython(indexer_clients_existants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:06
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_motcleclient'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanTarifaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100)),
+                ('type_chambre', models.CharField(blank=True, choices=[('SIMPLE', 'Simple'), ('DOUBLE', 'Double'), ('SUITE', 'Suite'), ('DELUXE', 'Deluxe')], help_text='Vide : tous les types de chambre', max_length=20)),
+                ('date_debut', models.DateField()),
+                ('date_fin', models.DateField(help_text='Dernière nuit incluse')),
+                ('coefficient', models.DecimalField(decimal_places=3, default=1, help_text='Multiplie le prix de base de la chambre (1,20 = +20 %)', max_digits=5, validators=[django.core.validators.MinValueValidator(0)])),
+                ('majoration_weekend', models.DecimalField(decimal_places=2, default=0, help_text='Pourcentage ajouté aux nuits du vendredi et du samedi', max_digits=5, validators=[django.core.validators.MinValueValidator(0)])),
+                ('priorite', models.IntegerField(default=0, help_text="En cas de chevauchement, la plus haute l'emporte")),
+                ('actif', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Plan tarifaire',
+                'verbose_name_plural': 'Plans tarifaires',
+                'ordering': ['-date_debut'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RemiseDuree',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_chambre', models.CharField(blank=True, choices=[('SIMPLE', 'Simple'), ('DOUBLE', 'Double'), ('SUITE', 'Suite'), ('DELUXE', 'Deluxe')], help_text='Vide : tous les types de chambre', max_length=20)),
+                ('nuits_minimum', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(2)])),
+                ('pourcentage', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+            ],
+            options={
+                'verbose_name': 'Remise de durée',
+                'verbose_name_plural': 'Remises de durée',
+                'ordering': ['nuits_minimum'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TarifJournalier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_chambre', models.CharField(choices=[('SIMPLE', 'Simple'), ('DOUBLE', 'Double'), ('SUITE', 'Suite'), ('DELUXE', 'Deluxe')], max_length=20)),
+                ('nuit', models.DateField()),
+                ('coefficient', models.DecimalField(decimal_places=4, max_digits=7)),
+            ],
+            options={
+                'verbose_name': 'Tarif journalier',
+                'verbose_name_plural': 'Tarifs journaliers',
+                'unique_together': {('type_chambre', 'nuit')},
+            },
+        ),
+    ]
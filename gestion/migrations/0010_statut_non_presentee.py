@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0009_tarifs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservation',
+            name='statut',
+            field=models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('CONFIRMEE', 'Confirmée'), ('ANNULEE', 'Annulée'), ('TERMINEE', 'Terminée'), ('NON_PRESENTEE', 'Non présentée')], default='EN_ATTENTE', max_length=20),
+        ),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone
 
 # Modèle Utilisateur étendu
@@ -48,15 +50,43 @@ class Client(models.Model):
         verbose_name = "Client"
         verbose_name_plural = "Clients"
         ordering = ['-date_inscription']
+        indexes = [
+            # Pagination par curseur de la liste des clients
+            models.Index(fields=['date_inscription', 'id'], name='client_inscription_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nom} {self.prenom}"
     
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Maintenir l'index de recherche (mots sans accents) à jour
+            from .recherche import indexer_clients
+            indexer_clients([self])
+    
     @property
     def nom_complet(self):
         return f"{self.prenom} {self.nom}"
 
 
+# Modèle Mot-clé Client (index de recherche par préfixe, sans accents)
+class MotCleClient(models.Model):
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='mots_cles')
+    mot = models.CharField(max_length=254)
+    
+    class Meta:
+        verbose_name = "Mot-clé client"
+        verbose_name_plural = "Mots-clés clients"
+        indexes = [
+            # Recherche par intervalle [préfixe, préfixe + \uffff[ puis client
+            models.Index(fields=['mot', 'client'], name='motcle_mot_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.mot} → client {self.client_id}"
+
+
 # Modèle Chambre
 class Chambre(models.Model):
     TYPE_CHAMBRE_CHOICES = [
@@ -90,14 +120,10 @@ class Chambre(models.Model):
     def __str__(self):
         return f"Chambre {self.numero_chambre} - {self.get_type_chambre_display()}"
     
-    def est_disponible(self, date_debut, date_fin):
+    def est_disponible(self, date_debut, date_fin, exclure_reservation=None):
         """Vérifie si la chambre est disponible pour une période donnée"""
-        reservations_conflictuelles = self.reservation_set.filter(
-            statut__in=['EN_ATTENTE', 'CONFIRMEE'],
-            date_debut_sejour__lt=date_fin,
-            date_fin_sejour__gt=date_debut
-        )
-        return not reservations_conflictuelles.exists() and self.statut == 'DISPONIBLE'
+        from .disponibilite import est_disponible
+        return est_disponible(self, date_debut, date_fin, exclure_reservation)
 
 
 # Modèle Service Supplémentaire
@@ -122,6 +148,7 @@ class Reservation(models.Model):
         ('CONFIRMEE', 'Confirmée'),
         ('ANNULEE', 'Annulée'),
         ('TERMINEE', 'Terminée'),
+        ('NON_PRESENTEE', 'Non présentée'),
     ]
     
     client = models.ForeignKey(Client, on_delete=models.PROTECT)
@@ -149,6 +176,18 @@ class Reservation(models.Model):
         verbose_name = "Réservation"
         verbose_name_plural = "Réservations"
         ordering = ['-date_reservation']
+        indexes = [
+            # Recherche de disponibilité
+            models.Index(
+                fields=['chambre', 'statut', 'date_debut_sejour', 'date_fin_sejour'],
+                name='reservation_dispo_idx'
+            ),
+            # Arrivées et départs du jour
+            models.Index(fields=['statut', 'date_debut_sejour'], name='reservation_arrivee_idx'),
+            models.Index(fields=['statut', 'date_fin_sejour'], name='reservation_depart_idx'),
+            # Pagination par curseur de la liste des réservations
+            models.Index(fields=['date_reservation', 'id'], name='reservation_creation_idx'),
+        ]
     
     def __str__(self):
         return f"Réservation #{self.id} - {self.client.nom_complet} - Chambre {self.chambre.numero_chambre}"
@@ -158,11 +197,18 @@ class Reservation(models.Model):
         if self.date_debut_sejour and self.date_fin_sejour:
             self.nombre_nuits = (self.date_fin_sejour - self.date_debut_sejour).days
         
-        # Calculer le prix total si non défini
+        # Calculer le prix total si non défini (saison, week-end, remise de durée)
         if not self.prix_total and self.chambre:
-            self.prix_total = self.chambre.prix_nuit * self.nombre_nuits
+            from .tarifs import prix_sejour
+            self.prix_total = prix_sejour(self.chambre, self.date_debut_sejour, self.date_fin_sejour)
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Occuper les nuits (contrainte unique chambre/nuit) ou les libérer selon le statut
+            from .disponibilite import synchroniser_nuits
+            synchroniser_nuits(self)
+            # Le prix total entre dans le montant dû du séjour éventuel
+            Sejour.actualiser_montant_du(self.pk)
     
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -174,7 +220,8 @@ class Reservation(models.Model):
         
         # Vérifier la disponibilité de la chambre
         if self.chambre and self.date_debut_sejour and self.date_fin_sejour:
-            if not self.chambre.est_disponible(self.date_debut_sejour, self.date_fin_sejour):
+            # La réservation elle-même ne doit pas compter comme conflit lors d'une modification
+            if not self.chambre.est_disponible(self.date_debut_sejour, self.date_fin_sejour, exclure_reservation=self.pk):
                 raise ValidationError("La chambre n'est pas disponible pour cette période.")
     
     @property
@@ -188,6 +235,24 @@ class Reservation(models.Model):
         return self.prix_total + self.montant_services
 
 
+# Modèle Nuit Réservée (une ligne par chambre et par nuit occupée)
+class NuitReservee(models.Model):
+    chambre = models.ForeignKey(Chambre, on_delete=models.CASCADE)
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='nuits')
+    nuit = models.DateField()
+    
+    class Meta:
+        verbose_name = "Nuit réservée"
+        verbose_name_plural = "Nuits réservées"
+        constraints = [
+            # Garantie en base contre la double réservation d'une chambre
+            models.UniqueConstraint(fields=['chambre', 'nuit'], name='nuit_chambre_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Chambre {self.chambre_id} - nuit du {self.nuit:%d/%m/%Y}"
+
+
 # Modèle Réservation-Service (Table d'association)
 class ReservationService(models.Model):
     reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE)
@@ -201,7 +266,7 @@ class ReservationService(models.Model):
         unique_together = ['reservation', 'service']
     
     def __str__(self):
-        return f"{self.service.nom_service} x{self.quantite} - Réservation #{self.reservation.id}"
+        return f"{self.service.nom_service} x{self.quantite} - Réservation #{self.reservation_id}"
     
     @property
     def montant_total(self):
@@ -211,7 +276,15 @@ class ReservationService(models.Model):
         # Utiliser le prix actuel du service si non défini
         if not self.prix_unitaire:
             self.prix_unitaire = self.service.prix
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Sejour.actualiser_montant_du(self.reservation_id)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultat = super().delete(*args, **kwargs)
+            Sejour.actualiser_montant_du(self.reservation_id)
+        return resultat
 
 
 # Modèle Séjour
@@ -225,31 +298,61 @@ class Sejour(models.Model):
     nombre_personnes = models.IntegerField()
     commentaire = models.TextField(blank=True, null=True)
     
+    # Soldes dénormalisés, tenus à jour par Reservation, ReservationService et Paiement
+    montant_du = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    montant_paye = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    
     class Meta:
         verbose_name = "Séjour"
         verbose_name_plural = "Séjours"
         ordering = ['-date_checkin']
+        indexes = [
+            models.Index(fields=['date_checkout'], name='sejour_checkout_idx'),
+            # Index partiel : uniquement les séjours en cours (ignoré si la base ne le supporte pas)
+            models.Index(
+                fields=['date_checkin'],
+                condition=models.Q(date_checkout__isnull=True),
+                name='sejour_actif_idx'
+            ),
+            # Pagination par curseur de la liste des séjours
+            models.Index(fields=['date_checkin', 'id'], name='sejour_checkin_idx'),
+        ]
     
     def __str__(self):
         return f"Séjour #{self.id} - {self.reservation.client.nom_complet}"
     
     def save(self, *args, **kwargs):
-        # Mettre à jour le statut de la réservation et de la chambre
-        if not self.pk:  # Nouveau séjour
-            self.reservation.statut = 'CONFIRMEE'
-            self.reservation.chambre.statut = 'OCCUPEE'
-            self.reservation.save()
-            self.reservation.chambre.save()
+        with transaction.atomic():
+            # Mettre à jour le statut de la réservation et de la chambre
+            if not self.pk:  # Nouveau séjour
+                self._changer_statuts('CONFIRMEE', 'OCCUPEE')
+                self.montant_du = self.reservation.montant_total_avec_services
+            
+            # Si checkout, libérer la chambre
+            if self.date_checkout and self.reservation.statut != 'TERMINEE':
+                if not self.date_depart_effective:
+                    self.date_depart_effective = timezone.now()
+                self._changer_statuts('TERMINEE', 'DISPONIBLE')
+            
+            super().save(*args, **kwargs)
+    
+    def _changer_statuts(self, statut_reservation, statut_chambre):
+        """Met à jour réservation et chambre par deux UPDATE ciblés (sans relire les lignes)"""
+        from .catalogue import invalider_catalogue
+        from .disponibilite import STATUTS_BLOQUANTS
+        reservation = self.reservation
+        Reservation.objects.filter(pk=reservation.pk).update(statut=statut_reservation)
+        Chambre.objects.filter(pk=reservation.chambre_id).update(statut=statut_chambre)
+        invalider_catalogue()
         
-        # Si checkout, libérer la chambre
-        if self.date_checkout and not self.date_depart_effective:
-            self.date_depart_effective = timezone.now()
-            self.reservation.chambre.statut = 'DISPONIBLE'
-            self.reservation.statut = 'TERMINEE'
-            self.reservation.chambre.save()
-            self.reservation.save()
+        # Une réservation terminée ne bloque plus ses nuits restantes
+        if statut_reservation not in STATUTS_BLOQUANTS:
+            NuitReservee.objects.filter(reservation_id=reservation.pk).delete()
         
-        super().save(*args, **kwargs)
+        # Garder les instances en mémoire cohérentes
+        reservation.statut = statut_reservation
+        if Reservation.chambre.is_cached(reservation):
+            reservation.chambre.statut = statut_chambre
     
     @property
     def est_termine(self):
@@ -257,13 +360,49 @@ class Sejour(models.Model):
     
     @property
     def montant_total_paye(self):
-        """Calcule le montant total payé pour ce séjour"""
-        return sum(p.montant for p in self.paiement_set.filter(statut='VALIDE'))
+        """Montant total payé pour ce séjour (valeur stockée)"""
+        return self.montant_paye
     
     @property
     def solde_restant(self):
-        """Calcule le solde restant à payer"""
-        return self.reservation.montant_total_avec_services - self.montant_total_paye
+        """Solde restant à payer (valeur stockée)"""
+        return self.montant_du - self.montant_paye
+    
+    @staticmethod
+    def expression_montant_du(reservation_ref):
+        """Expression SQL du montant dû : prix de la réservation + services"""
+        prix = Reservation.objects.filter(pk=reservation_ref).values('prix_total')
+        services = ReservationService.objects.filter(reservation=reservation_ref).values(
+            'reservation'
+        ).annotate(total=Sum(F('quantite') * F('prix_unitaire'))).values('total')
+        montant = DecimalField(max_digits=12, decimal_places=2)
+        return (
+            Subquery(prix, output_field=montant)
+            + Coalesce(Subquery(services, output_field=montant), Value(0), output_field=montant)
+        )
+    
+    @staticmethod
+    def expression_montant_paye(sejour_ref):
+        """Expression SQL du montant payé : somme des paiements validés"""
+        paiements = Paiement.objects.filter(sejour=sejour_ref, statut='VALIDE').values(
+            'sejour'
+        ).annotate(total=Sum('montant')).values('total')
+        montant = DecimalField(max_digits=12, decimal_places=2)
+        return Coalesce(Subquery(paiements, output_field=montant), Value(0), output_field=montant)
+    
+    @classmethod
+    def actualiser_montant_du(cls, reservation_id):
+        """Recalcule le montant dû en une seule requête UPDATE"""
+        cls.objects.filter(reservation_id=reservation_id).update(
+            montant_du=cls.expression_montant_du(OuterRef('reservation_id'))
+        )
+    
+    @classmethod
+    def actualiser_montant_paye(cls, sejour_id):
+        """Recalcule le montant payé en une seule requête UPDATE"""
+        cls.objects.filter(pk=sejour_id).update(
+            montant_paye=cls.expression_montant_paye(OuterRef('pk'))
+        )
 
 
 # Modèle Paiement
@@ -293,6 +432,12 @@ class Paiement(models.Model):
         verbose_name = "Paiement"
         verbose_name_plural = "Paiements"
         ordering = ['-date_paiement']
+        indexes = [
+            # Revenus par période
+            models.Index(fields=['statut', 'date_paiement'], name='paiement_statut_date_idx'),
+            # Pagination par curseur de la liste des paiements
+            models.Index(fields=['date_paiement', 'id'], name='paiement_date_idx'),
+        ]
     
     def __str__(self):
         return f"Paiement #{self.id} - {self.montant} GNF - {self.get_mode_paiement_display()}"
@@ -309,7 +454,140 @@ class Paiement(models.Model):
     def save(self, *args, **kwargs):
         # Générer une référence de transaction si non fournie
         if not self.reference_transaction:
-            import uuid
-            self.reference_transaction = f"PAY-{uuid.uuid4().hex[:10].upper()}"
+            from .references import allouer_reference
+            self.reference_transaction = allouer_reference()
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Sejour.actualiser_montant_paye(self.sejour_id)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultat = super().delete(*args, **kwargs)
+            Sejour.actualiser_montant_paye(self.sejour_id)
+        return resultat
+
+
+# Modèle Statistique Journalière (résumé matérialisé pour les rapports)
+class StatistiqueJournaliere(models.Model):
+    jour = models.DateField(unique=True)
+    chambres_total = models.IntegerField(default=0)
+    nuitees_occupees = models.IntegerField(default=0)
+    revenu_hebergement = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenus_especes = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenus_carte = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenus_virement = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenus_mobile_money = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reservations_creees = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Statistique journalière"
+        verbose_name_plural = "Statistiques journalières"
+        ordering = ['-jour']
+    
+    def __str__(self):
+        return f"Statistiques du {self.jour:%d/%m/%Y}"
+    
+    @property
+    def revenus_total(self):
+        return self.revenus_especes + self.revenus_carte + self.revenus_virement + self.revenus_mobile_money
+    
+    @property
+    def taux_occupation(self):
+        """Pourcentage de chambres occupées pour la nuit"""
+        return self.nuitees_occupees / self.chambres_total * 100 if self.chambres_total else 0
+    
+    @property
+    def adr(self):
+        """Prix moyen par nuitée vendue (Average Daily Rate)"""
+        return self.revenu_hebergement / self.nuitees_occupees if self.nuitees_occupees else 0
+    
+    @property
+    def revpar(self):
+        """Revenu d'hébergement par chambre disponible (RevPAR)"""
+        return self.revenu_hebergement / self.chambres_total if self.chambres_total else 0
+
+
+# Modèle Séquence de Référence (compteur journalier par préfixe)
+class SequenceReference(models.Model):
+    prefixe = models.CharField(max_length=10)
+    jour = models.DateField()
+    dernier_numero = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Séquence de référence"
+        verbose_name_plural = "Séquences de référence"
+        unique_together = ['prefixe', 'jour']
+    
+    def __str__(self):
+        return f"{self.prefixe}-{self.jour:%Y%m%d} : {self.dernier_numero}"
+
+
+# Modèle Plan Tarifaire (saison et majoration du week-end par type de chambre)
+class PlanTarifaire(models.Model):
+    nom = models.CharField(max_length=100)
+    type_chambre = models.CharField(
+        max_length=20, choices=Chambre.TYPE_CHAMBRE_CHOICES, blank=True,
+        help_text="Vide : tous les types de chambre"
+    )
+    date_debut = models.DateField()
+    date_fin = models.DateField(help_text="Dernière nuit incluse")
+    coefficient = models.DecimalField(
+        max_digits=5, decimal_places=3, default=1, validators=[MinValueValidator(0)],
+        help_text="Multiplie le prix de base de la chambre (1,20 = +20 %)"
+    )
+    majoration_weekend = models.DecimalField(
+        max_digits=5, decimal_places=2, default=0, validators=[MinValueValidator(0)],
+        help_text="Pourcentage ajouté aux nuits du vendredi et du samedi"
+    )
+    priorite = models.IntegerField(default=0, help_text="En cas de chevauchement, la plus haute l'emporte")
+    actif = models.BooleanField(default=True)
+    
+    class Meta:
+        verbose_name = "Plan tarifaire"
+        verbose_name_plural = "Plans tarifaires"
+        ordering = ['-date_debut']
+    
+    def __str__(self):
+        return f"{self.nom} ({self.date_debut:%d/%m/%Y} - {self.date_fin:%d/%m/%Y})"
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        if self.date_debut and self.date_fin and self.date_fin < self.date_debut:
+            raise ValidationError("La date de fin doit être postérieure à la date de début.")
+
+
+# Modèle Remise de Durée (séjours longs)
+class RemiseDuree(models.Model):
+    type_chambre = models.CharField(
+        max_length=20, choices=Chambre.TYPE_CHAMBRE_CHOICES, blank=True,
+        help_text="Vide : tous les types de chambre"
+    )
+    nuits_minimum = models.PositiveIntegerField(validators=[MinValueValidator(2)])
+    pourcentage = models.DecimalField(
+        max_digits=5, decimal_places=2, validators=[MinValueValidator(0), MaxValueValidator(100)]
+    )
+    
+    class Meta:
+        verbose_name = "Remise de durée"
+        verbose_name_plural = "Remises de durée"
+        ordering = ['nuits_minimum']
+    
+    def __str__(self):
+        return f"-{self.pourcentage} % dès {self.nuits_minimum} nuits"
+
+
+# Modèle Tarif Journalier (calendrier précalculé des plans tarifaires)
+class TarifJournalier(models.Model):
+    type_chambre = models.CharField(max_length=20, choices=Chambre.TYPE_CHAMBRE_CHOICES)
+    nuit = models.DateField()
+    coefficient = models.DecimalField(max_digits=7, decimal_places=4)
+    
+    class Meta:
+        verbose_name = "Tarif journalier"
+        verbose_name_plural = "Tarifs journaliers"
+        unique_together = ['type_chambre', 'nuit']
+    
+    def __str__(self):
+        return f"{self.get_type_chambre_display()} - nuit du {self.nuit:%d/%m/%Y} : x{self.coefficient}"
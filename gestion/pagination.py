@@ -0,0 +1,119 @@
+"""
+Pagination par curseur (keyset / seek) pour les listes.
+
+Au lieu d'un OFFSET qui oblige la base à parcourir toutes les lignes
+précédentes, chaque page repart de la dernière ligne affichée :
+WHERE (champ, id) < (valeur, id) ORDER BY champ DESC, id DESC LIMIT n.
+Une page profonde coûte donc autant que la première.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+TAILLE_PAGE = 50
+
+
+def encoder_curseur(valeur, pk):
+    """Encode (valeur, id) en jeton opaque utilisable dans une URL"""
+    # isoformat() garde les microsecondes, indispensables à la comparaison exacte
+    if hasattr(valeur, 'isoformat'):
+        valeur = valeur.isoformat()
+    brut = json.dumps([valeur, pk])
+    return base64.urlsafe_b64encode(brut.encode()).decode().rstrip('=')
+
+
+def decoder_curseur(jeton, champ=None):
+    """
+    Décode un jeton ; retourne None s'il est invalide.
+
+    champ (champ de modèle) convertit la valeur : un jeton bien formé
+    portant une date impossible est rejeté ici plutôt qu'au filtrage.
+    """
+    try:
+        brut = base64.urlsafe_b64decode(jeton + '=' * (-len(jeton) % 4))
+        valeur, pk = json.loads(brut)
+        # Identifiant entier dans la plage des entiers 64 bits de la base
+        if isinstance(pk, bool) or not isinstance(pk, int) or not 0 < pk < 2 ** 63:
+            return None
+        if champ is not None:
+            valeur = champ.to_python(valeur)
+        return valeur, pk
+    except (ValueError, TypeError, OverflowError, ValidationError):
+        return None
+
+
+def _au_dela(champ, valeur, pk, vers_le_bas):
+    """Condition « strictement après (valeur, id) » dans le sens de parcours"""
+    operateur = 'lt' if vers_le_bas else 'gt'
+    return Q(**{f'{champ}__{operateur}': valeur}) | Q(**{champ: valeur, f'id__{operateur}': pk})
+
+
+class PageCurseur:
+    """Page de résultats avec liens vers la page suivante et précédente"""
+
+    def __init__(self, objets, queryset, champ, parametres, a_suivant, a_precedent):
+        self.objets = objets
+        self._queryset = queryset
+        self._champ = champ
+        self._parametres = parametres
+        self.a_suivant = a_suivant and bool(objets)
+        self.a_precedent = a_precedent and bool(objets)
+
+    def __iter__(self):
+        return iter(self.objets)
+
+    def __len__(self):
+        return len(self.objets)
+
+    def __bool__(self):
+        return bool(self.objets)
+
+    @cached_property
+    def count(self):
+        """Nombre total de lignes correspondant aux filtres"""
+        return self._queryset.count()
+
+    def _url(self, cle, objet):
+        parametres = self._parametres.copy()
+        parametres[cle] = encoder_curseur(getattr(objet, self._champ), objet.pk)
+        return f'?{parametres.urlencode()}'
+
+    @property
+    def url_suivante(self):
+        return self._url('apres', self.objets[-1]) if self.a_suivant else None
+
+    @property
+    def url_precedente(self):
+        return self._url('avant', self.objets[0]) if self.a_precedent else None
+
+
+def paginer(request, queryset, champ, taille=TAILLE_PAGE, decroissant=True):
+    """Retourne la page demandée par ?apres= / ?avant= en conservant les autres paramètres"""
+    parametres = request.GET.copy()
+    champ_modele = queryset.model._meta.get_field(champ)
+    apres = decoder_curseur(parametres.pop('apres', [''])[-1], champ_modele)
+    avant = decoder_curseur(parametres.pop('avant', [''])[-1], champ_modele)
+
+    ordre = [f'-{champ}', '-id'] if decroissant else [champ, 'id']
+    ordre_inverse = [champ, 'id'] if decroissant else [f'-{champ}', '-id']
+
+    if avant:
+        # Page précédente : on remonte dans l'autre sens puis on remet dans l'ordre
+        lignes = list(
+            queryset.filter(_au_dela(champ, *avant, not decroissant))
+            .order_by(*ordre_inverse)[:taille + 1]
+        )
+        objets = lignes[:taille][::-1]
+        return PageCurseur(objets, queryset, champ, parametres,
+                           a_suivant=True, a_precedent=len(lignes) > taille)
+
+    page = queryset
+    if apres:
+        page = page.filter(_au_dela(champ, *apres, decroissant))
+    lignes = list(page.order_by(*ordre)[:taille + 1])
+    return PageCurseur(lignes[:taille], queryset, champ, parametres,
+                       a_suivant=len(lignes) > taille, a_precedent=apres is not None)
@@ -0,0 +1,89 @@
+"""
+Calcul simultané des agrégats indépendants des vues asynchrones.
+
+Les méthodes asynchrones de l'ORM (acount, aaggregate...) passent toutes par
+le même thread et restent donc séquentielles. Ici chaque agrégat s'exécute
+dans un pool de threads borné (AGREGATS_PARALLELES), sur sa propre
+connexion : SQLite relâche le GIL pendant la requête, les lectures avancent
+en même temps et la page attend la plus lente plutôt que leur somme.
+
+Chaque thread du pool garde sa connexion d'un agrégat à l'autre (au plus
+AGREGATS_PARALLELES connexions de plus) : rouvrir un fichier SQLite et
+relire son schéma coûte plus cher que les petites requêtes des rapports.
+
+Le routage de gestion.routage est conservé : chaque tâche reçoit une copie
+du contexte courant.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+
+AGREGATS_PARALLELES = 4
+
+_executeur = None
+_verrou = threading.Lock()
+
+
+def taille_pool():
+    return getattr(settings, 'AGREGATS_PARALLELES', AGREGATS_PARALLELES)
+
+
+def _pool():
+    """Pool partagé, créé au premier usage"""
+    global _executeur
+    with _verrou:
+        if _executeur is None:
+            _executeur = ThreadPoolExecutor(max_workers=taille_pool(), thread_name_prefix='agregats')
+    return _executeur
+
+
+def arreter_pool():
+    """Arrête le pool ; ses threads et leurs connexions disparaissent avec lui"""
+    global _executeur
+    with _verrou:
+        if _executeur is not None:
+            _executeur.shutdown(wait=True)
+            _executeur = None
+
+
+def _proteger(fonction):
+    """Ferme la connexion du thread après une erreur : elle peut être inutilisable"""
+    def executer():
+        try:
+            return fonction()
+        except Exception:
+            connections.close_all()
+            raise
+    return executer
+
+
+def _transaction_en_cours():
+    return connection.in_atomic_block
+
+
+def _sequentiel(agregats):
+    return {nom: fonction() for nom, fonction in agregats.items()}
+
+
+async def calculer_en_parallele(agregats):
+    """
+    Évalue simultanément un dictionnaire {nom: fonction sans argument}.
+
+    Dans une transaction (tests, ATOMIC_REQUESTS) les autres connexions ne
+    verraient pas ses écritures : les agrégats sont alors lus à la suite
+    sur la connexion de la requête, comme avec AGREGATS_PARALLELES = 1.
+    """
+    if taille_pool() <= 1 or await sync_to_async(_transaction_en_cours)():
+        return await sync_to_async(_sequentiel)(agregats)
+
+    executeur = _pool()
+    resultats = await asyncio.gather(*(
+        sync_to_async(_proteger(fonction), thread_sensitive=False, executor=executeur)()
+        for fonction in agregats.values()
+    ))
+    return dict(zip(agregats, resultats))
@@ -0,0 +1,153 @@
+"""
+Planning des chambres (rack) : chambres en lignes, nuits en colonnes.
+
+Deux requêtes quelle que soit la taille de la grille : les chambres, puis
+les réservations actives qui touchent la fenêtre. Chaque ligne est un
+bytearray d'un code par nuit ; une réservation s'y inscrit par une seule
+affectation de tranche (remplissage exécuté en C), sans boucle par cellule
+ni requête par case comme Chambre.est_disponible().
+
+Codes d'une nuit :
+    L  libre
+    O  occupée
+    A  arrivée (première nuit d'une réservation)
+    D  départ le matin, nuit libre
+    R  rotation : départ puis arrivée le même jour
+    H  hors service (chambre en maintenance ou hors service, dès aujourd'hui)
+"""
+
+import re
+from collections import defaultdict
+from datetime import date, timedelta
+from html import escape
+
+from django.utils.safestring import mark_safe
+
+from .disponibilite import reservations_conflictuelles
+from .models import Chambre
+
+NUITS_DEFAUT = 30
+NUITS_MAX = 90
+
+LIBRE, OCCUPEE, ARRIVEE, DEPART, ROTATION, HORS_SERVICE = b'LOADRH'
+
+LEGENDE = {
+    'L': 'Libre',
+    'O': 'Occupée',
+    'A': 'Arrivée',
+    'D': 'Départ',
+    'R': 'Départ et arrivée',
+    'H': 'Hors service',
+}
+
+STATUTS_HORS_SERVICE = ['MAINTENANCE', 'HORS_SERVICE']
+
+# Plages de nuits consécutives de même code
+_PLAGES = re.compile(rb'(.)\1*')
+
+
+class Planning:
+    """Occupation de chaque chambre sur nuits nuits à partir de date_debut"""
+
+    def __init__(self, date_debut, nuits=NUITS_DEFAUT, chambres=None):
+        self.date_debut = date_debut
+        self.nuits = nuits
+        self.date_fin = date_debut + timedelta(days=nuits)
+        self.chambres = list((Chambre.objects.all() if chambres is None else chambres).order_by(
+            'numero_chambre'
+        ).values('id', 'numero_chambre', 'type_chambre', 'etage', 'statut'))
+        self.codes = {chambre['id']: bytearray(b'L') * nuits for chambre in self.chambres}
+
+        # La veille est incluse pour marquer les départs du premier jour
+        reservations = reservations_conflictuelles(date_debut - timedelta(days=1), self.date_fin)
+        if chambres is not None:
+            reservations = reservations.filter(chambre__in=chambres)
+        self.reservations = list(reservations.values(
+            'id', 'chambre_id', 'date_debut_sejour', 'date_fin_sejour', 'statut',
+            'client__nom', 'client__prenom',
+        ))
+        self._remplir()
+
+    def _indice(self, jour):
+        return (jour - self.date_debut).days
+
+    def _remplir(self):
+        # Nuits occupées et arrivées d'abord : un départ ne doit pas masquer
+        # l'arrivée suivante dans la même chambre
+        for reservation in self.reservations:
+            ligne = self.codes[reservation['chambre_id']]
+            debut = max(self._indice(reservation['date_debut_sejour']), 0)
+            fin = min(self._indice(reservation['date_fin_sejour']), self.nuits)
+            if fin > debut:
+                ligne[debut:fin] = b'O' * (fin - debut)
+                if reservation['date_debut_sejour'] >= self.date_debut:
+                    ligne[debut] = ARRIVEE
+
+        for reservation in self.reservations:
+            ligne = self.codes[reservation['chambre_id']]
+            depart = self._indice(reservation['date_fin_sejour'])
+            if 0 <= depart < self.nuits:
+                if ligne[depart] == LIBRE:
+                    ligne[depart] = DEPART
+                elif ligne[depart] == ARRIVEE:
+                    ligne[depart] = ROTATION
+
+        # Le statut de la chambre ne vaut qu'à partir d'aujourd'hui
+        aujourd_hui = max(self._indice(date.today()), 0)
+        for chambre in self.chambres:
+            if chambre['statut'] in STATUTS_HORS_SERVICE:
+                ligne = self.codes[chambre['id']]
+                ligne[aujourd_hui:] = ligne[aujourd_hui:].replace(b'L', b'H')
+
+    def jours(self):
+        return [self.date_debut + timedelta(days=decalage) for decalage in range(self.nuits)]
+
+    def lignes(self):
+        """Une ligne par chambre, avec ses cellules HTML déjà assemblées"""
+        # Nom du client en info-bulle sur les cellules d'arrivée
+        titres = defaultdict(dict)
+        for reservation in self.reservations:
+            indice = self._indice(reservation['date_debut_sejour'])
+            if 0 <= indice < self.nuits:
+                titres[reservation['chambre_id']][indice] = escape(
+                    f"{reservation['client__prenom']} {reservation['client__nom']}"
+                )
+
+        for chambre in self.chambres:
+            ligne = self.codes[chambre['id']]
+            cellules = []
+            # Une cellule par plage de nuits identiques (colspan), sauf les arrivées
+            for plage in _PLAGES.finditer(ligne):
+                code = ligne[plage.start()]
+                classe = chr(code).lower()
+                if code in (ARRIVEE, ROTATION):
+                    for indice in range(plage.start(), plage.end()):
+                        titre = titres[chambre['id']].get(indice, '')
+                        cellules.append(f'<td class="rack-{classe}" title="{titre}"></td>')
+                elif plage.end() - plage.start() == 1:
+                    cellules.append(f'<td class="rack-{classe}"></td>')
+                else:
+                    cellules.append(f'<td class="rack-{classe}" colspan="{plage.end() - plage.start()}"></td>')
+            yield {**chambre, 'cellules': mark_safe(''.join(cellules))}
+
+    def en_json(self):
+        return {
+            'date_debut': self.date_debut.isoformat(),
+            'nuits': self.nuits,
+            'legende': LEGENDE,
+            'chambres': [
+                {**chambre, 'nuits': self.codes[chambre['id']].decode()}
+                for chambre in self.chambres
+            ],
+            'reservations': [
+                {
+                    'id': reservation['id'],
+                    'chambre_id': reservation['chambre_id'],
+                    'date_debut_sejour': reservation['date_debut_sejour'].isoformat(),
+                    'date_fin_sejour': reservation['date_fin_sejour'].isoformat(),
+                    'statut': reservation['statut'],
+                    'client': f"{reservation['client__prenom']} {reservation['client__nom']}",
+                }
+                for reservation in self.reservations
+            ],
+        }
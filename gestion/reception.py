@@ -0,0 +1,159 @@
+"""
+Opérations de réception : check-in, check-out et annulation.
+
+Chaque opération s'exécute dans une transaction courte qui verrouille
+d'abord la réservation puis la chambre (toujours dans cet ordre pour éviter
+les interblocages), revérifie l'état sous verrou, puis applique les
+changements de statut par des UPDATE ciblés. Deux réceptionnistes ne
+peuvent donc ni installer deux clients dans la même chambre, ni annuler une
+réservation pendant son check-in.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .catalogue import invalider_catalogue
+from .disponibilite import liberer_nuits
+from .models import Chambre, Paiement, Reservation, Sejour
+from .resume_journalier import recalculer_paiement, recalculer_reservation
+from .sqlite import reprise_sur_verrou
+from .statistiques import invalider_statistiques
+
+
+class OperationImpossible(Exception):
+    """L'état de la réservation ou de la chambre interdit l'opération demandée"""
+
+
+def _verrouiller(reservation_id):
+    """Verrouille la réservation puis sa chambre et les retourne"""
+    reservation = Reservation.objects.select_for_update().get(pk=reservation_id)
+    chambre = Chambre.objects.select_for_update().get(pk=reservation.chambre_id)
+    reservation.chambre = chambre
+    return reservation, chambre
+
+
+@reprise_sur_verrou
+def effectuer_checkin(reservation_id, date_arrivee_effective, nombre_personnes, commentaire=''):
+    """Crée le séjour et marque la chambre occupée ; retourne le séjour"""
+    with transaction.atomic():
+        reservation, chambre = _verrouiller(reservation_id)
+        
+        if reservation.statut != 'CONFIRMEE':
+            raise OperationImpossible('Seules les réservations confirmées peuvent faire un check-in.')
+        
+        if Sejour.objects.filter(reservation_id=reservation.pk).exists():
+            raise OperationImpossible('Cette réservation a déjà fait son check-in.')
+        
+        if chambre.statut != 'DISPONIBLE':
+            raise OperationImpossible(
+                f'La chambre {chambre.numero_chambre} n\'est pas disponible ({chambre.get_statut_display()}).'
+            )
+        
+        sejour = Sejour(
+            reservation=reservation,
+            date_arrivee_effective=date_arrivee_effective,
+            nombre_personnes=nombre_personnes,
+            commentaire=commentaire,
+        )
+        sejour.save()
+    return sejour
+
+
+@reprise_sur_verrou
+def effectuer_checkout(sejour_id, date_depart_effective, commentaire=''):
+    """Clôture le séjour si le solde est réglé et libère la chambre ; retourne le séjour"""
+    reservation_id = Sejour.objects.values_list('reservation_id', flat=True).get(pk=sejour_id)
+    
+    with transaction.atomic():
+        reservation, chambre = _verrouiller(reservation_id)
+        sejour = Sejour.objects.select_for_update().get(pk=sejour_id)
+        sejour.reservation = reservation
+        
+        if sejour.date_checkout:
+            raise OperationImpossible('Ce séjour a déjà fait son check-out.')
+        
+        solde_restant = sejour.solde_restant
+        if solde_restant > 0:
+            raise OperationImpossible(f'Impossible de faire le check-out. Solde restant : {solde_restant} GNF')
+        
+        sejour.date_depart_effective = date_depart_effective or timezone.now()
+        sejour.date_checkout = timezone.now()
+        if commentaire:
+            sejour.commentaire = f"{sejour.commentaire}\n{commentaire}" if sejour.commentaire else commentaire
+        sejour.save()
+    return sejour
+
+
+@reprise_sur_verrou
+def annuler_reservation(reservation_id, commentaire_annulation):
+    """
+    Annule la réservation et retourne un dictionnaire décrivant les effets
+    (paiements remboursés, séjour supprimé ou clôturé, chambre libérée).
+    """
+    effets = {
+        'paiements_rembourses': [],
+        'sejour_supprime': False,
+        'sejour_cloture': False,
+        'chambre_liberee': False,
+    }
+    
+    with transaction.atomic():
+        reservation, chambre = _verrouiller(reservation_id)
+        
+        if reservation.statut == 'ANNULEE':
+            raise OperationImpossible('Cette réservation est déjà annulée.')
+        if reservation.statut == 'TERMINEE':
+            raise OperationImpossible('Impossible d\'annuler une réservation terminée.')
+        
+        sejour = Sejour.objects.select_for_update().filter(reservation_id=reservation.pk).first()
+        sejour_en_cours = sejour is not None and sejour.date_checkout is None
+        
+        if sejour is not None:
+            paiements = Paiement.objects.filter(sejour=sejour)
+            effets['paiements_rembourses'] = list(paiements.exclude(statut='REMBOURSE'))
+            
+            if effets['paiements_rembourses']:
+                # Les paiements sont conservés (traçabilité) : le séjour est clôturé
+                paiements.update(statut='REMBOURSE')
+                Sejour.objects.filter(pk=sejour.pk).update(
+                    date_checkout=timezone.now(),
+                    date_depart_effective=timezone.now(),
+                    montant_paye=0,
+                )
+                effets['sejour_cloture'] = True
+            elif paiements.exists():
+                Sejour.objects.filter(pk=sejour.pk).update(date_checkout=timezone.now())
+                effets['sejour_cloture'] = True
+            else:
+                sejour.delete()
+                effets['sejour_supprime'] = True
+        
+        # Annuler la réservation
+        if reservation.commentaire:
+            reservation.commentaire += f"\n\n{commentaire_annulation}"
+        else:
+            reservation.commentaire = commentaire_annulation
+        reservation.statut = 'ANNULEE'
+        Reservation.objects.filter(pk=reservation.pk).update(
+            statut=reservation.statut, commentaire=reservation.commentaire
+        )
+        liberer_nuits(reservation.pk)
+        
+        # Libérer la chambre seulement si ce séjour l'occupait
+        if sejour_en_cours and chambre.statut == 'OCCUPEE':
+            Chambre.objects.filter(pk=chambre.pk).update(statut='DISPONIBLE')
+            invalider_catalogue()
+            chambre.statut = 'DISPONIBLE'
+            effets['chambre_liberee'] = True
+        
+        # Statistiques dérivées recalculées après validation, une fois les verrous relâchés
+        transaction.on_commit(lambda: _actualiser_statistiques(reservation, effets['paiements_rembourses']))
+    
+    return effets
+
+
+def _actualiser_statistiques(reservation, paiements):
+    invalider_statistiques()
+    recalculer_reservation(reservation)
+    for paiement in paiements:
+        recalculer_paiement(paiement)
@@ -0,0 +1,171 @@
+"""
+Recherche de clients insensible aux accents et à la casse.
+
+Chaque client est découpé en mots normalisés (nom, prénom, email,
+téléphone) rangés dans MotCleClient sous l'index (mot, client). Le terme
+saisi est découpé de la même façon et chacun de ses mots doit être le
+préfixe d'un mot du client : « diallo », « DIALLO » et « Diallo » trouvent
+les mêmes clients, « sene » trouve « Séné ».
+
+Les préfixes sont cherchés par intervalle [p, p + U+FFFF[ : la requête
+reste sur l'index quelle que soit la base, au lieu d'un LIKE '%x%' sur
+quatre colonnes qui parcourt toute la table.
+
+Seuls les débuts de mots sont trouvés : « allo » ne trouve plus « Diallo ».
+Exception pour les adresses : une saisie contenant « @ » ou un domaine
+(« exemple.gn ») cherche aussi n'importe où dans l'email (LIKE sur la
+seule colonne email), comme l'ancienne recherche.
+"""
+
+import re
+import unicodedata
+
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Client, MotCleClient
+
+BORNE = '\uffff'
+LIMITE_SUGGESTIONS = 10
+LONGUEUR_MOT = 254
+
+_LETTRES = re.compile(r'[^\W_]+')
+_TELEPHONE = re.compile(r'[\d\s+().-]+')
+_DOMAINE = re.compile(r'[\w.-]*\w\.\w{2,}')
+
+
+def normaliser(texte):
+    """Minuscules sans accents : « Séné » → « sene »"""
+    texte = unicodedata.normalize('NFKD', texte or '')
+    return ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+
+
+def _mots(texte):
+    """Mots d'un texte ; les noms composés (N'Diaye, Barry-Diallo) sont aussi indexés accolés"""
+    mots = set()
+    for bloc in normaliser(texte).split():
+        parties = _LETTRES.findall(bloc)
+        mots.update(parties)
+        if len(parties) > 1:
+            mots.add(''.join(parties))
+    return mots
+
+
+def mots_cles(nom, prenom, email, telephone):
+    """Mots indexés pour un client"""
+    mots = _mots(nom) | _mots(prenom)
+
+    email = normaliser(email).strip()
+    if email:
+        mots.add(email)
+        mots.update(_mots(email.split('@')[0].replace('.', ' ')))
+
+    # Numéro complet et numéro national (9 chiffres) pour trouver « 622… » comme « +224 622… »
+    chiffres = re.sub(r'\D', '', telephone or '')
+    if chiffres:
+        mots.add(chiffres)
+        mots.add(chiffres[-9:])
+
+    return {mot[:LONGUEUR_MOT] for mot in mots if mot}
+
+
+def indexer_clients(clients):
+    """(Re)construit les mots-clés des clients donnés"""
+    clients = [client for client in clients if client.pk]
+    MotCleClient.objects.filter(client_id__in=[client.pk for client in clients]).delete()
+    MotCleClient.objects.bulk_create([
+        MotCleClient(client_id=client.pk, mot=mot)
+        for client in clients
+        for mot in mots_cles(client.nom, client.prenom, client.email, client.telephone)
+    ], batch_size=1000)
+
+
+def _est_email(terme):
+    """Adresse ou morceau d'adresse (« @exemple », « exemple.gn »)"""
+    return '@' in terme or bool(_DOMAINE.fullmatch(terme))
+
+
+def termes_recherche(terme):
+    """Découpe la saisie en préfixes normalisés, du plus sélectif au moins sélectif"""
+    terme = normaliser(terme).strip()
+    if not terme:
+        return []
+    if _TELEPHONE.fullmatch(terme):
+        chiffres = re.sub(r'\D', '', terme)
+        return [chiffres] if chiffres else []
+
+    termes = []
+    for bloc in terme.split():
+        if _est_email(bloc):
+            termes.append(bloc)
+        else:
+            accole = ''.join(_LETTRES.findall(bloc))
+            if accole:
+                termes.append(accole)
+    return sorted(set(termes), key=len, reverse=True)
+
+
+def _prefixe(terme):
+    return Q(mot__gte=terme, mot__lt=terme + BORNE)
+
+
+def condition_recherche(terme, champ='pk'):
+    """
+    Condition Q « chaque mot saisi préfixe un mot-clé du client ».
+
+    champ désigne la colonne client du queryset filtré ('pk' pour Client,
+    'client_id' pour Reservation…). Retourne None si la saisie est vide.
+    """
+    if not (terme or '').strip():
+        return None
+    termes = termes_recherche(terme)
+    if not termes:
+        # Saisie sans lettre ni chiffre : aucun client ne peut correspondre
+        return Q(pk__in=[])
+
+    condition = Q()
+    for t in termes:
+        correspondance = Q(**{f'{champ}__in': MotCleClient.objects.filter(_prefixe(t)).values('client_id')})
+        if _est_email(t):
+            # Domaine ou milieu d'adresse : hors index, comme l'ancienne recherche
+            correspondance |= Q(**{f'{champ}__in': Client.objects.filter(email__icontains=t).values('pk')})
+            if '@' not in t:
+                # « st.louis » peut aussi être un nom composé, indexé accolé
+                accole = ''.join(_LETTRES.findall(t))
+                correspondance |= Q(**{f'{champ}__in': MotCleClient.objects.filter(_prefixe(accole)).values('client_id')})
+        condition &= correspondance
+    return condition
+
+
+def suggestions_clients(terme, limite=LIMITE_SUGGESTIONS):
+    """
+    Clients classés pour l'autocomplétion.
+
+    Le mot le plus long guide un parcours ordonné de l'index (mot, client) :
+    les correspondances exactes sortent avant les simples préfixes, et la
+    lecture s'arrête dès que la limite est atteinte.
+    """
+    termes = termes_recherche(terme)
+    if not termes:
+        return []
+    if any(_est_email(t) for t in termes):
+        return list(Client.objects.filter(condition_recherche(terme)).order_by('nom', 'prenom', 'pk')[:limite])
+
+    premier, autres = termes[0], termes[1:]
+    candidats = MotCleClient.objects.filter(_prefixe(premier))
+    for t in autres:
+        candidats = candidats.filter(Exists(
+            MotCleClient.objects.filter(_prefixe(t), client_id=OuterRef('client_id'))
+        ))
+
+    # Un client peut apparaître par plusieurs mots : on lit un peu plus que la limite
+    ids = []
+    for client_id in candidats.order_by('mot', 'client_id').values_list(
+        'client_id', flat=True
+    )[:limite * 4]:
+        if client_id not in ids:
+            ids.append(client_id)
+            if len(ids) == limite:
+                break
+
+    clients = Client.objects.in_bulk(ids)
+    return [clients[client_id] for client_id in ids if client_id in clients]
@@ -0,0 +1,37 @@
+"""
+Allocation des références de transaction des paiements.
+
+Chaque (préfixe, jour) possède une ligne compteur dans SequenceReference.
+L'incrément se fait par un UPDATE ... SET dernier_numero = dernier_numero + 1,
+qui verrouille la ligne jusqu'à la fin de la transaction : deux requêtes
+concurrentes, même dans des processus différents, obtiennent toujours des
+numéros distincts, sans parcourir la table des paiements.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SequenceReference
+
+
+def prochain_numero(prefixe, jour):
+    """Incrémente et retourne le compteur (prefixe, jour)"""
+    with transaction.atomic():
+        compteur = SequenceReference.objects.filter(prefixe=prefixe, jour=jour)
+        if not compteur.update(dernier_numero=F('dernier_numero') + 1):
+            try:
+                # Premier numéro du jour ; un autre processus peut créer la ligne en même temps
+                with transaction.atomic():
+                    SequenceReference.objects.create(prefixe=prefixe, jour=jour, dernier_numero=1)
+                return 1
+            except IntegrityError:
+                compteur.update(dernier_numero=F('dernier_numero') + 1)
+        return compteur.values_list('dernier_numero', flat=True).get()
+
+
+def allouer_reference(prefixe='PAY', jour=None):
+    """Retourne une référence unique du type PAY-20260117-000042"""
+    jour = jour or timezone.localdate()
+    numero = prochain_numero(prefixe, jour)
+    return f"{prefixe}-{jour:%Y%m%d}-{numero:06d}"
@@ -0,0 +1,145 @@
+"""
+Résumé journalier matérialisé (StatistiqueJournaliere).
+
+Chaque ligne agrège une journée : nuitées occupées, revenu d'hébergement,
+encaissements par mode de paiement et réservations créées. Les rapports
+lisent ces lignes au lieu de reparcourir l'historique complet ; les
+écritures sur Reservation et Paiement recalculent uniquement les jours
+qu'elles touchent, après validation de leur transaction (gestion.signals).
+
+L'inventaire (chambres_total) n'est pas historisé : un jour passé garde la
+valeur enregistrée, seuls aujourd'hui et les jours à venir prennent le
+nombre de chambres vendables actuel.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Chambre, Paiement, Reservation, StatistiqueJournaliere
+
+# Réservations qui occupent réellement une chambre la nuit
+STATUTS_OCCUPATION = ['CONFIRMEE', 'TERMINEE']
+
+# Colonne de revenus correspondant à chaque mode de paiement
+CHAMPS_REVENUS = {
+    'ESPECES': 'revenus_especes',
+    'CARTE': 'revenus_carte',
+    'VIREMENT': 'revenus_virement',
+    'MOBILE_MONEY': 'revenus_mobile_money',
+}
+
+CHAMPS_MIS_A_JOUR = [
+    'chambres_total', 'nuitees_occupees', 'revenu_hebergement',
+    'reservations_creees', *CHAMPS_REVENUS.values(),
+]
+
+
+def _debut_jour(jour):
+    return timezone.make_aware(datetime(jour.year, jour.month, jour.day))
+
+
+def chambres_vendables():
+    """Inventaire actuel : chambres qui ne sont pas hors service"""
+    return Chambre.objects.exclude(statut='HORS_SERVICE').count()
+
+
+def recalculer_periode(debut, fin, chambres_total=None):
+    """
+    Recalcule les statistiques des jours debut à fin (inclus).
+
+    chambres_total évite de recompter l'inventaire quand l'appelant l'a déjà.
+    """
+    if fin < debut:
+        return 0
+    if chambres_total is None:
+        chambres_total = chambres_vendables()
+
+    # Jours passés : l'inventaire enregistré à l'époque est conservé
+    inventaire = {}
+    if debut < date.today():
+        inventaire = dict(StatistiqueJournaliere.objects.filter(
+            jour__gte=debut, jour__lte=min(fin, date.today() - timedelta(days=1))
+        ).values_list('jour', 'chambres_total'))
+
+    jours = {}
+    jour = debut
+    while jour <= fin:
+        jours[jour] = StatistiqueJournaliere(
+            jour=jour, chambres_total=inventaire.get(jour, chambres_total), revenu_hebergement=Decimal('0')
+        )
+        jour += timedelta(days=1)
+
+    # Nuitées occupées et revenu d'hébergement réparti par nuit
+    reservations = Reservation.objects.filter(
+        statut__in=STATUTS_OCCUPATION,
+        date_debut_sejour__lte=fin,
+        date_fin_sejour__gt=debut,
+    ).values_list('date_debut_sejour', 'date_fin_sejour', 'prix_total', 'nombre_nuits')
+
+    for date_debut, date_fin, prix_total, nombre_nuits in reservations.iterator(chunk_size=2000):
+        prix_nuit = prix_total / nombre_nuits if nombre_nuits else Decimal('0')
+        nuit = max(date_debut, debut)
+        derniere_nuit = min(date_fin - timedelta(days=1), fin)
+        while nuit <= derniere_nuit:
+            statistique = jours[nuit]
+            statistique.nuitees_occupees += 1
+            statistique.revenu_hebergement += prix_nuit
+            nuit += timedelta(days=1)
+
+    # Encaissements validés par jour et par mode
+    paiements = Paiement.objects.filter(
+        statut='VALIDE',
+        date_paiement__gte=_debut_jour(debut),
+        date_paiement__lt=_debut_jour(fin + timedelta(days=1)),
+    ).annotate(jour=TruncDate('date_paiement')).values('jour', 'mode_paiement').annotate(
+        total=Sum('montant')
+    )
+    for ligne in paiements:
+        champ = CHAMPS_REVENUS.get(ligne['mode_paiement'])
+        if champ and ligne['jour'] in jours:
+            setattr(jours[ligne['jour']], champ, ligne['total'])
+
+    # Réservations créées par jour
+    creations = Reservation.objects.filter(
+        date_reservation__gte=_debut_jour(debut),
+        date_reservation__lt=_debut_jour(fin + timedelta(days=1)),
+    ).annotate(jour=TruncDate('date_reservation')).values('jour').annotate(nombre=Count('id'))
+    for ligne in creations:
+        if ligne['jour'] in jours:
+            jours[ligne['jour']].reservations_creees = ligne['nombre']
+
+    StatistiqueJournaliere.objects.bulk_create(
+        jours.values(),
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['jour'],
+        update_fields=CHAMPS_MIS_A_JOUR,
+    )
+    return len(jours)
+
+
+def recalculer_reservation(reservation, ancienne_periode=None):
+    """Recalcule les nuits (anciennes et nouvelles) et le jour de création d'une réservation"""
+    debut, fin = reservation.date_debut_sejour, reservation.date_fin_sejour
+    if ancienne_periode:
+        # Une seule plage couvre les anciennes et les nouvelles nuits
+        debut, fin = min(debut, ancienne_periode[0]), max(fin, ancienne_periode[1])
+
+    chambres_total = chambres_vendables()
+    recalculer_periode(debut, fin - timedelta(days=1), chambres_total)
+
+    if reservation.date_reservation:
+        jour_creation = timezone.localdate(reservation.date_reservation)
+        if not debut <= jour_creation < fin:
+            recalculer_periode(jour_creation, jour_creation, chambres_total)
+
+
+def recalculer_paiement(paiement):
+    """Recalcule le jour d'encaissement d'un paiement"""
+    if paiement.date_paiement:
+        jour = timezone.localdate(paiement.date_paiement)
+        recalculer_periode(jour, jour)
@@ -0,0 +1,119 @@
+"""
+Routage lecture / écriture entre la base principale et la base des rapports.
+
+Les rapports, les exports et les statistiques administrateur lisent sur
+l'alias « rapports » : une connexion SQLite en lecture seule sur la base
+principale, ou sur une copie (BASE_RAPPORTS, rafraîchie par la commande
+repliquer_rapports). Leurs agrégats n'occupent ni la connexion ni les
+transactions de la réception. Les écritures vont toujours sur « default »,
+comme les lectures des sessions, comptes et droits, qu'une copie en retard
+ne doit jamais servir.
+
+Lecture de ses propres écritures : après une requête d'écriture réussie,
+un cookie de courte durée (ROUTAGE_DELAI_COLLANT secondes) maintient les
+lectures de l'utilisateur sur la base principale, le temps que la copie
+rattrape son retard.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+ALIAS_RAPPORTS = 'rapports'
+COOKIE_ECRITURE = 'derniere_ecriture'
+DELAI_COLLANT = 10
+
+METHODES_SURES = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+# Toujours lus sur la base principale, même dans un bloc de rapports
+APPLICATIONS_FRAICHES = {'auth', 'contenttypes', 'sessions'}
+MODELES_FRAIS = {'gestion.utilisateur'}
+
+_base_lecture = ContextVar('base_lecture', default=None)
+
+
+def alias_rapports():
+    """Alias de lecture des rapports, ou None s'il n'est pas utilisable"""
+    if ALIAS_RAPPORTS not in settings.DATABASES:
+        return None
+    # Miroir de test : même base que default, mais une seconde connexion ne
+    # verrait pas la transaction en cours du test
+    if connections[ALIAS_RAPPORTS].settings_dict['NAME'] == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']:
+        return None
+    return ALIAS_RAPPORTS
+
+
+def ecriture_recente(request):
+    """L'utilisateur a écrit il y a moins de ROUTAGE_DELAI_COLLANT secondes"""
+    return request is not None and COOKIE_ECRITURE in request.COOKIES
+
+
+@contextmanager
+def lecture_rapports(request=None):
+    """
+    Oriente les lectures du bloc vers la base des rapports.
+
+    Renvoie l'alias retenu, à passer explicitement (.using()) aux querysets
+    évalués après la sortie du bloc, comme ceux des réponses en flux.
+    """
+    alias = alias_rapports()
+    if ecriture_recente(request):
+        alias = None
+    jeton = _base_lecture.set(alias)
+    try:
+        yield alias or DEFAULT_DB_ALIAS
+    finally:
+        _base_lecture.reset(jeton)
+
+
+def sur_base_rapports(vue):
+    """Décorateur de vue (synchrone ou asynchrone) : lectures sur la base des rapports"""
+    if iscoroutinefunction(vue):
+        @wraps(vue)
+        async def executer_async(request, *args, **kwargs):
+            with lecture_rapports(request):
+                return await vue(request, *args, **kwargs)
+        return executer_async
+
+    @wraps(vue)
+    def executer(request, *args, **kwargs):
+        with lecture_rapports(request):
+            return vue(request, *args, **kwargs)
+    return executer
+
+
+class RouteurRapports:
+    """Lectures sur la base choisie par lecture_rapports(), écritures sur default"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in APPLICATIONS_FRAICHES or model._meta.label_lower in MODELES_FRAIS:
+            return DEFAULT_DB_ALIAS
+        return _base_lecture.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les deux alias désignent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == ALIAS_RAPPORTS else None
+
+
+class EcritureCollanteMiddleware(MiddlewareMixin):
+    """Pose le cookie de lecture de ses propres écritures après une écriture réussie"""
+
+    def process_response(self, request, response):
+        if request.method not in METHODES_SURES and response.status_code < 400:
+            response.set_cookie(
+                COOKIE_ECRITURE, '1',
+                max_age=getattr(settings, 'ROUTAGE_DELAI_COLLANT', DELAI_COLLANT),
+                httponly=True, samesite='Lax',
+            )
+        return response
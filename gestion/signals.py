@@ -0,0 +1,115 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .catalogue import invalider_catalogue
+from .droits import invalider_droits
+from .models import Chambre, Client, Paiement, PlanTarifaire, RemiseDuree, Reservation, Sejour, Utilisateur
+from .resume_journalier import recalculer_paiement, recalculer_reservation
+from .sqlite import appliquer_pragmas
+from .statistiques import invalider_statistiques
+from .tarifs import invalider_tarifs, recalculer_calendrier
+
+
+@receiver([post_save, post_delete], sender=Chambre)
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Reservation)
+@receiver([post_save, post_delete], sender=Sejour)
+@receiver([post_save, post_delete], sender=Paiement)
+def invalider_cache_statistiques(sender, **kwargs):
+    """Vide le cache du tableau de bord quand une donnée comptée change"""
+    invalider_statistiques()
+
+
+@receiver([post_save, post_delete], sender=Chambre)
+def invalider_cache_catalogue(sender, **kwargs):
+    invalider_catalogue()
+
+
+@receiver([post_save, post_delete], sender=PlanTarifaire)
+def recalculer_calendrier_tarifs(sender, **kwargs):
+    """Redéplie le calendrier des tarifs (qui invalide aussi les devis mémorisés)"""
+    recalculer_calendrier()
+
+
+@receiver([post_save, post_delete], sender=RemiseDuree)
+def invalider_cache_tarifs(sender, **kwargs):
+    invalider_tarifs()
+
+
+@receiver([post_save, post_delete], sender=Utilisateur)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Permission)
+def invalider_cache_droits(sender, **kwargs):
+    invalider_droits()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalider_droits_utilisateur(sender, update_fields=None, **kwargs):
+    # La connexion enregistre seulement last_login : les droits ne changent pas
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalider_droits()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalider_droits_associations(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalider_droits()
+
+
+# flush (tests) et migrate vident ou modifient les tables sans signal par ligne
+@receiver(post_migrate)
+def invalider_caches_apres_migration(sender, **kwargs):
+    invalider_catalogue()
+    invalider_droits()
+    invalider_tarifs()
+
+
+@receiver(pre_save, sender=Reservation)
+def memoriser_periode_reservation(sender, instance, **kwargs):
+    """Conserve les anciennes dates pour recalculer aussi les nuits libérées"""
+    instance._periode_initiale = None
+    if instance.pk:
+        instance._periode_initiale = Reservation.objects.filter(pk=instance.pk).values_list(
+            'date_debut_sejour', 'date_fin_sejour'
+        ).first()
+
+
+def _apres_validation(recalcul):
+    """
+    Recalcule le résumé journalier après validation, hors des verrous de la
+    transaction d'écriture. Un échec est journalisé sans annuler l'écriture
+    déjà validée : recalculer_statistiques reconstruit les jours concernés.
+    """
+    def executer():
+        recalcul()
+        invalider_statistiques()
+    transaction.on_commit(executer, robust=True)
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def mettre_a_jour_resume_reservation(sender, instance, **kwargs):
+    periode_initiale = getattr(instance, '_periode_initiale', None)
+    _apres_validation(lambda: recalculer_reservation(instance, periode_initiale))
+
+
+# Check-in et check-out changent le statut de la réservation par UPDATE direct
+@receiver([post_save, post_delete], sender=Sejour)
+def mettre_a_jour_resume_sejour(sender, instance, **kwargs):
+    reservation = instance.reservation
+    _apres_validation(lambda: recalculer_reservation(reservation))
+
+
+@receiver([post_save, post_delete], sender=Paiement)
+def mettre_a_jour_resume_paiement(sender, instance, **kwargs):
+    _apres_validation(lambda: recalculer_paiement(instance))
+
+
+@receiver(connection_created)
+def configurer_connexion(sender, connection, **kwargs):
+    """Profil SQLite (WAL, pragmas) appliqué à chaque nouvelle connexion"""
+    appliquer_pragmas(connection)
@@ -0,0 +1,78 @@
+"""
+Profil SQLite de production et reprise sur verrouillage.
+
+Chaque nouvelle connexion reçoit les PRAGMA de settings.SQLITE_PRAGMAS
+(journal WAL, synchronous=NORMAL, caches, busy_timeout) via le signal
+connection_created. En WAL, les lectures ne bloquent plus les écritures ni
+l'inverse ; les transactions d'écriture restent sérialisées, prises dès
+BEGIN grâce à OPTIONS['transaction_mode'] = 'IMMEDIATE', posé avec les
+PRAGMA par le même profil (SQLITE_PROFIL=production).
+
+Quand l'attente du verrou dépasse busy_timeout, SQLite lève « database is
+locked ». reprise_sur_verrou() rejoue alors l'opération (une transaction
+complète) avec un délai croissant, plutôt que d'afficher une erreur au
+réceptionniste.
+"""
+
+import random
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+TENTATIVES = 4
+DELAI_INITIAL = 0.05
+
+_NOM_PRAGMA = re.compile(r'^[a-z_]+$')
+_VALEUR_PRAGMA = re.compile(r'^-?\w+$')
+
+
+def appliquer_pragmas(connexion, pragmas=None):
+    """Applique les PRAGMA du profil à une connexion SQLite"""
+    if connexion.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {}) if pragmas is None else pragmas
+    if not pragmas:
+        return
+    # Le mode de journal se règle à l'écriture : une connexion en lecture seule
+    # (base des rapports) suit celui du fichier
+    lecture_seule = 'mode=ro' in str(connexion.settings_dict['NAME'])
+    with connexion.cursor() as curseur:
+        for nom, valeur in pragmas.items():
+            if lecture_seule and nom == 'journal_mode':
+                continue
+            if not _NOM_PRAGMA.match(nom) or not _VALEUR_PRAGMA.match(str(valeur)):
+                raise ValueError(f"PRAGMA invalide : {nom} = {valeur}")
+            curseur.execute(f'PRAGMA {nom} = {valeur}')
+
+
+def est_verrouillage(erreur):
+    """Erreur de contention SQLite (base verrouillée ou occupée)"""
+    message = str(erreur).lower()
+    return isinstance(erreur, OperationalError) and ('locked' in message or 'busy' in message)
+
+
+def reprise_sur_verrou(fonction=None, *, tentatives=TENTATIVES, delai=DELAI_INITIAL):
+    """
+    Rejoue fonction si la base est verrouillée (délai exponentiel avec gigue).
+
+    La fonction doit former une transaction complète : à l'intérieur d'un
+    bloc atomic englobant, l'erreur est propagée sans nouvel essai.
+    Utilisable en décorateur ou directement : reprise_sur_verrou(f)(...).
+    """
+    if fonction is None:
+        return lambda f: reprise_sur_verrou(f, tentatives=tentatives, delai=delai)
+
+    @wraps(fonction)
+    def executer(*args, **kwargs):
+        for essai in range(1, tentatives + 1):
+            try:
+                return fonction(*args, **kwargs)
+            except OperationalError as erreur:
+                if not est_verrouillage(erreur) or essai == tentatives or connection.in_atomic_block:
+                    raise
+                time.sleep(delai * 2 ** (essai - 1) * random.uniform(0.5, 1.5))
+
+    return executer
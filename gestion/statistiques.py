@@ -0,0 +1,137 @@
+"""
+Statistiques du tableau de bord.
+
+Les compteurs sont regroupés en agrégats conditionnels (une requête par
+table) et le résultat est mis en cache quelques secondes. Les signaux de
+gestion.signals vident le cache dès qu'une donnée concernée change, en
+changeant le tampon de version partagé par tous les processus
+(gestion.versions) qui entre dans chaque clé. Les
+compteurs de chambres viennent du catalogue en mémoire (gestion.catalogue).
+
+Les fonctions sont asynchrones : les agrégats indépendants sont lus
+simultanément (gestion.parallele).
+"""
+
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import versions
+from .catalogue import catalogue
+from .models import Client, Paiement, Reservation, Sejour, StatistiqueJournaliere
+from .parallele import calculer_en_parallele
+
+# Durée de vie du cache des statistiques (secondes)
+DUREE_CACHE = 30
+
+
+def _cle(nom):
+    """Clé de cache incluant le tampon de version et la date du jour, ou None sans tampon"""
+    version = versions.lire('statistiques')
+    if version is None:
+        return None
+    return f'gestion:statistiques:{nom}:{version}:{date.today().isoformat()}'
+
+
+def invalider_statistiques():
+    """Rend obsolètes les statistiques en cache dans tous les processus"""
+    versions.changer('statistiques')
+
+
+def _debut_mois(jour):
+    return timezone.make_aware(datetime(jour.year, jour.month, 1))
+
+
+def _compter_chambres():
+    """Compteurs des chambres, lus dans le catalogue en mémoire"""
+    chambres = catalogue()
+    return {
+        'total': chambres.compter(),
+        'disponibles': chambres.compter(statut='DISPONIBLE'),
+        'occupees': chambres.compter(statut='OCCUPEE'),
+    }
+
+
+def _agregats_generaux():
+    """Requêtes indépendantes des statistiques communes"""
+    today = date.today()
+    # Revenus du mois (intervalle de dates pour profiter des index)
+    debut_mois = _debut_mois(today)
+    fin_mois = _debut_mois(debut_mois.date() + timedelta(days=32))
+    return {
+        'chambres': _compter_chambres,
+        # Statistiques réservations, arrivées et départs du jour (une requête)
+        'reservations': lambda: Reservation.objects.aggregate(
+            total=Count('id'),
+            confirmees=Count('id', filter=Q(statut='CONFIRMEE')),
+            arrivees=Count('id', filter=Q(statut='CONFIRMEE', date_debut_sejour=today)),
+            departs=Count('id', filter=Q(statut='CONFIRMEE', date_fin_sejour=today)),
+        ),
+        'revenus_mois': lambda: Paiement.objects.filter(
+            statut='VALIDE',
+            date_paiement__gte=debut_mois,
+            date_paiement__lt=fin_mois,
+        ).aggregate(total=Sum('montant'))['total'] or 0,
+        'sejours_actifs': Sejour.objects.filter(date_checkout__isnull=True).count,
+        'total_clients': Client.objects.count,
+    }
+
+
+def _statistiques_generales(resultats):
+    chambres = resultats['chambres']
+    reservations = resultats['reservations']
+    return {
+        'total_chambres': chambres['total'],
+        'chambres_disponibles': chambres['disponibles'],
+        'chambres_occupees': chambres['occupees'],
+        'reservations_aujourdhui': reservations['arrivees'],
+        'departs_aujourdhui': reservations['departs'],
+        'sejours_actifs': resultats['sejours_actifs'],
+        'revenus_mois': resultats['revenus_mois'],
+        'total_clients': resultats['total_clients'],
+        'total_reservations': reservations['total'],
+        'reservations_confirmees': reservations['confirmees'],
+    }
+
+
+def _agregats_admin():
+    """Requêtes indépendantes des données administrateur"""
+    return {
+        'revenus_total': lambda: Paiement.objects.filter(statut='VALIDE').aggregate(
+            total=Sum('montant')
+        )['total'] or 0,
+        # Chambres par type
+        'chambres_par_type': lambda: catalogue().par_type(),
+        # Réservations par mois (derniers 6 mois), lues dans le résumé journalier
+        # comme les rapports : TruncMonth sur chaque réservation est une fonction
+        # Python sous SQLite, qui retient le GIL et ne profite pas du parallélisme
+        'reservations_par_mois': lambda: list(StatistiqueJournaliere.objects.annotate(
+            mois=TruncMonth('jour')
+        ).values('mois').annotate(count=Sum('reservations_creees')).filter(
+            count__gt=0
+        ).order_by('-mois')[:6]),
+    }
+
+
+async def _calculer(nom, agregats, assembler=dict):
+    """Valeur en cache, ou agrégats lus simultanément puis mis en cache"""
+    cle = _cle(nom)
+    valeur = await cache.aget(cle) if cle else None
+    if valeur is None:
+        valeur = assembler(await calculer_en_parallele(agregats))
+        if cle:
+            await cache.aset(cle, valeur, DUREE_CACHE)
+    return valeur
+
+
+async def astatistiques_generales():
+    """Compteurs communs à tous les utilisateurs du tableau de bord"""
+    return await _calculer('generales', _agregats_generaux(), _statistiques_generales)
+
+
+async def astatistiques_admin():
+    """Données réservées aux administrateurs (revenus, répartition)"""
+    return await _calculer('admin', _agregats_admin())
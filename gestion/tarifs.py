@@ -0,0 +1,141 @@
+"""
+Tarifs des chambres : saisons, week-ends et remises de longue durée.
+
+Un plan tarifaire (PlanTarifaire) fixe, pour un type de chambre et une
+période, un coefficient appliqué au prix de base de la chambre et une
+majoration des nuits du vendredi et du samedi. Les plans sont dépliés à
+l'avance en calendrier : une ligne TarifJournalier par type et par nuit,
+portant le coefficient final.
+
+Un devis ne parcourt donc ni les nuits ni les plans en Python : une requête
+additionne les coefficients de la période pour tous les types à la fois
+(GROUP BY), une autre lit les remises de durée. Le prix d'une chambre est
+alors prix_nuit × facteur de son type, une multiplication par chambre. Les
+facteurs d'une période sont mémorisés jusqu'au prochain changement de
+tarif (gestion.versions).
+
+Une nuit hors du calendrier (au-delà de l'horizon) est au prix de base.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from . import versions
+from .models import Chambre, PlanTarifaire, RemiseDuree, TarifJournalier
+
+# Nuits précalculées à partir d'aujourd'hui
+HORIZON = 730
+
+# Nuits du vendredi et du samedi (date.weekday())
+NUITS_WEEKEND = (4, 5)
+
+# Durée de vie des facteurs mémorisés (secondes) ; un changement de tarif les rend obsolètes avant
+DUREE_CACHE = 3600
+
+UN = Decimal('1')
+CENTIMES = Decimal('0.01')
+PRECISION_COEFFICIENT = Decimal('0.0001')
+
+
+def _coefficients(plans, type_chambre, debut, nuits):
+    """Coefficient de chaque nuit pour un type ; les plans prioritaires écrasent les autres"""
+    coefficients = [UN] * nuits
+    for plan in plans:
+        if plan.type_chambre not in ('', type_chambre):
+            continue
+        premiere = max((plan.date_debut - debut).days, 0)
+        derniere = min((plan.date_fin - debut).days + 1, nuits)
+        if derniere <= premiere:
+            continue
+        weekend = plan.coefficient * (1 + plan.majoration_weekend / 100)
+        coefficients[premiere:derniere] = [
+            weekend if (debut + timedelta(days=indice)).weekday() in NUITS_WEEKEND else plan.coefficient
+            for indice in range(premiere, derniere)
+        ]
+    return coefficients
+
+
+def recalculer_calendrier(debut=None, nuits=HORIZON):
+    """Déplie les plans actifs en tarifs journaliers ; retourne le nombre de lignes écrites"""
+    debut = debut or date.today()
+    fin = debut + timedelta(days=nuits)
+    # Priorité croissante : le dernier plan appliqué l'emporte
+    plans = list(PlanTarifaire.objects.filter(
+        actif=True, date_debut__lt=fin, date_fin__gte=debut
+    ).order_by('priorite', 'date_debut', 'id'))
+
+    lignes = [
+        TarifJournalier(
+            type_chambre=type_chambre,
+            nuit=debut + timedelta(days=indice),
+            coefficient=coefficient.quantize(PRECISION_COEFFICIENT),
+        )
+        for type_chambre, _ in Chambre.TYPE_CHAMBRE_CHOICES
+        for indice, coefficient in enumerate(_coefficients(plans, type_chambre, debut, nuits))
+    ]
+    with transaction.atomic():
+        TarifJournalier.objects.filter(nuit__gte=debut, nuit__lt=fin).delete()
+        TarifJournalier.objects.bulk_create(lignes, batch_size=500)
+    invalider_tarifs()
+    return len(lignes)
+
+
+def _calculer_facteurs(date_debut, date_fin):
+    nuits = (date_fin - date_debut).days
+    sommes = {
+        type_chambre: (somme, nombre)
+        for type_chambre, somme, nombre in TarifJournalier.objects.filter(
+            nuit__gte=date_debut, nuit__lt=date_fin
+        ).values('type_chambre').annotate(
+            somme=Sum('coefficient'), nombre=Count('id')
+        ).values_list('type_chambre', 'somme', 'nombre')
+    }
+    remises = list(RemiseDuree.objects.filter(nuits_minimum__lte=nuits).values_list('type_chambre', 'pourcentage'))
+
+    facteurs = {}
+    for type_chambre, _ in Chambre.TYPE_CHAMBRE_CHOICES:
+        somme, nombre = sommes.get(type_chambre, (0, 0))
+        # Nuits absentes du calendrier : coefficient 1
+        facteur = Decimal(somme) + (nuits - nombre)
+        remise = max((pourcentage for type_remise, pourcentage in remises if type_remise in ('', type_chambre)), default=0)
+        facteurs[type_chambre] = facteur * (100 - remise) / 100
+    return facteurs
+
+
+def facteurs(date_debut, date_fin):
+    """{type de chambre: facteur} tel que prix du séjour = prix_nuit × facteur"""
+    version = versions.lire('tarifs')
+    if version is None:
+        return _calculer_facteurs(date_debut, date_fin)
+
+    cle = f'gestion:tarifs:{version}:{date_debut.isoformat()}:{date_fin.isoformat()}'
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = _calculer_facteurs(date_debut, date_fin)
+        # Calculés dans une transaction, ils pourraient refléter des tarifs annulés ensuite
+        if not connection.in_atomic_block:
+            cache.set(cle, resultat, DUREE_CACHE)
+    return resultat
+
+
+def prix_sejour(chambre, date_debut, date_fin):
+    """Prix total d'un séjour dans la chambre, du date_debut au date_fin (nuit exclue)"""
+    facteur = facteurs(date_debut, date_fin)[chambre.type_chambre]
+    return (chambre.prix_nuit * facteur).quantize(CENTIMES)
+
+
+def coter(chambres, date_debut, date_fin):
+    """Ajoute prix_total à chaque chambre (dictionnaires de values()) ; une passe pour toutes"""
+    facteurs_periode = facteurs(date_debut, date_fin)
+    for chambre in chambres:
+        chambre['prix_total'] = (chambre['prix_nuit'] * facteurs_periode[chambre['type_chambre']]).quantize(CENTIMES)
+    return chambres
+
+
+def invalider_tarifs():
+    """Rend obsolètes les facteurs mémorisés dans tous les processus"""
+    versions.changer('tarifs')
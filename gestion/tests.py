@@ -1,3 +1,1358 @@
-from django.test import TestCase
+import base64
+import csv
+import random
+import re
+import threading
+import zipfile
+from copy import deepcopy
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from urllib.parse import urlencode
+from unittest.mock import patch
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+from django.db.models import F, Sum
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import versions
+from .models import (
+    Chambre, Client, NuitReservee, Paiement, PlanTarifaire, RemiseDuree, Reservation,
+    ReservationService, Sejour, ServiceSupplementaire, StatistiqueJournaliere, Utilisateur,
+)
+from .bench import generer_hotel, mesurer
+from .catalogue import catalogue
+from .charge import Journal, ParcoursReception, SessionDjango, comparer
+from .disponibilite import ChambreIndisponible, chambres_disponibles
+from .exports import reponse_export
+from .forms import PaiementForm, ReservationForm, SejourForm
+from .importation import Importateur, creer_importateur
+from .instrumentation import REGISTRE
+from .pagination import encoder_curseur, paginer
+from .parallele import arreter_pool
+from .planning import Planning
+from .reception import OperationImpossible, annuler_reservation, effectuer_checkin
+from .recherche import condition_recherche, suggestions_clients
+from .resume_journalier import STATUTS_OCCUPATION
+from .routage import ALIAS_RAPPORTS, COOKIE_ECRITURE, RouteurRapports, lecture_rapports
+from .sqlite import TENTATIVES, reprise_sur_verrou
+from .tarifs import HORIZON, prix_sejour
+
+
+class DonneesTestMixin:
+    """Jeu de données minimal partagé par les tests"""
+
+    @classmethod
+    def creer_chambre(cls, numero, **kwargs):
+        valeurs = {
+            'type_chambre': 'SIMPLE',
+            'prix_nuit': Decimal('250000'),
+            'nombre_lits': 1,
+            'superficie': Decimal('20'),
+            'etage': 1,
+        }
+        valeurs.update(kwargs)
+        return Chambre.objects.create(numero_chambre=numero, **valeurs)
+
+    @classmethod
+    def creer_client(cls, numero):
+        return Client.objects.create(
+            nom=f'Diallo{numero}',
+            prenom='Amadou',
+            email=f'client{numero}@exemple.gn',
+            telephone=f'+22460000{numero:04d}',
+            adresse='Kaloum',
+            ville='Conakry',
+            piece_identite='CNI',
+            numero_piece=f'CNI{numero:06d}',
+            date_naissance=date(1990, 1, 1),
+        )
+
+    @classmethod
+    def creer_reservation(cls, client, chambre, utilisateur, debut=None, nuits=2, statut='CONFIRMEE'):
+        debut = debut or date.today()
+        return Reservation.objects.create(
+            client=client,
+            chambre=chambre,
+            utilisateur=utilisateur,
+            date_debut_sejour=debut,
+            date_fin_sejour=debut + timedelta(days=nuits),
+            nombre_adultes=1,
+            prix_total=chambre.prix_nuit * nuits,
+            statut=statut,
+        )
+
+
+class DashboardTests(DonneesTestMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        for i in range(10):
+            chambre = cls.creer_chambre(f'{100 + i}')
+            client = cls.creer_client(i)
+            cls.creer_reservation(client, chambre, cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_nombre_de_requetes_borne(self):
+        # Session, utilisateur, 5 requêtes communes, 3 admin, réservations récentes
+        with self.assertNumQueries(11):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_reservations'], 10)
+
+        # Les statistiques sont ensuite servies par le cache
+        with self.assertNumQueries(3):
+            self.client.get(reverse('dashboard'))
+
+    def test_cache_invalide_par_les_signaux(self):
+        self.client.get(reverse('dashboard'))
+        self.creer_chambre('999')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_chambres'], 11)
+
+    def test_reservations_par_mois_sans_mois_vides(self):
+        # Séjour dans plus de deux mois : ses nuits créent des jours du résumé sans réservation créée
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creer_reservation(self.creer_client(99), Chambre.objects.first(), self.admin,
+                                   debut=date.today() + timedelta(days=70))
+        attendu = [{'mois': date.today().replace(day=1), 'count': 11}]
+        for page in ('dashboard', 'rapports'):
+            with self.subTest(page=page):
+                response = self.client.get(reverse(page))
+                self.assertEqual(response.context['reservations_par_mois'], attendu)
+
+    def test_cache_invalide_par_un_autre_processus(self):
+        self.client.get(reverse('dashboard'))
+        # Un autre processus (serveur, audit de nuit) réécrit le tampon partagé
+        with open(versions.fichier('statistiques'), 'w') as tampon:
+            tampon.write('autre-processus')
+        with self.assertNumQueries(11):
+            self.client.get(reverse('dashboard'))
+
+
+class DroitsTests(DonneesTestMixin, TestCase):
+    """Rôle et permissions résolus une fois, puis lus dans le cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.groupe = Group.objects.create(name='Réception')
+        cls.groupe.permissions.add(*Permission.objects.filter(
+            content_type__app_label='gestion', codename__in=['view_client', 'add_client']
+        ))
+        cls.receptionniste = User.objects.create_user('reception', password='motdepasse')
+        cls.receptionniste.groups.add(cls.groupe)
+        Utilisateur.objects.create(user=cls.receptionniste, telephone='+224600000000', role='RECEPTIONNISTE')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.receptionniste)
+
+    def test_droits_sans_requete_une_fois_en_cache(self):
+        self.client.get(reverse('dashboard'))
+        # Session, utilisateur, réservations récentes : ni rôle ni permissions
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('dashboard'))
+        self.assertFalse(response.context['is_admin'])
+        self.assertTrue(response.context['user_permissions']['can_add_client'])
+        self.assertFalse(response.context['user_permissions']['can_add_chambre'])
+
+    def test_droits_invalides_par_les_signaux(self):
+        self.client.get(reverse('dashboard'))
+        self.groupe.permissions.add(Permission.objects.get(codename='add_chambre'))
+        profil = Utilisateur.objects.get(user=self.receptionniste)
+        profil.role = 'ADMIN'
+        profil.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertTrue(response.context['is_admin'])
+        self.assertTrue(response.context['user_permissions']['can_add_chambre'])
+
+
+class TarifsTests(DonneesTestMixin, TestCase):
+    """Prix du séjour selon la saison, le week-end et la durée"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        cls.suite = cls.creer_chambre('501', type_chambre='SUITE', prix_nuit=Decimal('100000'))
+        cls.simple = cls.creer_chambre('101', prix_nuit=Decimal('100000'))
+        # Lundi prochain : 7 nuits dont vendredi et samedi
+        cls.lundi = date.today() + timedelta(days=7 - date.today().weekday())
+        cls.plan = PlanTarifaire.objects.create(
+            nom='Haute saison', type_chambre='SUITE',
+            date_debut=cls.lundi, date_fin=cls.lundi + timedelta(days=6),
+            coefficient=Decimal('1.5'), majoration_weekend=Decimal('10'),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_saison_et_weekend(self):
+        fin = self.lundi + timedelta(days=7)
+        # 5 nuits à 1,5 et 2 nuits de week-end à 1,65
+        self.assertEqual(prix_sejour(self.suite, self.lundi, fin), Decimal('1080000.00'))
+        # Autre type : prix de base
+        self.assertEqual(prix_sejour(self.simple, self.lundi, fin), Decimal('700000.00'))
+        # Au-delà du calendrier précalculé : prix de base
+        lointain = date.today() + timedelta(days=HORIZON + 10)
+        self.assertEqual(prix_sejour(self.suite, lointain, lointain + timedelta(days=2)), Decimal('200000.00'))
+
+    def test_remise_de_duree_et_invalidation(self):
+        fin = self.lundi + timedelta(days=7)
+        prix_sejour(self.suite, self.lundi, fin)
+        RemiseDuree.objects.create(nuits_minimum=7, pourcentage=Decimal('10'))
+        self.assertEqual(prix_sejour(self.suite, self.lundi, fin), Decimal('972000.00'))
+        self.assertEqual(prix_sejour(self.suite, self.lundi, fin - timedelta(days=1)), Decimal('930000.00'))
+
+        self.plan.coefficient = Decimal('2')
+        self.plan.save()
+        self.assertEqual(prix_sejour(self.suite, self.lundi, fin), Decimal('1296000.00'))
+
+    def test_prix_de_la_reservation(self):
+        reservation = Reservation.objects.create(
+            client=self.creer_client(1), chambre=self.suite, utilisateur=self.admin,
+            date_debut_sejour=self.lundi, date_fin_sejour=self.lundi + timedelta(days=2),
+            nombre_adultes=1, prix_total=0,
+        )
+        self.assertEqual(reservation.prix_total, Decimal('300000.00'))
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('api_chambres_disponibles'), {
+            'date_debut': self.lundi.isoformat(),
+            'date_fin': (self.lundi + timedelta(days=7)).isoformat(),
+        })
+        devis = {chambre['numero_chambre']: chambre['prix_total'] for chambre in response.json()['chambres']}
+        self.assertEqual(devis, {'101': '700000.00'})
+
+        response = self.client.get(reverse('reservation_create'), {
+            'date_debut': self.lundi.isoformat(),
+            'date_fin': (self.lundi + timedelta(days=7)).isoformat(),
+        })
+        self.assertContains(response, 'data-total="700000.00"')
+        self.assertContains(response, 'Chambre 101 - Simple')
+
+
+class AuditDeNuitTests(DonneesTestMixin, TestCase):
+    """Clôture de la journée par la commande audit_de_nuit"""
+
+    def setUp(self):
+        self.utilisateur = User.objects.create_user('reception')
+        self.hier = date.today() - timedelta(days=1)
+
+    def sejour(self, numero, solde):
+        reservation = self.creer_reservation(
+            self.creer_client(numero), self.creer_chambre(str(numero)), self.utilisateur, debut=self.hier, nuits=1
+        )
+        sejour = effectuer_checkin(reservation.pk, timezone.now(), 1)
+        if solde:
+            Sejour.objects.filter(pk=sejour.pk).update(montant_paye=F('montant_du'))
+        return sejour
+
+    def auditer(self, *args):
+        call_command('audit_de_nuit', *args, stdout=StringIO())
+
+    def test_audit_de_nuit(self):
+        # Le résumé journalier est recalculé après validation de chaque écriture
+        with self.captureOnCommitCallbacks(execute=True):
+            absent = self.creer_reservation(self.creer_client(1), self.creer_chambre('101'), self.utilisateur,
+                                            debut=self.hier, nuits=3)
+            a_venir = self.creer_reservation(self.creer_client(2), absent.chambre, self.utilisateur,
+                                             debut=date.today() + timedelta(days=5))
+            solde, non_solde = self.sejour(3, solde=True), self.sejour(4, solde=False)
+        oubliee = self.creer_chambre('401', statut='OCCUPEE')
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=self.hier).nuitees_occupees, 3)
+
+        self.auditer('--simulation')
+        self.assertEqual(Reservation.objects.get(pk=absent.pk).statut, 'CONFIRMEE')
+
+        self.auditer()
+        self.assertEqual(Reservation.objects.get(pk=absent.pk).statut, 'NON_PRESENTEE')
+        self.assertFalse(NuitReservee.objects.filter(reservation=absent).exists())
+        self.assertEqual(Reservation.objects.get(pk=a_venir.pk).statut, 'CONFIRMEE')
+
+        solde.refresh_from_db()
+        self.assertIsNotNone(solde.date_checkout)
+        self.assertEqual(solde.reservation.statut, 'TERMINEE')
+        self.assertEqual(solde.reservation.chambre.statut, 'DISPONIBLE')
+        non_solde.refresh_from_db()
+        self.assertIsNone(non_solde.date_checkout)
+        self.assertEqual(non_solde.reservation.chambre.statut, 'OCCUPEE')
+        self.assertEqual(Chambre.objects.get(pk=oubliee.pk).statut, 'DISPONIBLE')
+        # La nuit de la non-présentation ne compte plus dans le résumé
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=self.hier).nuitees_occupees, 2)
+
+
+class ImportationTests(DonneesTestMixin, TestCase):
+    """Import en masse : lots, doublons, nuits occupées et reprise"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+
+    def ligne_client(self, numero, **valeurs):
+        return numero, {
+            'nom': f'Séné{numero}', 'prenom': 'Fatou', 'email': f'import{numero}@exemple.gn',
+            'telephone': f'+22462000{numero:04d}', 'ville': 'Conakry', 'piece_identite': 'cni',
+            'numero_piece': f'IMP{numero:06d}', 'date_naissance': '1985-05-01', **valeurs,
+        }
+
+    def ligne_reservation(self, numero, chambre, debut, nuits, statut='CONFIRMEE'):
+        return numero, {
+            'client_email': 'import1@exemple.gn', 'numero_chambre': chambre,
+            'date_debut_sejour': debut.isoformat(), 'date_fin_sejour': (debut + timedelta(days=nuits)).isoformat(),
+            'statut': statut,
+        }
+
+    def test_clients_chambres_reservations(self):
+        rapport = creer_importateur('clients').importer([
+            self.ligne_client(1), self.ligne_client(2), self.ligne_client(3, email='import1@exemple.gn'),
+        ])
+        self.assertEqual((rapport.inserees, rapport.erreurs), (2, [(3, 'email import1@exemple.gn en double dans le fichier')]))
+        # Index de recherche alimenté malgré bulk_create
+        self.assertEqual([client.email for client in suggestions_clients('sene2')], ['import2@exemple.gn'])
+
+        version = versions.lire('statistiques')
+        rapport = creer_importateur('chambres').importer([
+            (1, {'numero_chambre': '701', 'type_chambre': 'suite', 'prix_nuit': '500 000',
+                 'nombre_lits': '2', 'superficie': '40', 'etage': '7'}),
+        ])
+        self.assertEqual(rapport.inserees, 1)
+        self.assertNotEqual(versions.lire('statistiques'), version)
+
+        debut = date.today() - timedelta(days=10)
+        rapport = creer_importateur('reservations', self.admin).importer([
+            self.ligne_reservation(1, '701', debut, 3, statut='TERMINEE'),
+            self.ligne_reservation(2, '701', date.today() + timedelta(days=5), 2),
+            self.ligne_reservation(3, '999', debut, 1),
+        ])
+        self.assertEqual((rapport.inserees, rapport.erreurs), (2, [(3, 'numero_chambre : aucune chambre 999')]))
+        self.assertEqual(Reservation.objects.get(statut='TERMINEE').prix_total, Decimal('1500000'))
+        self.assertEqual(NuitReservee.objects.count(), 2)
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=debut).nuitees_occupees, 1)
+
+        # Relancer le même fichier de clients est sans effet
+        rapport = creer_importateur('clients').importer([self.ligne_client(1), self.ligne_client(2)])
+        self.assertEqual((rapport.inserees, rapport.ignorees), (0, 2))
+
+    def test_nuit_en_double_dans_le_lot(self):
+        creer_importateur('clients').importer([self.ligne_client(1)])
+        chambre = self.creer_chambre('101')
+        debut = date.today() + timedelta(days=10)
+        self.creer_reservation(Client.objects.get(), chambre, self.admin, debut=debut, nuits=2)
+
+        rapport = creer_importateur('reservations', self.admin).importer([
+            # Déjà occupée en base : rejetée, ses nuits ne bloquent pas la ligne suivante
+            self.ligne_reservation(1, '101', debut + timedelta(days=1), 3),
+            self.ligne_reservation(2, '101', debut + timedelta(days=2), 2),
+            self.ligne_reservation(3, '101', debut + timedelta(days=3), 1),
+        ])
+        self.assertEqual(rapport.inserees, 1)
+        self.assertEqual(rapport.erreurs, [
+            (1, 'La chambre est déjà réservée sur cette période.'),
+            (3, 'La chambre est déjà réservée sur cette période (dans le fichier).'),
+        ])
+        self.assertTrue(Reservation.objects.filter(date_debut_sejour=debut + timedelta(days=2)).exists())
+
+    def test_reprise_apres_lot_rejete(self):
+        lignes = [self.ligne_client(numero) for numero in range(1, 7)]
+        importateur = creer_importateur('clients', taille_lot=2)
+        inserer = importateur.inserer
+
+        def inserer_en_conflit(clients):
+            # Conflit apparu entre le contrôle groupé et l'insertion du deuxième lot
+            if any(client.email == 'import3@exemple.gn' for client in clients):
+                raise IntegrityError('UNIQUE constraint failed')
+            inserer(clients)
+
+        importateur.inserer = inserer_en_conflit
+        rapport = importateur.importer(lignes)
+        self.assertTrue(rapport.interrompu)
+        self.assertEqual((rapport.inserees, rapport.derniere_ligne), (2, 2))
+        self.assertEqual([numero for numero, _ in rapport.erreurs], [3, 4])
+
+        rapport = creer_importateur('clients', taille_lot=2).importer(lignes, depuis=rapport.derniere_ligne)
+        self.assertFalse(rapport.interrompu)
+        self.assertEqual((rapport.inserees, rapport.derniere_ligne), (4, 6))
+        self.assertEqual(Client.objects.count(), 6)
+
+
+    def test_construire_obligatoire(self):
+        class ImportateurIncomplet(Importateur):
+            modele = Client
+
+        with self.assertRaises(TypeError):
+            ImportateurIncomplet()
+
+class PaginationTests(DonneesTestMixin, TestCase):
+    """Pagination par curseur (date, id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clients = [cls.creer_client(numero) for numero in range(5)]
+        # Même date d'inscription pour tous : l'ordre ne tient qu'à l'id
+        Client.objects.update(date_inscription=timezone.now())
+
+    def page(self, taille=2, **parametres):
+        requete = RequestFactory().get('/clients/', parametres)
+        return paginer(requete, Client.objects.all(), 'date_inscription', taille=taille)
+
+    def parametre(self, url):
+        cle, jeton = url.lstrip('?').split('=')
+        return {cle: jeton}
+
+    def ids(self, page):
+        return [client.pk for client in page]
+
+    def test_suivante_et_precedente_a_egalite_de_date(self):
+        attendus = [client.pk for client in reversed(self.clients)]
+        premiere = self.page()
+        self.assertEqual(self.ids(premiere), attendus[:2])
+        self.assertFalse(premiere.a_precedent)
+
+        deuxieme = self.page(**self.parametre(premiere.url_suivante))
+        self.assertEqual(self.ids(deuxieme), attendus[2:4])
+        troisieme = self.page(**self.parametre(deuxieme.url_suivante))
+        self.assertEqual(self.ids(troisieme), attendus[4:])
+        self.assertFalse(troisieme.a_suivant)
+
+        retour = self.page(**self.parametre(troisieme.url_precedente))
+        self.assertEqual(self.ids(retour), attendus[2:4])
+        retour = self.page(**self.parametre(retour.url_precedente))
+        self.assertEqual(self.ids(retour), attendus[:2])
+        self.assertFalse(retour.a_precedent)
+
+    def test_curseur_invalide(self):
+        attendus = [client.pk for client in reversed(self.clients)][:2]
+        date_impossible = encoder_curseur('2024-13-45T10:00:00', self.clients[0].pk)
+        for jeton in ('!!!', 'bm9uLWpzb24', encoder_curseur('x', 'y'), date_impossible):
+            with self.subTest(jeton=jeton):
+                self.assertEqual(self.ids(self.page(apres=jeton)), attendus)
+                self.assertEqual(self.ids(self.page(avant=jeton)), attendus)
+
+        admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(reverse('client_list'), {'apres': date_impossible}).status_code, 200)
+
+    def test_identifiant_invalide_ou_trop_grand(self):
+        attendus = [client.pk for client in reversed(self.clients)][:2]
+        jetons = [
+            base64.urlsafe_b64encode(b'["2020-01-01", 1e999]').decode(),
+            encoder_curseur('2020-01-01T00:00:00+00:00', 2 ** 63),
+            encoder_curseur('2020-01-01T00:00:00+00:00', -1),
+            encoder_curseur('2020-01-01T00:00:00+00:00', '12'),
+        ]
+        admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        self.client.force_login(admin)
+        for jeton in jetons:
+            with self.subTest(jeton=jeton):
+                self.assertEqual(self.ids(self.page(apres=jeton)), attendus)
+                self.assertEqual(self.client.get(reverse('client_list'), {'apres': jeton}).status_code, 200)
+
+
+class SoldesSejourTests(DonneesTestMixin, TestCase):
+    """Montants dû et payé stockés sur le séjour"""
+
+    def setUp(self):
+        utilisateur = User.objects.create_user('reception')
+        self.reservation = self.creer_reservation(self.creer_client(1), self.creer_chambre('101'), utilisateur)
+        self.sejour = effectuer_checkin(self.reservation.pk, timezone.now(), 1)
+
+    def soldes(self):
+        self.sejour.refresh_from_db()
+        return self.sejour.montant_du, self.sejour.montant_paye
+
+    def payer(self, montant, statut='VALIDE'):
+        return Paiement.objects.create(
+            sejour=self.sejour, montant=Decimal(montant), mode_paiement='ESPECES', statut=statut
+        )
+
+    def test_soldes_tenus_a_jour(self):
+        self.assertEqual(self.soldes(), (Decimal('500000'), 0))
+
+        service = ServiceSupplementaire.objects.create(nom_service='Navette', description='-', prix=Decimal('50000'))
+        ligne = ReservationService.objects.create(
+            reservation=self.reservation, service=service, quantite=2, prix_unitaire=service.prix
+        )
+        self.assertEqual(self.soldes(), (Decimal('600000'), 0))
+
+        especes = self.payer('200000')
+        carte = self.payer('100000', statut='EN_ATTENTE')
+        self.assertEqual(self.soldes(), (Decimal('600000'), Decimal('200000')))
+
+        carte.statut = 'VALIDE'
+        carte.save()
+        self.assertEqual(self.soldes(), (Decimal('600000'), Decimal('300000')))
+        especes.statut = 'REMBOURSE'
+        especes.save()
+        self.assertEqual(self.soldes(), (Decimal('600000'), Decimal('100000')))
+
+        carte.delete()
+        ligne.delete()
+        self.assertEqual(self.soldes(), (Decimal('500000'), 0))
+        self.assertEqual(self.sejour.solde_restant, Decimal('500000'))
+
+    def test_verifier_soldes(self):
+        self.payer('200000')
+        Sejour.objects.filter(pk=self.sejour.pk).update(montant_du=1, montant_paye=2)
+
+        sortie = StringIO()
+        call_command('verifier_soldes', stdout=sortie)
+        self.assertIn(f'Séjour #{self.sejour.pk}', sortie.getvalue())
+        self.assertEqual(self.soldes(), (1, 2))
+
+        call_command('verifier_soldes', '--corriger', stdout=StringIO())
+        self.assertEqual(self.soldes(), (Decimal('500000'), Decimal('200000')))
+        sortie = StringIO()
+        call_command('verifier_soldes', stdout=sortie)
+        self.assertIn('Aucun écart détecté.', sortie.getvalue())
+
+
+class RechercheClientsTests(DonneesTestMixin, TestCase):
+    """Recherche par préfixes sans accents, avec repli sur l'email"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sene = cls.client_nomme(1, 'Séné', 'Fatou', 'fatou.sene@orange.gn')
+        cls.diallo = cls.client_nomme(2, 'Diallo', 'Amadou', 'amadou@exemple.gn')
+        cls.barry = cls.client_nomme(3, 'Barry-Diallo', 'Mariama', 'mariama@exemple.gn')
+
+    @classmethod
+    def client_nomme(cls, numero, nom, prenom, email):
+        client = cls.creer_client(numero)
+        client.nom, client.prenom, client.email = nom, prenom, email
+        client.save()
+        return client
+
+    def trouver(self, terme):
+        return set(suggestions_clients(terme)), set(Client.objects.filter(condition_recherche(terme)))
+
+    def verifier(self, terme, *attendus):
+        self.assertEqual(self.trouver(terme), (set(attendus), set(attendus)), terme)
+
+    def test_accents_et_casse(self):
+        for terme in ('sene', 'SÉNÉ', 'Sén', 'fatou s'):
+            self.verifier(terme, self.sene)
+
+    def test_plusieurs_prefixes(self):
+        self.verifier('diallo', self.diallo, self.barry)
+        self.verifier('dia ama', self.diallo)
+        self.verifier('barrydiallo mar', self.barry)
+        # Recherche par débuts de mots : un milieu de nom ne trouve rien
+        self.verifier('allo')
+
+    def test_email(self):
+        self.verifier('amadou@exemple.gn', self.diallo)
+        self.verifier('AMADOU@', self.diallo)
+        # Domaine et milieu d'adresse : repli sur l'email
+        self.verifier('exemple.gn', self.diallo, self.barry)
+        self.verifier('@orange', self.sene)
+        self.verifier('riama@exem', self.barry)
+
+    def api(self, **params):
+        self.client.force_login(User.objects.get_or_create(username='reception')[0])
+        response = self.client.get(reverse('api_clients_recherche'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['clients']
+
+    def test_api_forme_de_la_reponse(self):
+        self.assertEqual(self.api(q='sene'), [{
+            'id': self.sene.pk,
+            'nom_complet': self.sene.nom_complet,
+            'telephone': self.sene.telephone,
+            'email': 'fatou.sene@orange.gn',
+        }])
+        # Saisie vide ou sans mot exploitable : aucune suggestion
+        self.assertEqual(self.api(q=''), [])
+        self.assertEqual(self.api(), [])
+        self.assertEqual(self.api(q='  -  '), [])
+
+    def test_api_limite(self):
+        # 55 autres clients prénommés Amadou
+        for numero in range(10, 65):
+            self.creer_client(numero)
+        self.assertEqual(len(self.api(q='amadou')), 10)
+        self.assertEqual(len(self.api(q='amadou', limite='5')), 5)
+        # Bornée à 50, au moins 1 ; une valeur non entière reprend la limite par défaut
+        self.assertEqual(len(self.api(q='amadou', limite='500')), 50)
+        self.assertEqual(len(self.api(q='amadou', limite='0')), 1)
+        self.assertEqual(len(self.api(q='amadou', limite='-3')), 1)
+        self.assertEqual(len(self.api(q='amadou', limite='dix')), 10)
+        self.assertEqual(len(self.api(q='amadou', limite='2.5')), 10)
+
+
+class PlanningTests(DonneesTestMixin, TestCase):
+    """Grille du rack : un code par chambre et par nuit"""
+
+    def test_codes_et_requetes(self):
+        utilisateur = User.objects.create_user('reception')
+        client = self.creer_client(1)
+        aujourd_hui = date.today()
+        en_cours, rotation = self.creer_chambre('101'), self.creer_chambre('102')
+        self.creer_chambre('103', statut='MAINTENANCE')
+        # Séjour commencé avant la fenêtre : ni arrivée ni nuit hors fenêtre
+        self.creer_reservation(client, en_cours, utilisateur, debut=aujourd_hui - timedelta(days=2), nuits=4)
+        # Départ et arrivée le même jour
+        self.creer_reservation(client, rotation, utilisateur, debut=aujourd_hui + timedelta(days=1), nuits=2)
+        self.creer_reservation(client, rotation, utilisateur, debut=aujourd_hui + timedelta(days=3), nuits=2)
+        annulee = self.creer_reservation(client, en_cours, utilisateur, debut=aujourd_hui + timedelta(days=4))
+        Reservation.objects.filter(pk=annulee.pk).update(statut='ANNULEE')
+
+        with self.assertNumQueries(2):
+            planning = Planning(aujourd_hui, nuits=7)
+        self.assertEqual(
+            {chambre['numero_chambre']: chambre['nuits'] for chambre in planning.en_json()['chambres']},
+            {'101': 'OODLLLL', '102': 'LAORODL', '103': 'HHHHHHH'},
+        )
+
+        # Requêtes constantes quel que soit le nombre de chambres et de réservations
+        for numero in range(3):
+            chambre = self.creer_chambre(f'20{numero}')
+            self.creer_reservation(client, chambre, utilisateur, debut=aujourd_hui + timedelta(days=numero))
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(Planning(aujourd_hui, nuits=7).lignes())), 6)
+
+
+class ExportsTests(DonneesTestMixin, TestCase):
+    """Exports en flux : CSV pour Excel et XLSX produit sans bibliothèque"""
+
+    @classmethod
+    def setUpTestData(cls):
+        utilisateur = User.objects.create_user('reception')
+        chambre = cls.creer_chambre('101')
+        cls.confirmee = cls.creer_reservation(cls.creer_client(1), chambre, utilisateur)
+        cls.en_attente = cls.creer_reservation(
+            cls.creer_client(2), chambre, utilisateur, debut=date.today() + timedelta(days=5), statut='EN_ATTENTE'
+        )
+
+    def contenu(self, format_export, **params):
+        reponse = reponse_export('reservations', format_export, QueryDict(urlencode(params)))
+        return b''.join(reponse.streaming_content)
+
+    def test_csv(self):
+        texte = self.contenu('csv', statut='CONFIRMEE').decode('utf-8')
+        self.assertTrue(texte.startswith('\ufeff'))
+        lignes = list(csv.reader(StringIO(texte.lstrip('\ufeff')), delimiter=';'))
+        self.assertEqual(lignes[0][:3], ['ID', 'Date réservation', 'Nom'])
+        self.assertEqual(len(lignes), 2)
+        self.assertEqual((lignes[1][0], lignes[1][4], lignes[1][12]), (str(self.confirmee.pk), '101', 'Confirmée'))
+
+    def test_xlsx(self):
+        archive = zipfile.ZipFile(BytesIO(self.contenu('xlsx')))
+        self.assertIsNone(archive.testzip())
+        espace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        feuille = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        lignes = feuille.findall(f'{espace}sheetData/{espace}row')
+        self.assertEqual(len(lignes), 3)
+        self.assertEqual(lignes[0].find(f'{espace}c/{espace}is/{espace}t').text, 'ID')
+        # Réservation la plus récente en tête, identifiant en cellule numérique
+        self.assertEqual(lignes[1].find(f'{espace}c/{espace}v').text, str(self.en_attente.pk))
+
+
+class DisponibiliteTests(DonneesTestMixin, TestCase):
+    """Périodes semi-ouvertes [arrivée, départ[ : le jour du départ est libre"""
+
+    @classmethod
+    def setUpTestData(cls):
+        utilisateur = User.objects.create_user('reception')
+        cls.debut = date.today() + timedelta(days=10)
+        cls.occupee, cls.liberee = cls.creer_chambre('101'), cls.creer_chambre('102')
+        cls.creer_reservation(cls.creer_client(1), cls.occupee, utilisateur, debut=cls.debut, nuits=3)
+        annulee = cls.creer_reservation(cls.creer_client(2), cls.liberee, utilisateur, debut=cls.debut, nuits=3)
+        annuler_reservation(annulee.pk, 'Test')
+
+    def jour(self, decalage):
+        return self.debut + timedelta(days=decalage)
+
+    def libres(self, debut, fin):
+        return [chambre.numero_chambre for chambre in chambres_disponibles(self.jour(debut), self.jour(fin))]
+
+    def test_chambres_disponibles(self):
+        # Arrivée le jour du départ, départ le jour de l'arrivée
+        self.assertEqual(self.libres(3, 5), ['101', '102'])
+        self.assertEqual(self.libres(-2, 0), ['101', '102'])
+        # Chevauchement d'une nuit ; la réservation annulée ne bloque pas
+        self.assertEqual(self.libres(2, 4), ['102'])
+        self.assertEqual(self.libres(-1, 1), ['102'])
+
+
+class ResumeJournalierTests(DonneesTestMixin, TestCase):
+    """Résumé journalier tenu à jour après chaque écriture validée"""
+
+    def setUp(self):
+        self.utilisateur = User.objects.create_user('reception')
+        self.chambre = self.creer_chambre('101')
+        self.debut = date.today() + timedelta(days=5)
+
+    def jour(self, decalage):
+        return self.debut + timedelta(days=decalage)
+
+    def nuitees(self, *decalages):
+        lignes = dict(StatistiqueJournaliere.objects.filter(
+            jour__in=[self.jour(decalage) for decalage in decalages]
+        ).values_list('jour', 'nuitees_occupees'))
+        return [lignes.get(self.jour(decalage)) for decalage in decalages]
+
+    def test_creation_deplacement_annulation_paiement(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = self.creer_reservation(self.creer_client(1), self.chambre, self.utilisateur,
+                                                 debut=self.debut, nuits=2)
+        self.assertEqual(self.nuitees(0, 1, 2), [1, 1, None])
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=self.debut).revenu_hebergement, Decimal('250000'))
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=date.today()).reservations_creees, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.date_debut_sejour, reservation.date_fin_sejour = self.jour(1), self.jour(4)
+            reservation.save()
+        self.assertEqual(self.nuitees(0, 1, 2, 3), [0, 1, 1, 1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            annuler_reservation(reservation.pk, 'Test')
+        self.assertEqual(self.nuitees(0, 1, 2, 3), [0, 0, 0, 0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            arrivee = self.creer_reservation(self.creer_client(2), self.chambre, self.utilisateur)
+            sejour = effectuer_checkin(arrivee.pk, timezone.now(), 1)
+            Paiement.objects.create(sejour=sejour, montant=Decimal('100000'), mode_paiement='ESPECES', statut='VALIDE')
+        aujourd_hui = StatistiqueJournaliere.objects.get(jour=date.today())
+        self.assertEqual((aujourd_hui.nuitees_occupees, aujourd_hui.revenus_especes), (1, Decimal('100000')))
+
+    def test_recalcul_apres_validation(self):
+        with CaptureQueriesContext(connection) as requetes:
+            with self.captureOnCommitCallbacks() as rappels:
+                self.creer_reservation(self.creer_client(1), self.chambre, self.utilisateur, debut=self.debut)
+        # Rien n'est écrit dans le résumé pendant la transaction de la réservation
+        self.assertFalse(any('statistiquejournaliere' in requete['sql'] for requete in requetes))
+        self.assertEqual(self.nuitees(0), [None])
+
+        for rappel in rappels:
+            rappel()
+        self.assertEqual(self.nuitees(0, 1), [1, 1])
+
+    def test_inventaire_des_jours_passes_conserve(self):
+        hier = date.today() - timedelta(days=1)
+        StatistiqueJournaliere.objects.create(jour=hier, chambres_total=40)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creer_reservation(self.creer_client(1), self.chambre, self.utilisateur, debut=hier, nuits=3)
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=hier).chambres_total, 40)
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=hier).nuitees_occupees, 1)
+        self.assertEqual(StatistiqueJournaliere.objects.get(jour=date.today()).chambres_total, 1)
+
+    def test_reconstruction_complete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creer_reservation(self.creer_client(1), self.chambre, self.utilisateur, debut=self.debut, nuits=3)
+            arrivee = self.creer_reservation(self.creer_client(2), self.chambre, self.utilisateur)
+            sejour = effectuer_checkin(arrivee.pk, timezone.now(), 1)
+            Paiement.objects.create(sejour=sejour, montant=Decimal('50000'), mode_paiement='CARTE', statut='VALIDE')
+        champs = ['jour', 'chambres_total', 'nuitees_occupees', 'revenu_hebergement',
+                  'reservations_creees', 'revenus_carte']
+        attendu = list(StatistiqueJournaliere.objects.order_by('jour').values_list(*champs))
+
+        StatistiqueJournaliere.objects.all().delete()
+        call_command('recalculer_statistiques', stdout=StringIO())
+        # La reconstruction couvre aussi les jours sans activité, restés à zéro
+        reconstruit = StatistiqueJournaliere.objects.order_by('jour')
+        self.assertEqual(list(reconstruit.filter(jour__in=[ligne[0] for ligne in attendu]).values_list(*champs)), attendu)
+        self.assertFalse(reconstruit.exclude(jour__in=[ligne[0] for ligne in attendu]).exclude(nuitees_occupees=0).exists())
+
+
+class OutilsBenchTests(DonneesTestMixin, TestCase):
+    """Outils communs aux commandes de benchmark"""
+
+    def test_mesurer_compte_au_dela_du_journal_de_django(self):
+        # Le journal des requêtes de Django ne garde que les 9000 dernières
+        resultat, requetes, _ = mesurer(lambda: sum(Chambre.objects.exists() for _ in range(9500)), 2)
+        self.assertEqual(resultat, 0)
+        self.assertEqual(requetes, 9500)
+
+
+    def test_generer_hotel_coherent(self):
+        volumes = generer_hotel(chambres=3, clients=20, sejours_par_chambre=4, reservations_futures=2)
+        self.assertEqual(volumes, {'chambres': 3, 'clients': 20, 'reservations': 18, 'sejours': 12,
+                                   'paiements': 24})
+
+        # Aucun chevauchement sur une chambre, passé comme futur
+        for chambre in Chambre.objects.all():
+            periodes = list(Reservation.objects.filter(chambre=chambre).order_by(
+                'date_debut_sejour').values_list('date_debut_sejour', 'date_fin_sejour'))
+            for (_, fin), (debut, _) in zip(periodes, periodes[1:]):
+                self.assertLessEqual(fin, debut)
+
+        # Séjours passés soldés ; nuits réservées pour les seules réservations à venir
+        self.assertFalse(Sejour.objects.exclude(montant_paye=F('montant_du')).exists())
+        self.assertFalse(Sejour.objects.filter(date_checkout__isnull=True).exists())
+        futures = Reservation.objects.filter(statut__in=['CONFIRMEE', 'EN_ATTENTE'])
+        self.assertEqual(NuitReservee.objects.count(), sum(r.nombre_nuits for r in futures))
+        # Résumé journalier : nuits occupées, passées et à venir
+        self.assertEqual(
+            StatistiqueJournaliere.objects.aggregate(total=Sum('nuitees_occupees'))['total'],
+            Reservation.objects.filter(statut__in=STATUTS_OCCUPATION).aggregate(total=Sum('nombre_nuits'))['total'],
+        )
+
+        # Fenêtre libre pour les parcours de réception
+        aujourd_hui = date.today()
+        self.assertEqual(chambres_disponibles(aujourd_hui, aujourd_hui + timedelta(days=30)).count(), 3)
+
+    # SessionDjango se présente comme localhost, hôte du serveur de développement
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_parcours_de_reception(self):
+        generer_hotel(chambres=2, clients=20, sejours_par_chambre=2)
+        User.objects.create_superuser('charge', '', 'charge')
+        journal = Journal()
+        ParcoursReception(SessionDjango(), journal, random.Random(42), 'charge', 'charge').executer()
+
+        rapport = journal.rapport(1.0, {})
+        self.assertEqual(list(rapport['etapes']), [
+            'connexion', 'connexion_post', 'dashboard', 'recherche_client', 'chambres_disponibles',
+            'reservation_formulaire', 'reservation_create', 'sejour_checkin_formulaire', 'sejour_checkin',
+            'paiement_create', 'sejour_checkout_formulaire', 'sejour_checkout', 'rapports',
+        ])
+        for nom, etape in rapport['etapes'].items():
+            with self.subTest(etape=nom):
+                self.assertEqual((etape['nb'], etape['echecs']), (1, 0))
+                self.assertIsNotNone(etape['requetes_sql'])
+        self.assertGreater(rapport['etapes']['reservation_create']['requetes_sql'], 0)
+        sejour = Sejour.objects.get(date_checkout__isnull=False, reservation__date_debut_sejour=date.today())
+        self.assertEqual(sejour.montant_paye, sejour.montant_du)
+
+        # Référence identique : aucune régression ; une étape de plus en SQL est signalée
+        self.assertEqual(comparer(rapport, rapport), [])
+        reference = deepcopy(rapport)
+        reference['etapes']['rapports']['requetes_sql'] -= 1
+        self.assertEqual(len(comparer(rapport, reference)), 1)
+
+class ProfilSqliteTests(SimpleTestCase):
+    """PRAGMA du profil de production et reprise sur « database is locked »"""
+
+    # Hors de tout bloc atomic : la reprise ne rejoue que des transactions complètes
+    databases = {'default'}
+
+    def echouer(self, appels, message, succes_au=None):
+        def operation():
+            appels.append(message)
+            if len(appels) != succes_au:
+                raise OperationalError(message)
+            return 'ok'
+        return operation
+
+    def test_pragmas_appliques_a_chaque_connexion(self):
+        pragmas = {'busy_timeout': 1234, 'cache_size': -2000, 'temp_store': 'MEMORY'}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            connexion = connections.create_connection('default')
+            try:
+                valeurs = []
+                with connexion.cursor() as curseur:
+                    for nom in pragmas:
+                        curseur.execute(f'PRAGMA {nom}')
+                        valeurs.append(curseur.fetchone()[0])
+            finally:
+                connexion.close()
+        # temp_store = MEMORY vaut 2
+        self.assertEqual(valeurs, [1234, -2000, 2])
+
+    def test_verrou_rejoue_puis_reussi(self):
+        appels = []
+        operation = self.echouer(appels, 'database is locked', succes_au=3)
+        self.assertEqual(reprise_sur_verrou(operation, delai=0)(), 'ok')
+        self.assertEqual(len(appels), 3)
+
+    def test_verrou_persistant_propage(self):
+        appels = []
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            reprise_sur_verrou(self.echouer(appels, 'database is locked'), delai=0)()
+        self.assertEqual(len(appels), TENTATIVES)
+
+        # Les autres erreurs ne sont pas rejouées
+        appels = []
+        with self.assertRaisesMessage(OperationalError, 'no such table'):
+            reprise_sur_verrou(self.echouer(appels, 'no such table: chambre'), delai=0)()
+        self.assertEqual(len(appels), 1)
+
+
+class RoutageRapportsTests(DonneesTestMixin, TestCase):
+    """Lectures des rapports sur la base dédiée, écritures et données fraîches sur default"""
+
+    def setUp(self):
+        # La base des rapports de test est un miroir de default : on la force ici
+        patcheur = patch('gestion.routage.alias_rapports', return_value=ALIAS_RAPPORTS)
+        patcheur.start()
+        self.addCleanup(patcheur.stop)
+
+    def test_lectures_et_ecritures(self):
+        with lecture_rapports() as base:
+            self.assertEqual(base, ALIAS_RAPPORTS)
+            self.assertEqual(StatistiqueJournaliere.objects.all().db, ALIAS_RAPPORTS)
+            self.assertEqual(Reservation.objects.all().db, ALIAS_RAPPORTS)
+            # Sessions, comptes et droits restent sur la base principale
+            for modele in (User, Permission, Session, Utilisateur):
+                with self.subTest(modele=modele.__name__):
+                    self.assertEqual(modele.objects.all().db, 'default')
+            self.assertEqual(RouteurRapports().db_for_write(StatistiqueJournaliere), 'default')
+        # Hors d'un bloc de rapports, tout est lu sur default
+        self.assertEqual(StatistiqueJournaliere.objects.all().db, 'default')
+
+    def test_cookie_apres_ecriture(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse'))
+        self.client.get(reverse('client_list'))
+        self.assertNotIn(COOKIE_ECRITURE, self.client.cookies)
+
+        response = self.client.post(reverse('client_create'), {
+            'nom': 'Camara', 'prenom': 'Fatou', 'email': 'fatou@exemple.gn',
+            'telephone': '+224620000001', 'piece_identite': 'CNI', 'numero_piece': 'CNI999999',
+            'adresse': 'Ratoma', 'ville': 'Conakry', 'pays': 'Guinée', 'date_naissance': '1992-04-01',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(COOKIE_ECRITURE, self.client.cookies)
+
+        # La requête suivante, porteuse du cookie, lit ses propres écritures sur default
+        requete = RequestFactory().get(reverse('rapports'))
+        requete.COOKIES[COOKIE_ECRITURE] = self.client.cookies[COOKIE_ECRITURE].value
+        with lecture_rapports(requete) as base:
+            self.assertEqual(base, 'default')
+            self.assertEqual(Client.objects.all().db, 'default')
+        with lecture_rapports(RequestFactory().get(reverse('rapports'))) as base:
+            self.assertEqual(base, ALIAS_RAPPORTS)
+
+
+@override_settings(INSTRUMENTATION_ACTIVE=True)
+class InstrumentationTests(DonneesTestMixin, TestCase):
+    """En-tête Server-Timing et page des performances"""
+
+    def setUp(self):
+        REGISTRE.vider()
+        self.addCleanup(REGISTRE.vider)
+        self.creer_client(1)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse'))
+
+    def obtenir(self, nom):
+        with self.assertLogs('gestion.instrumentation', 'INFO') as journal:
+            response = self.client.get(reverse(nom))
+        self.assertIn(f'vue={nom} ', journal.output[0])
+        return response
+
+    def test_en_tete_server_timing(self):
+        response = self.obtenir('client_list')
+        entrees = re.fullmatch(
+            r'sql;dur=([\d.]+);desc="(\d+) requetes", rendu;dur=([\d.]+), total;dur=([\d.]+)',
+            response['Server-Timing'],
+        )
+        self.assertIsNotNone(entrees, response['Server-Timing'])
+        self.assertGreater(int(entrees[2]), 0)
+        # Le temps de rendu inclut le SQL évalué par le gabarit : seul le total le borne
+        self.assertLessEqual(float(entrees[3]), float(entrees[4]))
+
+    def test_page_des_performances(self):
+        self.obtenir('client_list')
+        self.obtenir('client_list')
+        response = self.obtenir('performances')
+        self.assertEqual(response.status_code, 200)
+        vues = {ligne['vue']: ligne for ligne in response.context['vues']}
+        self.assertEqual(vues['client_list']['nb'], 2)
+        self.assertGreater(vues['client_list']['requetes_moyen'], 0)
+        self.assertGreater(vues['client_list']['rendu_moyen'], 0)
+        self.assertContains(response, 'client_list')
+
+
+class IndexTests(TestCase):
+    """Plans d'exécution des requêtes critiques : index composites et partiel"""
+
+    def verifier_plan(self, queryset, index):
+        self.assertIn(f'USING INDEX {index}', queryset.explain().replace('COVERING INDEX', 'INDEX'))
+
+    def test_requetes_critiques_indexees(self):
+        today = date.today()
+        self.verifier_plan(chambres_disponibles(today, today + timedelta(days=3)), 'reservation_dispo_idx')
+        self.verifier_plan(Reservation.objects.filter(statut='CONFIRMEE', date_debut_sejour=today),
+                           'reservation_arrivee_idx')
+        self.verifier_plan(Reservation.objects.filter(statut='CONFIRMEE', date_fin_sejour=today),
+                           'reservation_depart_idx')
+        self.verifier_plan(Paiement.objects.filter(statut='VALIDE', date_paiement__gte=timezone.now()),
+                           'paiement_statut_date_idx')
+        self.verifier_plan(Sejour.objects.filter(date_checkout__isnull=True), 'sejour_checkout_idx')
+
+    def test_pagination_sans_tri(self):
+        for queryset, index in (
+            (Client.objects.order_by('-date_inscription', '-id'), 'client_inscription_idx'),
+            (Reservation.objects.order_by('-date_reservation', '-id'), 'reservation_creation_idx'),
+            (Sejour.objects.order_by('-date_checkin', '-id'), 'sejour_checkin_idx'),
+            (Paiement.objects.order_by('-date_paiement', '-id'), 'paiement_date_idx'),
+        ):
+            with self.subTest(index=index):
+                plan = queryset[:50].explain()
+                self.verifier_plan(queryset[:50], index)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_index_partiel_des_sejours_en_cours(self):
+        with connection.cursor() as curseur:
+            curseur.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'sejour_actif_idx'")
+            (sql,) = curseur.fetchone()
+        self.assertRegex(sql, r'WHERE "date_checkout" IS NULL')
+
+
+class RequetesN1Tests(DonneesTestMixin, TestCase):
+    """Le nombre de requêtes d'une page ne dépend pas du nombre de lignes affichées"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        cls.sejour = cls.creer_sejour(0)
+
+    @classmethod
+    def creer_sejour(cls, numero):
+        """Réservation avec séjour, paiement, service et utilisateur"""
+        chambre = cls.creer_chambre(f'{100 + numero}')
+        client = cls.creer_client(numero)
+        reservation = cls.creer_reservation(client, chambre, cls.admin)
+        sejour = effectuer_checkin(reservation.pk, timezone.now(), 1)
+        cls.ajouter_lignes(sejour, 1)
+        user = User.objects.create_user(f'recept{numero}', first_name='Fatou', last_name=f'Bah{numero}')
+        Utilisateur.objects.create(user=user, telephone='+224600000000', role='RECEPTIONNISTE')
+        return sejour
+
+    @classmethod
+    def ajouter_lignes(cls, sejour, nombre):
+        for _ in range(nombre):
+            Paiement.objects.create(sejour=sejour, montant=Decimal('10000'), mode_paiement='ESPECES')
+            service = ServiceSupplementaire.objects.create(
+                nom_service='Blanchisserie', description='Linge', prix=Decimal('20000')
+            )
+            ReservationService.objects.create(
+                reservation=sejour.reservation, service=service,
+                quantite=1, prix_unitaire=service.prix
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def compter(self, url):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(requetes)
+
+    def verifier_constant(self, urls, ajouter):
+        """Compte les requêtes de chaque page, ajoute des lignes, puis recompte"""
+        # Premier passage hors mesure : remplit le cache des ContentType de l'admin
+        for url in urls:
+            self.compter(url)
+        avant = {url: self.compter(url) for url in urls}
+        ajouter()
+        apres = {url: self.compter(url) for url in urls}
+        self.assertEqual(apres, avant)
+
+    def test_listes(self):
+        urls = [
+            reverse('client_list'), reverse('chambre_list'), reverse('reservation_list'),
+            reverse('sejour_list'), reverse('paiement_list'),
+        ]
+        self.verifier_constant(urls, lambda: [self.creer_sejour(i) for i in range(1, 4)])
+
+    def test_listes_administration(self):
+        urls = [
+            reverse(f'admin:gestion_{modele}_changelist')
+            for modele in ('utilisateur', 'client', 'chambre', 'reservation',
+                           'sejour', 'paiement', 'reservationservice')
+        ]
+        self.verifier_constant(urls, lambda: [self.creer_sejour(i) for i in range(1, 4)])
+
+    def test_fiches(self):
+        reservation = self.sejour.reservation
+        urls = [
+            reverse('reservation_detail', args=[reservation.pk]),
+            reverse('sejour_detail', args=[self.sejour.pk]),
+            reverse('client_detail', args=[reservation.client_id]),
+            reverse('chambre_detail', args=[reservation.chambre_id]),
+        ]
+
+        def ajouter():
+            self.ajouter_lignes(self.sejour, 3)
+            # Réservations passées du même client dans la même chambre
+            for i in range(1, 4):
+                self.creer_reservation(
+                    reservation.client, reservation.chambre, self.admin,
+                    debut=date.today() - timedelta(days=10 * i), statut='TERMINEE'
+                )
+
+        self.verifier_constant(urls, ajouter)
+
+    def test_formulaires_administration(self):
+        urls = [
+            reverse('admin:gestion_reservation_change', args=[self.sejour.reservation_id]),
+            reverse('admin:gestion_sejour_change', args=[self.sejour.pk]),
+            reverse('admin:gestion_paiement_add'),
+        ]
+        self.verifier_constant(urls, lambda: [self.creer_sejour(i) for i in range(1, 4)])
+
+    def test_formulaires(self):
+        urls = [
+            reverse('reservation_update', args=[self.sejour.reservation_id]),
+            reverse('sejour_create'),
+        ]
+
+        def ajouter():
+            for i in range(1, 4):
+                self.creer_sejour(i)
+                # Réservations confirmées sans séjour, proposées au check-in
+                self.creer_reservation(self.creer_client(10 + i), self.creer_chambre(f'{200 + i}'), self.admin)
+
+        self.verifier_constant(urls, ajouter)
+
+    def test_devis_des_chambres_libres(self):
+        debut = date.today() + timedelta(days=30)
+        url = f"{reverse('reservation_create')}?date_debut={debut}&date_fin={debut + timedelta(days=3)}"
+        self.verifier_constant([url], lambda: [self.creer_chambre(f'{300 + i}') for i in range(3)])
+
+    def test_choix_des_formulaires(self):
+        def rendre():
+            with CaptureQueriesContext(connection) as requetes:
+                for formulaire in (PaiementForm(), SejourForm(), ReservationForm()):
+                    formulaire.as_p()
+            return len(requetes)
+
+        avant = rendre()
+        for i in range(1, 4):
+            self.creer_sejour(i)
+            self.creer_reservation(self.creer_client(10 + i), self.creer_chambre(f'{200 + i}'), self.admin)
+        self.assertEqual(rendre(), avant)
+
+
+def executer_en_parallele(taches):
+    """Lance les tâches simultanément dans des threads ; retourne (résultats, refus, erreurs)"""
+    resultats, refus, erreurs = [], [], []
+    depart = threading.Barrier(len(taches))
+
+    def executer(tache):
+        try:
+            depart.wait()
+            resultats.append(tache())
+        except OperationImpossible as erreur:
+            refus.append(erreur)
+        except Exception as erreur:
+            erreurs.append(erreur)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=executer, args=(tache,)) for tache in taches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultats, refus, erreurs
+
+
+class ReferencePaiementTests(DonneesTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        utilisateur = User.objects.create_user('reception')
+        reservation = self.creer_reservation(
+            self.creer_client(1), self.creer_chambre('101'), utilisateur
+        )
+        self.sejour = Sejour.objects.create(
+            reservation=reservation,
+            date_arrivee_effective=timezone.now(),
+            nombre_personnes=1,
+        )
+
+    def test_references_uniques_en_concurrence(self):
+        nombre_threads, paiements_par_thread = 8, 10
+        erreurs = []
+        depart = threading.Barrier(nombre_threads)
+
+        def creer_paiements():
+            try:
+                depart.wait()
+                for _ in range(paiements_par_thread):
+                    Paiement.objects.create(
+                        sejour=self.sejour, montant=Decimal('1000'), mode_paiement='ESPECES'
+                    )
+            except Exception as erreur:
+                erreurs.append(erreur)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=creer_paiements) for _ in range(nombre_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erreurs, [])
+        references = list(Paiement.objects.values_list('reference_transaction', flat=True))
+        self.assertEqual(len(references), nombre_threads * paiements_par_thread)
+        self.assertEqual(len(set(references)), len(references))
+        prefixe = f"PAY-{timezone.localdate():%Y%m%d}-"
+        self.assertEqual(
+            sorted(references),
+            [f"{prefixe}{numero:06d}" for numero in range(1, len(references) + 1)]
+        )
+
+
+class ReceptionConcurrenteTests(DonneesTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        self.utilisateur = User.objects.create_user('reception')
+        self.chambre = self.creer_chambre('201')
+
+    def checkin(self, reservation):
+        return lambda: effectuer_checkin(reservation.pk, timezone.now(), 1)
+
+    def test_double_checkin_meme_reservation(self):
+        reservation = self.creer_reservation(self.creer_client(1), self.chambre, self.utilisateur)
+
+        resultats, refus, erreurs = executer_en_parallele([self.checkin(reservation)] * 10)
+
+        self.assertEqual(erreurs, [])
+        self.assertEqual(len(resultats), 1)
+        self.assertEqual(len(refus), 9)
+        self.assertEqual(Sejour.objects.count(), 1)
+
+    def test_pas_de_double_occupation_de_chambre(self):
+        # Réservations successives de la même chambre, check-ins et annulations mêlés
+        reservations = [
+            self.creer_reservation(
+                self.creer_client(i), self.chambre, self.utilisateur,
+                debut=date.today() + timedelta(days=3 * i)
+            )
+            for i in range(12)
+        ]
+        taches = [self.checkin(reservation) for reservation in reservations]
+        taches += [
+            lambda reservation=reservation: annuler_reservation(reservation.pk, 'Test')
+            for reservation in reservations[::3]
+        ]
+
+        resultats, refus, erreurs = executer_en_parallele(taches)
+
+        self.assertEqual(erreurs, [])
+        sejours_actifs = Sejour.objects.filter(
+            reservation__chambre=self.chambre, date_checkout__isnull=True
+        )
+        self.assertLessEqual(sejours_actifs.count(), 1)
+        # Aucun séjour actif ne doit subsister sur une réservation annulée
+        self.assertFalse(sejours_actifs.filter(reservation__statut='ANNULEE').exists())
+        self.chambre.refresh_from_db()
+        self.assertEqual(self.chambre.statut, 'OCCUPEE' if sejours_actifs.exists() else 'DISPONIBLE')
+
+
+class NuitsReserveesTests(DonneesTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        self.utilisateur = User.objects.create_user('reception')
+        self.chambre = self.creer_chambre('301')
+
+    def test_reservations_concurrentes_meme_chambre(self):
+        debut = date.today() + timedelta(days=5)
+        taches = [
+            lambda i=i: self.creer_reservation(
+                self.creer_client(i), self.chambre, self.utilisateur, debut=debut + timedelta(days=i % 2)
+            )
+            for i in range(10)
+        ]
+
+        resultats, refus, erreurs = executer_en_parallele(taches)
+
+        self.assertTrue(all(isinstance(erreur, ChambreIndisponible) for erreur in erreurs), erreurs)
+        self.assertEqual(len(resultats), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_annulation_libere_les_nuits(self):
+        reservation = self.creer_reservation(self.creer_client(1), self.chambre, self.utilisateur)
+        with self.assertRaises(ChambreIndisponible):
+            self.creer_reservation(self.creer_client(2), self.chambre, self.utilisateur)
+
+        annuler_reservation(reservation.pk, 'Test')
+
+        self.creer_reservation(self.creer_client(3), self.chambre, self.utilisateur)
+
+
+class CatalogueImportTests(DonneesTestMixin, TransactionTestCase):
+    """Chambres insérées en masse visibles du catalogue partagé (hors transaction)"""
+
+    def test_chambres_importees_reservables(self):
+        admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        client = self.creer_client(1)
+        self.creer_chambre('101')
+        self.assertEqual(catalogue().compter(), 1)
+
+        lignes = [
+            (numero, {'numero_chambre': f'20{numero}', 'type_chambre': 'double', 'prix_nuit': '300000',
+                      'nombre_lits': '2', 'superficie': '25', 'etage': '2'})
+            for numero in (1, 2)
+        ]
+        rapport = creer_importateur('chambres').importer(lignes)
+        self.assertEqual(rapport.inserees, 2)
+        self.assertEqual(catalogue().compter(), 3)
+
+        chambre = Chambre.objects.get(numero_chambre='202')
+        debut = date.today() + timedelta(days=3)
+        self.client.force_login(admin)
+        self.client.post(reverse('reservation_create'), {
+            'client': client.pk, 'chambre': chambre.pk, 'statut': 'CONFIRMEE',
+            'date_debut_sejour': debut.isoformat(),
+            'date_fin_sejour': (debut + timedelta(days=2)).isoformat(),
+        })
+        reservation = Reservation.objects.get(chambre=chambre)
+        self.assertEqual(self.client.get(reverse('sejour_checkin', args=[reservation.pk])).status_code, 200)
+
+
+class AgregatsParallelesTests(DonneesTestMixin, TransactionTestCase):
+    """Vues asynchrones : agrégats lus par le pool de threads, mêmes valeurs qu'à la suite"""
+
+    CLES = {
+        'dashboard': [
+            'total_chambres', 'chambres_disponibles', 'chambres_occupees', 'reservations_aujourdhui',
+            'departs_aujourdhui', 'sejours_actifs', 'revenus_mois', 'total_clients', 'total_reservations',
+            'reservations_confirmees', 'revenus_total', 'chambres_par_type', 'reservations_par_mois',
+        ],
+        'rapports': [
+            'total_clients', 'total_reservations', 'reservations_confirmees', 'revenus_total',
+            'revenus_par_mode', 'chambres_par_type', 'reservations_par_mois', 'taux_occupation',
+            'adr', 'revpar', 'nuitees_occupees', 'revenu_moyen',
+        ],
+    }
+
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@exemple.gn', 'motdepasse')
+        for i in range(4):
+            chambre = self.creer_chambre(f'{100 + i}', type_chambre='DOUBLE' if i % 2 else 'SIMPLE')
+            reservation = self.creer_reservation(self.creer_client(i), chambre, admin, nuits=i + 1)
+        sejour = effectuer_checkin(reservation.pk, timezone.now(), 1)
+        Paiement.objects.create(sejour=sejour, montant=Decimal('150000'), mode_paiement='CARTE', statut='VALIDE')
+        self.client.force_login(admin)
+        # Threads du pool et connexions ouvertes par ce test
+        self.addCleanup(arreter_pool)
+        self.threads = set()
+        connection_created.connect(self.noter_thread)
+        self.addCleanup(connection_created.disconnect, self.noter_thread)
+
+    def noter_thread(self, sender, connection, **kwargs):
+        self.threads.add(threading.current_thread().name)
+
+    def valeurs(self, page):
+        cache.clear()
+        response = self.client.get(reverse(page))
+        self.assertEqual(response.status_code, 200)
+        return {cle: response.context[cle] for cle in self.CLES[page]}
+
+    def test_memes_valeurs_qu_en_sequentiel(self):
+        for page in self.CLES:
+            with self.subTest(page=page):
+                with override_settings(AGREGATS_PARALLELES=1):
+                    attendu = self.valeurs(page)
+                arreter_pool()
+                self.threads.clear()
+                self.assertEqual(self.valeurs(page), attendu)
+                # Les agrégats ont bien été lus par les threads du pool, sur leurs connexions
+                self.assertTrue(any(nom.startswith('agregats') for nom in self.threads), self.threads)
+        self.assertEqual(attendu['total_reservations'], 4)
@@ -11,6 +11,7 @@ urlpatterns = [
     
     # Clients
     path('clients/', views.client_list, name='client_list'),
+    path('clients/export/', views.client_export, name='client_export'),
     path('clients/create/', views.client_create, name='client_create'),
     path('clients/<int:pk>/', views.client_detail, name='client_detail'),
     path('clients/<int:pk>/update/', views.client_update, name='client_update'),
@@ -25,12 +26,23 @@ urlpatterns = [
     
     # Réservations
     path('reservations/', views.reservation_list, name='reservation_list'),
+    path('reservations/export/', views.reservation_export, name='reservation_export'),
     path('reservations/create/', views.reservation_create, name='reservation_create'),
     path('reservations/<int:pk>/', views.reservation_detail, name='reservation_detail'),
     path('reservations/<int:pk>/update/', views.reservation_update, name='reservation_update'),
     path('reservations/<int:pk>/delete/', views.reservation_delete, name='reservation_delete'),
     path('reservations/<int:pk>/cancel/', views.reservation_cancel, name='reservation_cancel'),
     
+    # Planning des chambres (grille chambres × nuits)
+    path('planning/', views.planning, name='planning'),
+    path('api/planning/', views.api_planning, name='api_planning'),
+    
+    # API disponibilité
+    path('api/chambres/disponibles/', views.api_chambres_disponibles, name='api_chambres_disponibles'),
+    
+    # API recherche clients (autocomplétion)
+    path('api/clients/recherche/', views.api_clients_recherche, name='api_clients_recherche'),
+    
     # Séjours
     path('sejours/', views.sejour_list, name='sejour_list'),
     path('sejours/create/', views.sejour_create, name='sejour_create'),
@@ -44,10 +56,14 @@ urlpatterns = [
     
     # Paiements
     path('paiements/', views.paiement_list, name='paiement_list'),
+    path('paiements/export/', views.paiement_export, name='paiement_export'),
     path('paiements/create/', views.paiement_create, name='paiement_create'),
     path('paiements/<int:pk>/update/', views.paiement_update, name='paiement_update'),
     path('paiements/<int:pk>/delete/', views.paiement_delete, name='paiement_delete'),
     
     # Rapports
     path('rapports/', views.rapports, name='rapports'),
+    
+    # Performances (instrumentation, réservé au personnel)
+    path('performances/', views.performances, name='performances'),
 ]
\ No newline at end of file
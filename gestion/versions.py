@@ -0,0 +1,64 @@
+"""
+Tampons de version partagés par tous les processus qui servent la même base.
+
+Un tampon est un petit fichier à côté de la base SQLite, remplacé
+atomiquement par un jeton aléatoire à chaque modification des données
+qu'il protège (catalogue des chambres, droits des utilisateurs, tarifs,
+statistiques du tableau de bord). Chaque processus le relit à chaque
+accès, une lecture de fichier sans requête, et jette ses copies en
+mémoire quand il a changé.
+
+Le cache de Django est local au processus (locmem) : il ne peut pas porter
+seul une version commune à plusieurs processus.
+"""
+
+import os
+import threading
+import uuid
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+def fichier(nom):
+    """Chemin du tampon nom, ou None si la base ne permet pas de tampon partagé"""
+    base = connections[DEFAULT_DB_ALIAS]
+    if base.vendor != 'sqlite' or base.is_in_memory_db():
+        return None
+    return f"{base.settings_dict['NAME']}.{nom}"
+
+
+def _ecrire(chemin):
+    # Remplacement atomique : un lecteur ne voit jamais de fichier partiel
+    temporaire = f'{chemin}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporaire, 'w') as sortie:
+        sortie.write(uuid.uuid4().hex)
+    os.replace(temporaire, chemin)
+
+
+def lire(nom):
+    """Tampon courant (créé au premier accès), ou None sans tampon partagé"""
+    chemin = fichier(nom)
+    if chemin is None:
+        return None
+    try:
+        with open(chemin) as entree:
+            return entree.read()
+    except FileNotFoundError:
+        _ecrire(chemin)
+        with open(chemin) as entree:
+            return entree.read()
+
+
+def changer(nom):
+    """
+    Change le tampon tout de suite, puis de nouveau après validation.
+
+    Le second changement écarte une copie rechargée par un autre processus
+    avant que la transaction ne soit visible.
+    """
+    chemin = fichier(nom)
+    if chemin is None:
+        return
+    _ecrire(chemin)
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        transaction.on_commit(lambda: _ecrire(chemin))
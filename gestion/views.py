@@ -1,13 +1,33 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.db.models import Sum, Count, Q
+from django.http import JsonResponse
+from django.db.models import Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import date, datetime
-from .models import Client, Chambre, Reservation, Sejour, Paiement, ServiceSupplementaire, ReservationService
-from .forms import ClientForm, ChambreForm, ReservationForm, SejourForm, PaiementForm
+from datetime import date, datetime, timedelta
+import asyncio
+from asgiref.sync import sync_to_async
+from .models import Client, Chambre, Reservation, Sejour, Paiement, ServiceSupplementaire, ReservationService, StatistiqueJournaliere
+from .forms import ClientForm, ChambreForm, ReservationForm, SejourForm, PaiementForm, DisponibiliteChambreForm, PlanningForm
+from .disponibilite import ChambreIndisponible, chambres_disponibles
+from .catalogue import catalogue
+from .droits import est_admin
+from .tarifs import coter, prix_sejour
+from .planning import LEGENDE
+from .pagination import paginer
+from .filtres import filtrer_clients, filtrer_paiements, filtrer_reservations
+from .exports import reponse_export
+from .recherche import LIMITE_SUGGESTIONS, suggestions_clients
+from .statistiques import astatistiques_generales, astatistiques_admin
+from .parallele import calculer_en_parallele
+from .references import allouer_reference
+from .sqlite import reprise_sur_verrou
+from .routage import lecture_rapports, sur_base_rapports
+from .instrumentation import REGISTRE, instrumentation_active
+from .reception import OperationImpossible, annuler_reservation, effectuer_checkin, effectuer_checkout
 
 def login_view(request):
     """Vue de connexion pour les utilisateurs"""
@@ -39,126 +59,74 @@ def logout_view(request):
     return redirect('login')
 
 @login_required
-def dashboard(request):
-    # Statistiques chambres
-    total_chambres = Chambre.objects.count()
-    chambres_disponibles = Chambre.objects.filter(statut='DISPONIBLE').count()
-    chambres_occupees = Chambre.objects.filter(statut='OCCUPEE').count()
-    
-    # Arrivées et départs aujourd'hui
-    today = date.today()
-    reservations_aujourdhui = Reservation.objects.filter(
-        date_debut_sejour=today,
-        statut='CONFIRMEE'
-    ).count()
-    
-    departs_aujourdhui = Reservation.objects.filter(
-        date_fin_sejour=today,
-        statut='CONFIRMEE'
-    ).count()
-    
-    # Séjours actifs (ceux qui n'ont pas encore fait de check-out)
-    sejours_actifs = Sejour.objects.filter(date_checkout__isnull=True).count()
-    
-    # Revenus du mois
-    revenus_mois = Paiement.objects.filter(
-        date_paiement__year=today.year,
-        date_paiement__month=today.month,
-        statut='VALIDE'
-    ).aggregate(total=Sum('montant'))['total'] or 0
-    
-    # Réservations récentes
-    reservations_recentes = Reservation.objects.select_related(
-        'client', 'chambre'
-    ).order_by('-date_reservation')[:5]
-    
-    # Statistiques générales
-    total_clients = Client.objects.count()
-    total_reservations = Reservation.objects.count()
-    reservations_confirmees = Reservation.objects.filter(statut='CONFIRMEE').count()
-    
-    # Vérifier si l'utilisateur est admin ou réceptionniste
-    is_admin = request.user.is_superuser or (
-        hasattr(request.user, 'utilisateur') and 
-        request.user.utilisateur.role == 'ADMIN'
-    )
-    
-    # Données spécifiques aux admins
+async def dashboard(request):
+    # Utilisateur déjà chargé par login_required : évite une seconde lecture au rendu
+    request.user = user = await request.auser()
+    
+    # Vérifier si l'utilisateur est admin ou réceptionniste (droits en cache)
+    is_admin = await sync_to_async(est_admin)(user)
+    
+    # Statistiques communes, réservations récentes et données admin calculées
+    # simultanément (agrégats regroupés et mis en cache)
+    taches = [
+        astatistiques_generales(),
+        sync_to_async(list)(Reservation.objects.select_related(
+            'client', 'chambre', 'sejour'
+        ).order_by('-date_reservation')[:5]),
+    ]
     if is_admin:
-        # Revenus total (seulement pour admin)
-        revenus_total = Paiement.objects.filter(statut='VALIDE').aggregate(
-            total=Sum('montant')
-        )['total'] or 0
-        
-        # Chambres par type
-        chambres_par_type = Chambre.objects.values('type_chambre').annotate(
-            count=Count('id')
-        )
-        
-        # Réservations par mois (derniers 6 mois)
-        reservations_par_mois = Reservation.objects.annotate(
-            mois=TruncMonth('date_reservation')
-        ).values('mois').annotate(count=Count('id')).order_by('-mois')[:6]
-    else:
-        # Pour réceptionnistes : pas d'accès aux données sensibles
-        revenus_total = None
-        chambres_par_type = None
-        reservations_par_mois = None
+        # Agrégats lourds : lus sur la base des rapports (la tâche copie le contexte)
+        with lecture_rapports(request):
+            taches.append(asyncio.ensure_future(astatistiques_admin()))
+    statistiques, reservations_recentes, *admin = await asyncio.gather(*taches)
+    
+    # Pour réceptionnistes : pas d'accès aux données sensibles
+    donnees_admin = admin[0] if is_admin else {
+        'revenus_total': None,
+        'chambres_par_type': None,
+        'reservations_par_mois': None,
+    }
     
-    # Vérifier les permissions de l'utilisateur
+    # Vérifier les permissions de l'utilisateur (sans requête : gestion.droits)
     user_permissions = {
-        'can_add_client': request.user.has_perm('gestion.add_client'),
-        'can_add_chambre': request.user.has_perm('gestion.add_chambre'),
-        'can_add_reservation': request.user.has_perm('gestion.add_reservation'),
-        'can_add_sejour': request.user.has_perm('gestion.add_sejour'),
-        'can_add_paiement': request.user.has_perm('gestion.add_paiement'),
+        'can_add_client': await user.ahas_perm('gestion.add_client'),
+        'can_add_chambre': await user.ahas_perm('gestion.add_chambre'),
+        'can_add_reservation': await user.ahas_perm('gestion.add_reservation'),
+        'can_add_sejour': await user.ahas_perm('gestion.add_sejour'),
+        'can_add_paiement': await user.ahas_perm('gestion.add_paiement'),
     }
     
     context = {
         # Données communes
-        'total_chambres': total_chambres,
-        'chambres_disponibles': chambres_disponibles,
-        'chambres_occupees': chambres_occupees,
-        'reservations_aujourdhui': reservations_aujourdhui,
-        'departs_aujourdhui': departs_aujourdhui,
-        'sejours_actifs': sejours_actifs,
-        'revenus_mois': revenus_mois,
+        **statistiques,
         'reservations_recentes': reservations_recentes,
         'user_permissions': user_permissions,
-        'total_clients': total_clients,
-        'total_reservations': total_reservations,
-        'reservations_confirmees': reservations_confirmees,
         
         # Données spécifiques
         'is_admin': is_admin,
-        'revenus_total': revenus_total,
-        'chambres_par_type': chambres_par_type,
-        'reservations_par_mois': reservations_par_mois,
+        **donnees_admin,
     }
     
-    return render(request, 'gestion/dashboard.html', context)
+    return await sync_to_async(render)(request, 'gestion/dashboard.html', context)
 
 # ============ GESTION DES CLIENTS ============
 
 @login_required
 def client_list(request):
     search = request.GET.get('search', '')
-    if search:
-        clients = Client.objects.filter(
-            Q(nom__icontains=search) |
-            Q(prenom__icontains=search) |
-            Q(email__icontains=search) |
-            Q(telephone__icontains=search)
-        ).order_by('-date_inscription')
-    else:
-        clients = Client.objects.all().order_by('-date_inscription')
+    clients = filtrer_clients(Client.objects.all(), request.GET)
     
     context = {
-        'clients': clients,
+        'clients': paginer(request, clients, 'date_inscription'),
         'search': search,
     }
     return render(request, 'gestion/client_list.html', context)
 
+@login_required
+def client_export(request):
+    with lecture_rapports(request) as base:
+        return reponse_export('clients', request.GET.get('format', 'csv'), request.GET, base)
+
 @login_required
 def client_create(request):
     if request.method == 'POST':
@@ -191,7 +159,7 @@ def client_create(request):
         
         # Créer le client
         try:
-            client = Client.objects.create(
+            client = reprise_sur_verrou(Client.objects.create)(
                 nom=nom,
                 prenom=prenom,
                 email=email,
@@ -280,12 +248,13 @@ def chambre_list(request):
     if statut_filtre:
         chambres = chambres.filter(statut=statut_filtre)
     
-    # Statistiques
-    total_chambres = Chambre.objects.count()
-    chambres_disponibles = Chambre.objects.filter(statut='DISPONIBLE').count()
+    # Statistiques (catalogue en mémoire, sans requête)
+    chambres_catalogue = catalogue()
+    total_chambres = chambres_catalogue.compter()
+    chambres_disponibles = chambres_catalogue.compter(statut='DISPONIBLE')
     
     context = {
-        'chambres': chambres,
+        'chambres': paginer(request, chambres, 'numero_chambre', decroissant=False),
         'total_chambres': total_chambres,
         'chambres_disponibles': chambres_disponibles,
         'type_filtre': type_filtre,
@@ -371,28 +340,13 @@ def reservation_list(request):
     date_debut = request.GET.get('date_debut', '')
     date_fin = request.GET.get('date_fin', '')
     
-    reservations = Reservation.objects.select_related('client', 'chambre').all()
-    
-    if search:
-        reservations = reservations.filter(
-            Q(client__nom__icontains=search) |
-            Q(client__prenom__icontains=search) |
-            Q(chambre__numero_chambre__icontains=search)
-        )
-    
-    if statut_filtre:
-        reservations = reservations.filter(statut=statut_filtre)
-    
-    if date_debut:
-        reservations = reservations.filter(date_debut_sejour__gte=date_debut)
-    
-    if date_fin:
-        reservations = reservations.filter(date_fin_sejour__lte=date_fin)
-    
-    reservations = reservations.order_by('-date_reservation')
+    reservations = filtrer_reservations(
+        # Le séjour (relation inverse) est lu pour masquer le bouton de check-in
+        Reservation.objects.select_related('client', 'chambre', 'sejour'), request.GET
+    )
     
     context = {
-        'reservations': reservations,
+        'reservations': paginer(request, reservations, 'date_reservation'),
         'search': search,
         'statut_filtre': statut_filtre,
         'date_debut': date_debut,
@@ -400,13 +354,49 @@ def reservation_list(request):
     }
     return render(request, 'gestion/reservation_list.html', context)
 
+@login_required
+def reservation_export(request):
+    with lecture_rapports(request) as base:
+        return reponse_export('reservations', request.GET.get('format', 'csv'), request.GET, base)
+
 @login_required
 def reservation_create(request):
-    # Récupérer tous les clients
-    clients = Client.objects.all().order_by('nom', 'prenom')
-    
-    # Récupérer seulement les chambres disponibles
-    chambres = Chambre.objects.filter(statut='DISPONIBLE').order_by('numero_chambre')
+    # Aucun chargement de la table des clients : le client est choisi par autocomplétion
+    # (api_clients_recherche) et les chambres viennent de la requête de disponibilité
+    donnees = request.POST if request.method == 'POST' else request.GET
+    
+    client_id = donnees.get('client', '')
+    client_selectionne = None
+    if client_id.isdigit():
+        client_selectionne = Client.objects.filter(pk=client_id).first()
+    
+    # Chambres libres sur la période choisie (aucune tant que les dates sont inconnues)
+    recherche = DisponibiliteChambreForm({
+        **donnees.dict(),
+        'date_debut': donnees.get('date_debut') or donnees.get('date_debut_sejour'),
+        'date_fin': donnees.get('date_fin') or donnees.get('date_fin_sejour'),
+    })
+    if recherche.is_valid():
+        # Devis de toutes les chambres proposées en une passe, quel que soit leur nombre
+        chambres = coter(list(recherche.chambres_disponibles().values(
+            'id', 'numero_chambre', 'type_chambre', 'prix_nuit'
+        )), recherche.cleaned_data['date_debut'], recherche.cleaned_data['date_fin'])
+        libelles = dict(Chambre.TYPE_CHAMBRE_CHOICES)
+        for chambre in chambres:
+            chambre['libelle_type'] = libelles[chambre['type_chambre']]
+    else:
+        chambres = Chambre.objects.none()
+    
+    def afficher():
+        context = {
+            'client_selectionne': client_selectionne,
+            'chambres': chambres,
+            'chambre_id': donnees.get('chambre', ''),
+            'date_debut': recherche.data.get('date_debut') or '',
+            'date_fin': recherche.data.get('date_fin') or '',
+            'commentaire': donnees.get('commentaire', ''),
+        }
+        return render(request, 'gestion/reservation_form.html', context)
     
     if request.method == 'POST':
         try:
@@ -419,10 +409,9 @@ def reservation_create(request):
             commentaire = request.POST.get('commentaire', '')
             
             # Validation des données
-            if not client_id or not chambre_id or not date_debut_sejour or not date_fin_sejour:
+            if not client_selectionne or not chambre_id or not date_debut_sejour or not date_fin_sejour:
                 messages.error(request, 'Veuillez remplir tous les champs obligatoires.')
-                context = {'clients': clients, 'chambres': chambres}
-                return render(request, 'gestion/reservation_form.html', context)
+                return afficher()
             
             # Calculer le nombre de nuits et le prix
             debut = datetime.strptime(date_debut_sejour, '%Y-%m-%d').date()
@@ -432,12 +421,16 @@ def reservation_create(request):
             # Vérifier que la date de fin est après la date de début
             if nombre_nuits <= 0:
                 messages.error(request, 'La date de départ doit être postérieure à la date d\'arrivée.')
-                context = {'clients': clients, 'chambres': chambres}
-                return render(request, 'gestion/reservation_form.html', context)
+                return afficher()
+            
+            # Récupérer la chambre (catalogue en mémoire) et calculer le prix selon les tarifs
+            chambre = catalogue().chambre(chambre_id)
+            prix_total = prix_sejour(chambre, debut, fin)
             
-            # Récupérer la chambre pour obtenir le prix
-            chambre = Chambre.objects.get(id=chambre_id)
-            prix_total = chambre.prix_nuit * nombre_nuits
+            # Vérifier que la chambre est libre sur la période
+            if not chambre.est_disponible(debut, fin):
+                messages.error(request, f'La chambre {chambre.numero_chambre} n\'est pas disponible pour cette période.')
+                return afficher()
             
             # Convertir nombre_personnes en entier
             try:
@@ -447,13 +440,13 @@ def reservation_create(request):
             except (ValueError, TypeError):
                 nombre_adultes = 1
             
-            # Créer la réservation
-            reservation = Reservation.objects.create(
-                client_id=client_id,
-                chambre_id=chambre_id,
+            # Créer la réservation (rejouée si la base est momentanément verrouillée)
+            reservation = reprise_sur_verrou(Reservation.objects.create)(
+                client=client_selectionne,
+                chambre=chambre,
                 utilisateur=request.user,
-                date_debut_sejour=date_debut_sejour,
-                date_fin_sejour=date_fin_sejour,
+                date_debut_sejour=debut,
+                date_fin_sejour=fin,
                 nombre_nuits=nombre_nuits,
                 nombre_adultes=nombre_adultes,
                 nombre_enfants=0,
@@ -466,22 +459,84 @@ def reservation_create(request):
             messages.success(request, f'Réservation créée avec succès pour {reservation.client.nom_complet} !')
             return redirect('dashboard')
             
+        except ChambreIndisponible:
+            messages.error(request, 'La chambre vient d\'être réservée sur cette période par un autre utilisateur.')
         except Chambre.DoesNotExist:
             messages.error(request, 'La chambre sélectionnée n\'existe pas.')
-        except Client.DoesNotExist:
-            messages.error(request, 'Le client sélectionné n\'existe pas.')
         except Exception as e:
             messages.error(request, f'Erreur lors de la création de la réservation : {str(e)}')
     
+    return afficher()
+
+@login_required
+def api_clients_recherche(request):
+    """API JSON : clients correspondant au préfixe saisi, classés, limités"""
+    try:
+        limite = min(int(request.GET.get('limite', LIMITE_SUGGESTIONS)), 50)
+    except ValueError:
+        limite = LIMITE_SUGGESTIONS
+    
+    clients = suggestions_clients(request.GET.get('q', ''), max(limite, 1))
+    
+    return JsonResponse({
+        'clients': [
+            {
+                'id': client.id,
+                'nom_complet': client.nom_complet,
+                'telephone': client.telephone,
+                'email': client.email,
+            }
+            for client in clients
+        ],
+    })
+
+@login_required
+def api_chambres_disponibles(request):
+    """API JSON : chambres libres entre date_debut et date_fin avec le prix du séjour (filtres optionnels)"""
+    form = DisponibiliteChambreForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'erreurs': form.errors}, status=400)
+    
+    date_debut = form.cleaned_data['date_debut']
+    date_fin = form.cleaned_data['date_fin']
+    # Devis de toutes les chambres libres en une passe (saison, week-end, remise de durée)
+    chambres = coter(list(form.chambres_disponibles().values(
+        'id', 'numero_chambre', 'type_chambre', 'prix_nuit', 'nombre_lits', 'etage'
+    )), date_debut, date_fin)
+    
+    return JsonResponse({
+        'date_debut': date_debut.isoformat(),
+        'date_fin': date_fin.isoformat(),
+        'nuits': (date_fin - date_debut).days,
+        'chambres': chambres,
+    })
+
+@login_required
+def planning(request):
+    """Planning des chambres : chambres en lignes, nuits en colonnes"""
+    form = PlanningForm(request.GET)
+    grille = form.planning() if form.is_valid() else None
+    
     context = {
-        'clients': clients,
-        'chambres': chambres
+        'form': form,
+        'jours': grille.jours() if grille else [],
+        'lignes': grille.lignes() if grille else [],
+        'legende': LEGENDE,
     }
-    return render(request, 'gestion/reservation_form.html', context)
+    return render(request, 'gestion/planning.html', context)
+
+@login_required
+def api_planning(request):
+    """API JSON : occupation de chaque chambre, une lettre par nuit (voir gestion.planning)"""
+    form = PlanningForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'erreurs': form.errors}, status=400)
+    
+    return JsonResponse(form.planning().en_json())
 
 @login_required
 def reservation_update(request, pk):
-    reservation = get_object_or_404(Reservation, pk=pk)
+    reservation = get_object_or_404(Reservation.objects.select_related('client'), pk=pk)
     
     if request.method == 'POST':
         form = ReservationForm(request.POST, instance=reservation)
@@ -492,9 +547,24 @@ def reservation_update(request, pk):
     else:
         form = ReservationForm(instance=reservation)
     
-    context = {'form': form, 'reservation': reservation}
+    # Même gabarit que la création : client par autocomplétion, chambres libres sur la période
+    context = {
+        'form': form,
+        'reservation': reservation,
+        'client_selectionne': reservation.client,
+        'chambres': form.fields['chambre'].queryset,
+        'chambre_id': str(form['chambre'].value() or ''),
+        'date_debut': _valeur_saisie(form['date_debut_sejour']),
+        'date_fin': _valeur_saisie(form['date_fin_sejour']),
+        'commentaire': form['commentaire'].value() or '',
+    }
     return render(request, 'gestion/reservation_form.html', context)
 
+def _valeur_saisie(champ):
+    """Valeur d'un champ pour un input HTML (dates au format ISO de type=date)"""
+    valeur = champ.value()
+    return valeur.isoformat() if hasattr(valeur, 'isoformat') else (valeur or '')
+
 @login_required
 def reservation_delete(request, pk):
     reservation = get_object_or_404(Reservation, pk=pk)
@@ -539,48 +609,29 @@ def reservation_cancel(request, pk):
                 'reservation': reservation
             })
         
+        # Construire le commentaire complet
+        commentaire_complet = f"[ANNULATION - {timezone.now().strftime('%d/%m/%Y %H:%M')}]\n"
+        commentaire_complet += f"Motif: {motif_annulation}\n"
+        commentaire_complet += f"Par: {request.user.username}\n"
+        if commentaire_annulation:
+            commentaire_complet += f"Détails: {commentaire_annulation}\n"
+        
         try:
-            # Si un séjour existe, le supprimer d'abord
-            if hasattr(reservation, 'sejour'):
-                sejour = reservation.sejour
-                
-                # Vérifier s'il y a des paiements associés au séjour
-                paiements = Paiement.objects.filter(sejour=sejour)
-                if paiements.exists():
-                    # Marquer les paiements comme remboursés
-                    paiements.update(statut='REMBOURSE')
-                    messages.info(request, f'{paiements.count()} paiement(s) marqué(s) comme remboursé(s).')
-                
-                # Supprimer le séjour
-                sejour.delete()
-                messages.info(request, 'Le séjour associé a été supprimé.')
-            
-            # Construire le commentaire complet
-            commentaire_complet = f"[ANNULATION - {timezone.now().strftime('%d/%m/%Y %H:%M')}]\n"
-            commentaire_complet += f"Motif: {motif_annulation}\n"
-            commentaire_complet += f"Par: {request.user.username}\n"
-            if commentaire_annulation:
-                commentaire_complet += f"Détails: {commentaire_annulation}\n"
-            
-            # Ajouter au commentaire existant
-            if reservation.commentaire:
-                reservation.commentaire += f"\n\n{commentaire_complet}"
-            else:
-                reservation.commentaire = commentaire_complet
+            effets = annuler_reservation(reservation.pk, commentaire_complet)
             
-            # Annuler la réservation
-            reservation.statut = 'ANNULEE'
-            reservation.save()
-            
-            # Libérer la chambre
-            chambre = reservation.chambre
-            if chambre.statut == 'OCCUPEE':
-                chambre.statut = 'DISPONIBLE'
-                chambre.save()
-                messages.info(request, f'La chambre {chambre.numero_chambre} a été libérée.')
+            if effets['paiements_rembourses']:
+                messages.info(request, f'{len(effets["paiements_rembourses"])} paiement(s) marqué(s) comme remboursé(s).')
+            if effets['sejour_supprime']:
+                messages.info(request, 'Le séjour associé a été supprimé.')
+            if effets['sejour_cloture']:
+                messages.info(request, 'Le séjour associé a été clôturé (paiements conservés).')
+            if effets['chambre_liberee']:
+                messages.info(request, f'La chambre {reservation.chambre.numero_chambre} a été libérée.')
             
             messages.success(request, f'✅ Réservation #{reservation.id} annulée avec succès. Motif: {motif_annulation}')
             
+        except OperationImpossible as e:
+            messages.error(request, f'❌ {e}')
         except Exception as e:
             messages.error(request, f'❌ Erreur lors de l\'annulation : {str(e)}')
         
@@ -588,13 +639,14 @@ def reservation_cancel(request, pk):
 
 @login_required
 def reservation_detail(request, pk):
-    reservation = get_object_or_404(Reservation, pk=pk)
+    # Client, chambre, utilisateur et séjour chargés par jointure
+    reservation = get_object_or_404(
+        Reservation.objects.select_related('client', 'chambre', 'utilisateur', 'sejour'),
+        pk=pk
+    )
     
     # Séjour associé
-    try:
-        sejour = Sejour.objects.get(reservation=reservation)
-    except Sejour.DoesNotExist:
-        sejour = None
+    sejour = getattr(reservation, 'sejour', None)
     
     # Paiements
     paiements = Paiement.objects.filter(sejour=sejour) if sejour else []
@@ -612,10 +664,10 @@ def reservation_detail(request, pk):
 def sejour_list(request):
     sejours = Sejour.objects.select_related(
         'reservation', 'reservation__client', 'reservation__chambre'
-    ).order_by('-date_checkin')
+    )
     
     context = {
-        'sejours': sejours,
+        'sejours': paginer(request, sejours, 'date_checkin'),
     }
     return render(request, 'gestion/sejour_list.html', context)
 
@@ -663,13 +715,16 @@ def sejour_delete(request, pk):
 
 @login_required
 def sejour_detail(request, pk):
-    sejour = get_object_or_404(Sejour, pk=pk)
+    sejour = get_object_or_404(
+        Sejour.objects.select_related('reservation__client', 'reservation__chambre'),
+        pk=pk
+    )
     
     # Paiements du séjour
     paiements = Paiement.objects.filter(sejour=sejour).order_by('-date_paiement')
     
     # Services supplémentaires
-    services = ReservationService.objects.filter(reservation=sejour.reservation).select_related('service')
+    services = ReservationService.objects.filter(reservation_id=sejour.reservation_id).select_related('service')
     
     context = {
         'sejour': sejour,
@@ -701,9 +756,9 @@ def sejour_checkin(request, reservation_id):
         commentaire = request.POST.get('commentaire', '')
         
         try:
-            # Créer le séjour
-            sejour = Sejour.objects.create(
-                reservation=reservation,
+            # Créer le séjour (réservation et chambre verrouillées)
+            sejour = effectuer_checkin(
+                reservation.pk,
                 date_arrivee_effective=date_arrivee_effective,
                 nombre_personnes=int(nombre_personnes),
                 commentaire=commentaire
@@ -712,12 +767,17 @@ def sejour_checkin(request, reservation_id):
             messages.success(request, f'Check-in effectué avec succès pour {reservation.client.nom_complet} !')
             return redirect('sejour_detail', pk=sejour.id)
             
+        except OperationImpossible as e:
+            messages.error(request, str(e))
         except Exception as e:
             messages.error(request, f'Erreur lors du check-in : {str(e)}')
     
     # Préparer la date/heure actuelle pour le formulaire
     now = timezone.now().strftime('%Y-%m-%dT%H:%M')
     
+    # Chambre affichée depuis le catalogue en mémoire
+    reservation.chambre = catalogue().chambre(reservation.chambre_id)
+    
     context = {
         'reservation': reservation,
         'now': now,
@@ -740,31 +800,26 @@ def sejour_checkout(request, sejour_id):
         commentaire = request.POST.get('commentaire', '')
         
         try:
-            # Vérifier que tous les paiements sont effectués
-            solde_restant = sejour.solde_restant
-            
-            if solde_restant > 0:
-                messages.error(request, f'Impossible de faire le check-out. Solde restant : {solde_restant} GNF')
-                return redirect('sejour_detail', pk=sejour.id)
-            
-            # Effectuer le check-out
-            sejour.date_depart_effective = date_depart_effective
-            sejour.date_checkout = timezone.now()
-            if commentaire:
-                sejour.commentaire = f"{sejour.commentaire}\n{commentaire}" if sejour.commentaire else commentaire
-            sejour.save()
+            # Effectuer le check-out (solde vérifié sous verrou)
+            effectuer_checkout(sejour.pk, date_depart_effective, commentaire)
             
             messages.success(request, f'Check-out effectué avec succès pour {sejour.reservation.client.nom_complet} !')
             return redirect('sejour_list')
             
+        except OperationImpossible as e:
+            messages.error(request, str(e))
+            return redirect('sejour_detail', pk=sejour.id)
         except Exception as e:
             messages.error(request, f'Erreur lors du check-out : {str(e)}')
     
     # Préparer la date/heure actuelle pour le formulaire
     now = timezone.now().strftime('%Y-%m-%dT%H:%M')
     
+    # Chambre affichée depuis le catalogue en mémoire
+    sejour.reservation.chambre = catalogue().chambre(sejour.reservation.chambre_id)
+    
     # Calculer les informations de paiement
-    total_a_payer = sejour.reservation.montant_total_avec_services
+    total_a_payer = sejour.montant_du
     total_paye = sejour.montant_total_paye
     solde_restant = sejour.solde_restant
     
@@ -784,17 +839,9 @@ def paiement_list(request):
     mode_filtre = request.GET.get('mode', '')
     statut_filtre = request.GET.get('statut', '')
     
-    paiements = Paiement.objects.select_related(
-        'sejour', 'sejour__reservation__client'
-    ).all()
-    
-    if mode_filtre:
-        paiements = paiements.filter(mode_paiement=mode_filtre)
-    
-    if statut_filtre:
-        paiements = paiements.filter(statut=statut_filtre)
-    
-    paiements = paiements.order_by('-date_paiement')
+    paiements = filtrer_paiements(
+        Paiement.objects.select_related('sejour', 'sejour__reservation__client'), request.GET
+    )
     
     # Total des paiements
     total_paiements = Paiement.objects.filter(statut='VALIDE').aggregate(
@@ -802,13 +849,18 @@ def paiement_list(request):
     )['total'] or 0
     
     context = {
-        'paiements': paiements,
+        'paiements': paginer(request, paiements, 'date_paiement'),
         'total_paiements': total_paiements,
         'mode_filtre': mode_filtre,
         'statut_filtre': statut_filtre,
     }
     return render(request, 'gestion/paiement_list.html', context)
 
+@login_required
+def paiement_export(request):
+    with lecture_rapports(request) as base:
+        return reponse_export('paiements', request.GET.get('format', 'csv'), request.GET, base)
+
 @login_required
 def paiement_create(request):
     # Récupérer tous les séjours actifs (pas encore terminés)
@@ -825,10 +877,10 @@ def paiement_create(request):
         
         # Générer une référence si elle n'est pas fournie
         if not reference_transaction:
-            reference_transaction = f"PAY-{datetime.now().strftime('%Y%m%d')}-{Paiement.objects.count() + 1:06d}"
+            reference_transaction = allouer_reference()
         
         # Créer le paiement
-        paiement = Paiement.objects.create(
+        paiement = reprise_sur_verrou(Paiement.objects.create)(
             sejour_id=sejour_id,
             montant=montant,
             mode_paiement=mode_paiement,
@@ -873,43 +925,104 @@ def paiement_delete(request, pk):
 # ============ RAPPORTS ============
 
 @login_required
-def rapports(request):
-    # Statistiques générales
-    total_clients = Client.objects.count()
-    total_reservations = Reservation.objects.count()
-    reservations_confirmees = Reservation.objects.filter(statut='CONFIRMEE').count()
-    
-    # Revenus total
-    revenus_total = Paiement.objects.filter(statut='VALIDE').aggregate(
-        total=Sum('montant')
-    )['total'] or 0
-    
-    # Chambres par type
-    chambres_par_type = Chambre.objects.values('type_chambre').annotate(
-        count=Count('id')
-    )
-    
-    # Réservations par mois (derniers 6 mois)
-    reservations_par_mois = Reservation.objects.annotate(
-        mois=TruncMonth('date_reservation')
-    ).values('mois').annotate(count=Count('id')).order_by('-mois')[:6]
+@sur_base_rapports
+async def rapports(request):
+    # Les agrégats proviennent du résumé journalier : le coût dépend du nombre de jours, pas de lignes
+    today = date.today()
+    fin = today
+    debut = today - timedelta(days=29)
+    try:
+        if request.GET.get('debut'):
+            debut = date.fromisoformat(request.GET['debut'])
+        if request.GET.get('fin'):
+            fin = date.fromisoformat(request.GET['fin'])
+    except ValueError:
+        messages.error(request, 'Période invalide, affichage des 30 derniers jours.')
+        debut, fin = today - timedelta(days=29), today
+    
+    # Requêtes indépendantes, lues simultanément
+    resultats = await calculer_en_parallele({
+        # Statistiques générales
+        'total_clients': Client.objects.count,
+        'reservations_confirmees': Reservation.objects.filter(statut='CONFIRMEE').count,
+        'totaux': lambda: StatistiqueJournaliere.objects.aggregate(
+            reservations=Sum('reservations_creees'),
+            especes=Sum('revenus_especes'),
+            carte=Sum('revenus_carte'),
+            virement=Sum('revenus_virement'),
+            mobile_money=Sum('revenus_mobile_money'),
+        ),
+        # Chambres par type
+        'chambres_par_type': lambda: catalogue().par_type(),
+        # Réservations par mois (derniers 6 mois)
+        'reservations_par_mois': lambda: list(StatistiqueJournaliere.objects.annotate(
+            mois=TruncMonth('jour')
+        ).values('mois').annotate(count=Sum('reservations_creees')).filter(
+            count__gt=0
+        ).order_by('-mois')[:6]),
+        # Occupation réelle par nuitée sur la période
+        'periode': lambda: StatistiqueJournaliere.objects.filter(
+            jour__gte=debut, jour__lte=fin
+        ).aggregate(
+            nuitees=Sum('nuitees_occupees'),
+            chambres=Sum('chambres_total'),
+            revenu_hebergement=Sum('revenu_hebergement'),
+        ),
+    })
+    
+    totaux = resultats['totaux']
+    total_reservations = totaux['reservations'] or 0
+    revenus_par_mode = {
+        'ESPECES': totaux['especes'] or 0,
+        'CARTE': totaux['carte'] or 0,
+        'VIREMENT': totaux['virement'] or 0,
+        'MOBILE_MONEY': totaux['mobile_money'] or 0,
+    }
+    revenus_total = sum(revenus_par_mode.values())
     
-    # Taux d'occupation
-    total_chambres = Chambre.objects.count()
-    chambres_occupees = Chambre.objects.filter(statut='OCCUPEE').count()
-    taux_occupation = (chambres_occupees / total_chambres * 100) if total_chambres > 0 else 0
+    periode = resultats['periode']
+    nuitees = periode['nuitees'] or 0
+    chambres_nuits = periode['chambres'] or 0
+    revenu_hebergement = periode['revenu_hebergement'] or 0
+    taux_occupation = (nuitees / chambres_nuits * 100) if chambres_nuits > 0 else 0
+    adr = revenu_hebergement / nuitees if nuitees > 0 else 0
+    revpar = revenu_hebergement / chambres_nuits if chambres_nuits > 0 else 0
     
     # Revenu moyen par réservation
     revenu_moyen = revenus_total / total_reservations if total_reservations > 0 else 0
     
     context = {
-        'total_clients': total_clients,
+        'total_clients': resultats['total_clients'],
         'total_reservations': total_reservations,
-        'reservations_confirmees': reservations_confirmees,
+        'reservations_confirmees': resultats['reservations_confirmees'],
         'revenus_total': revenus_total,
-        'chambres_par_type': chambres_par_type,
-        'reservations_par_mois': reservations_par_mois,
+        'revenus_par_mode': revenus_par_mode,
+        'chambres_par_type': resultats['chambres_par_type'],
+        'reservations_par_mois': resultats['reservations_par_mois'],
         'taux_occupation': round(taux_occupation, 2),
+        'adr': adr,
+        'revpar': revpar,
+        'nuitees_occupees': nuitees,
+        'debut': debut,
+        'fin': fin,
         'revenu_moyen': revenu_moyen,
     }
-    return render(request, 'gestion/rapports.html', context)
\ No newline at end of file
+    return await sync_to_async(render)(request, 'gestion/rapports.html', context)
+
+
+# ============ PERFORMANCES ============
+
+@staff_member_required
+def performances(request):
+    """Percentiles glissants par vue, relevés par le middleware d'instrumentation"""
+    if request.method == 'POST':
+        REGISTRE.vider()
+        messages.success(request, 'Mesures réinitialisées.')
+        return redirect('performances')
+    
+    context = {
+        'active': instrumentation_active(),
+        'vues': REGISTRE.resume(),
+        'taille_tampon': REGISTRE.taille,
+    }
+    return render(request, 'gestion/performances.html', context)
@@ -31,20 +31,27 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En tête pour mesurer toute la chaîne ; inactif si INSTRUMENTATION_ACTIVE est faux
+    'gestion.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gestion.routage.EcritureCollanteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Permissions lues dans le cache des droits (gestion.droits)
+AUTHENTICATION_BACKENDS = ['gestion.droits.DroitsBackend']
+
 ROOT_URLCONF = 'hotel_management.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Moteur Django standard dont le temps de rendu est mesuré par l'instrumentation
+        'BACKEND': 'gestion.instrumentation.DjangoTemplatesInstrumentes',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -68,9 +75,52 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Base de test sur fichier : les tests de concurrence ouvrent plusieurs connexions
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Profil SQLite de production, appliqué à chaque connexion (gestion.sqlite) :
+# activé par SQLITE_PROFIL=production. Le mode WAL est mémorisé dans le fichier
+# de la base et crée les fichiers -wal et -shm à côté de celle-ci.
+SQLITE_PROFIL_PRODUCTION = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',   # sûr en WAL : seule la dernière transaction peut être perdue
+    'busy_timeout': 5000,      # ms d'attente d'un verrou avant « database is locked »
+    'cache_size': -64000,      # 64 Mo de cache de pages
+    'mmap_size': 268435456,    # 256 Mo lus par projection mémoire
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS = {}
+if os.environ.get('SQLITE_PROFIL') == 'production':
+    SQLITE_PRAGMAS = SQLITE_PROFIL_PRODUCTION
+    # Prendre le verrou d'écriture dès BEGIN : évite les échecs immédiats
+    # « database is locked » quand deux transactions lisent puis écrivent
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+# Base de lecture des rapports, exports et statistiques administrateur
+# (gestion.routage) : la base principale ouverte en lecture seule, ou la copie
+# désignée par BASE_RAPPORTS (rafraîchie par « manage.py repliquer_rapports »)
+BASE_RAPPORTS = os.environ.get('BASE_RAPPORTS', '')
+DATABASES['rapports'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': f"file:{BASE_RAPPORTS or DATABASES['default']['NAME']}?mode=ro",
+    'TEST': {
+        'MIRROR': 'default',
+    },
+}
+DATABASE_ROUTERS = ['gestion.routage.RouteurRapports']
+
+# Après une écriture, les lectures de l'utilisateur restent sur la base
+# principale pendant ce délai (secondes) : il voit ses propres écritures
+ROUTAGE_DELAI_COLLANT = 10
+
+# Threads du pool qui lit simultanément les agrégats des vues asynchrones
+# (gestion.parallele) ; 1 les lit à la suite sur la connexion de la requête
+AGREGATS_PARALLELES = 4
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,3 +183,22 @@ MESSAGE_TAGS = {
     messages.WARNING: 'alert-warning',
     messages.ERROR: 'alert-danger',
 }
+
+# Instrumentation des performances (SQL, rendu, percentiles par vue)
+INSTRUMENTATION_ACTIVE = os.environ.get('INSTRUMENTATION_ACTIVE') == '1'
+INSTRUMENTATION_TAILLE_TAMPON = 1000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'gestion.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}